@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -184,6 +185,14 @@ SIMPLE_JWT = {
 
 # 중재 서비스 설정
 INTERVENTION_SERVICE_URL = os.environ.get('INTERVENTION_SERVICE_URL', 'http://localhost:29005')
+# LLM 모드 배치 샤드를 처리하는 상주 추론 워커의 Celery 큐
+INTERVENTION_INFERENCE_QUEUE = os.environ.get('INTERVENTION_INFERENCE_QUEUE', 'inference')
+
+# 음식 검색 응답 캐시 (프로세스 로컬 LRU + 선택적 Redis 공유 캐시)
+# FOOD_SEARCH_CACHE_REDIS_URL을 비워 두면 로컬 LRU만 사용
+FOOD_SEARCH_CACHE_REDIS_URL = os.environ.get('FOOD_SEARCH_CACHE_REDIS_URL', '')
+FOOD_SEARCH_CACHE_TTL = int(os.environ.get('FOOD_SEARCH_CACHE_TTL', 3600))
+FOOD_SEARCH_CACHE_SIZE = int(os.environ.get('FOOD_SEARCH_CACHE_SIZE', 2048))
 
 # Celery 설정
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
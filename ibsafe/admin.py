@@ -211,7 +211,7 @@ class UserWaterRecordAdmin(admin.ModelAdmin):
 
 @admin.register(BatchSchedule)
 class BatchScheduleAdmin(admin.ModelAdmin):
-    list_display = ['name', 'frequency', 'hour', 'minute', 'is_active', 'created_at']
+    list_display = ['name', 'frequency', 'hour', 'minute', 'is_active', 'use_sharding', 'created_at']
     list_filter = ['frequency', 'is_active', 'created_at']
     search_fields = ['name']
     ordering = ['-created_at']
@@ -224,6 +224,10 @@ class BatchScheduleAdmin(admin.ModelAdmin):
             'fields': ('hour', 'minute'),
             'description': '매일/매주/매월 실행할 시간을 설정합니다.'
         }),
+        ('샤딩 실행', {
+            'fields': ('use_sharding', 'shard_size', 'shard_concurrency'),
+            'description': '사용자를 샤드로 나누어 여러 Celery 워커에서 병렬로 실행합니다.'
+        }),
     )
     
     def get_readonly_fields(self, request, obj=None):
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class IbsafeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ibsafe'
+
+    def ready(self):
+        # 음식 검색 요약 테이블 동기화 시그널 등록
+        from . import signals  # noqa: F401
+        
+        # 웹 서버 프로세스는 시작 시 음식 자동완성 인덱스를 백그라운드에서 생성
+        from .food_autocomplete import warm_autocomplete_index_on_startup
+        warm_autocomplete_index_on_startup()
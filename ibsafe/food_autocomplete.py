@@ -0,0 +1,344 @@
+"""
+음식 이름 자동완성 (프로세스 내 메모리 인덱스)
+
+한글은 입력 중간 상태(예: '김ㅊ', '닭'을 입력하는 중의 '달ㄱ')와
+초성 입력(예: 'ㄱㅊㅂㅇㅂ' -> 김치볶음밥)을 지원하도록 자모 단위로 분해하여 색인합니다.
+- 자모 키 / 초성 키: 이름의 각 단어 시작 위치부터의 문자열을 분해하여 정렬된 배열로 저장,
+  접두어 검색은 이진 탐색으로 범위를 찾음 (짧은 접두어는 상위 결과를 미리 계산)
+- n-gram 보조 검색: 접두어 결과가 부족하면 음절 unigram/bigram 역색인으로 이름 중간 일치 검색
+- 정렬: 전체 기록 수(FoodSearchEntry.usage_count, 인기순) > 짧은 이름 > 이름순
+
+인덱스는 웹 서버 프로세스 시작 시(IBSAFE_WARM_AUTOCOMPLETE=1) 백그라운드에서 FoodSearchEntry로부터 만들고,
+음식 카탈로그 버전(프로세스 간 공유)이 바뀌거나(음식 변경, 사용 통계 갱신 시)
+AUTOCOMPLETE_REFRESH_SECONDS가 지나면 기존 인덱스로 계속 응답하면서 백그라운드에서 다시 만듭니다.
+(시작 시 예열이 끝나기 전의 첫 요청만 인덱스 생성을 기다림)
+"""
+import bisect
+import heapq
+import os
+import re
+import sys
+import threading
+import time
+
+from .food_search import SEARCH_RESULT_LIMIT, entry_result, get_catalog_version, normalize_food_name
+
+# 이 길이 이하의 접두어는 상위 결과를 미리 계산
+SHORT_PREFIX_LENGTH = 2
+# 카탈로그 버전 변경이 없어도 인덱스를 다시 만드는 주기 (초) - 버전 확인에 실패한 경우 등의 보조 수단
+AUTOCOMPLETE_REFRESH_SECONDS = 3600
+# 이 환경 변수가 1인 프로세스(웹 서버)는 시작 시 인덱스를 미리 생성
+AUTOCOMPLETE_WARM_ENV = 'IBSAFE_WARM_AUTOCOMPLETE'
+
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+JUNGSEONG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+JONGSEONG = ('', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ',
+             'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ')
+
+# 겹모음/겹받침은 키보드 입력 순서대로 나눔 (예: '닭' 입력 중 '달ㄱ'도 일치하도록)
+COMPOUND_JAMO = {
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+}
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_CONSONANTS = set(CHOSEONG) | {'ㄳ', 'ㄵ', 'ㄶ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ', 'ㅄ'}
+
+# 단어 구분자 (각 단어 시작 위치부터도 접두어 검색 가능)
+_word_separator_re = re.compile(r'[\s_,()\[\]/·&+-]+')
+_word_re = re.compile(r'[^\s_,()\[\]/·&+-]+')
+
+
+def normalize_autocomplete_text(text):
+    """
+    normalize_food_name 후 조합형 자모(NFKC가 호환 자모 'ㅊ'를 바꾼 형태)를 다시 호환 자모로 변환
+    """
+    chars = []
+    for ch in normalize_food_name(text):
+        code = ord(ch)
+        if 0x1100 <= code <= 0x1112:
+            ch = CHOSEONG[code - 0x1100]
+        elif 0x1161 <= code <= 0x1175:
+            ch = JUNGSEONG[code - 0x1161]
+        elif 0x11A8 <= code <= 0x11C2:
+            ch = JONGSEONG[code - 0x11A8 + 1]
+        chars.append(ch)
+    return ''.join(chars)
+
+
+def decompose_jamo(text):
+    """
+    한글 음절을 자모 입력 순서대로 분해 ('김치' -> 'ㄱㅣㅁㅊㅣ'), 그 외 문자는 그대로
+    """
+    chars = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            index = code - _HANGUL_BASE
+            chars.append(CHOSEONG[index // 588])
+            jung = JUNGSEONG[(index % 588) // 28]
+            chars.append(COMPOUND_JAMO.get(jung, jung))
+            jong = JONGSEONG[index % 28]
+            if jong:
+                chars.append(COMPOUND_JAMO.get(jong, jong))
+        else:
+            chars.append(COMPOUND_JAMO.get(ch, ch))
+    return ''.join(chars)
+
+
+def extract_choseong(text):
+    """
+    한글 음절을 초성으로 변환 ('김치볶음밥' -> 'ㄱㅊㅂㅇㅂ'), 그 외 문자는 그대로
+    """
+    chars = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            chars.append(CHOSEONG[(code - _HANGUL_BASE) // 588])
+        else:
+            chars.append(ch)
+    return ''.join(chars)
+
+
+def is_choseong_query(text):
+    """
+    자음만으로 된 검색어인지 (초성 검색)
+    """
+    return any(ch in _CONSONANTS for ch in text) and all(
+        ch in _CONSONANTS or not ('ㄱ' <= ch <= 'ㆎ' or _HANGUL_BASE <= ord(ch) <= _HANGUL_LAST)
+        for ch in text
+    )
+
+
+def _word_suffixes(name):
+    """
+    이름의 각 단어 시작 위치부터의 정규화 문자열 ('김치 볶음밥' -> ['김치볶음밥', '볶음밥'])
+    """
+    suffixes = []
+    for match in _word_re.finditer(name):
+        suffix = normalize_autocomplete_text(_word_separator_re.sub(' ', name[match.start():]))
+        if suffix and suffix not in suffixes:
+            suffixes.append(suffix)
+    return suffixes
+
+
+def _query_grams(text):
+    # 한 글자 검색어는 음절 하나, 그 외에는 음절 bigram
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _index_grams(text):
+    return set(text) | _query_grams(text)
+
+
+class _PrefixArray:
+    """
+    정렬된 (키, 순위) 배열 - 이진 탐색으로 접두어 범위를 찾아 순위가 높은 항목 반환
+    """
+
+    def __init__(self, items):
+        items = sorted(set(items))
+        self.keys = [key for key, _ in items]
+        self.ranks = [rank for _, rank in items]
+        # 짧은 접두어는 일치 항목이 많으므로 상위 결과를 미리 계산
+        short = {}
+        for key, rank in items:
+            for length in range(1, min(SHORT_PREFIX_LENGTH, len(key)) + 1):
+                short.setdefault(key[:length], set()).add(rank)
+        self.short_top = {
+            prefix: heapq.nsmallest(SEARCH_RESULT_LIMIT, ranks) for prefix, ranks in short.items()
+        }
+
+    def search(self, prefix, limit):
+        if len(prefix) <= SHORT_PREFIX_LENGTH and prefix in self.short_top:
+            return self.short_top[prefix][:limit]
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + '\uffff', lo=start)
+        return heapq.nsmallest(limit, set(self.ranks[start:end]))
+
+
+class FoodAutocompleteIndex:
+    """
+    음식 이름 자동완성 인덱스
+
+    entries: 검색 결과 dict 목록 (food_search.search_food_entries 결과와 같은 형식, 'food_pk' 포함)
+    popularity: {food_pk: 기록 수}
+    """
+
+    def __init__(self, entries, popularity=None, version=None):
+        popularity = popularity or {}
+        # 순위: 인기순 > 짧은 이름 > 이름순 (순위 숫자가 작을수록 먼저)
+        self.entries = sorted(
+            entries,
+            key=lambda entry: (-popularity.get(entry['food_pk'], 0), len(entry['name']), entry['name'])
+        )
+        self.version = version
+        self.built_at = time.monotonic()
+        self.normalized_names = [normalize_autocomplete_text(entry['name']) for entry in self.entries]
+
+        jamo_items = []
+        choseong_items = []
+        bigram_index = {}
+        for rank, entry in enumerate(self.entries):
+            for suffix in _word_suffixes(entry['name']):
+                jamo_items.append((decompose_jamo(suffix), rank))
+                choseong_items.append((extract_choseong(suffix), rank))
+            for gram in _index_grams(self.normalized_names[rank]):
+                bigram_index.setdefault(gram, []).append(rank)
+
+        self.jamo = _PrefixArray(jamo_items)
+        self.choseong = _PrefixArray(choseong_items)
+        self.bigram_index = bigram_index
+
+    def _ngram_search(self, normalized_query, limit, exclude):
+        grams = _query_grams(normalized_query)
+        if not grams:
+            return []
+        postings = sorted((self.bigram_index.get(gram, []) for gram in grams), key=len)
+        if not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        matches = (
+            rank for rank in sorted(candidates)
+            if rank not in exclude and normalized_query in self.normalized_names[rank]
+        )
+        return [rank for _, rank in zip(range(limit), matches)]
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        """
+        접두어(자모/초성) 검색 후 결과가 부족하면 n-gram으로 이름 중간 일치 항목 추가
+        """
+        normalized_query = normalize_autocomplete_text(query)
+        if not normalized_query:
+            return []
+
+        if is_choseong_query(normalized_query):
+            ranks = self.choseong.search(normalized_query, limit)
+        else:
+            ranks = self.jamo.search(decompose_jamo(normalized_query), limit)
+            if len(ranks) < limit:
+                ranks += self._ngram_search(normalized_query, limit - len(ranks), set(ranks))
+        return [self.entries[rank] for rank in ranks]
+
+
+def build_autocomplete_index():
+    """
+    FoodSearchEntry(전체 기록 수 usage_count 포함)로 자동완성 인덱스 생성
+    """
+    from .models import FoodSearchEntry
+
+    version = get_catalog_version()
+    entries = []
+    popularity = {}
+    for food in FoodSearchEntry.objects.order_by():
+        entry = entry_result(food)
+        entry['food_pk'] = food.food_id
+        entries.append(entry)
+        popularity[food.food_id] = food.usage_count
+    start_time = time.time()
+    index = FoodAutocompleteIndex(entries, popularity, version=version)
+    print(f"음식 자동완성 인덱스 생성: {len(entries)}개 ({time.time() - start_time:.2f}초, 카탈로그 버전 {version})")
+    return index
+
+
+_index = None
+_index_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_refreshing = False
+
+
+def _is_index_stale(index):
+    return (
+        index.version != get_catalog_version()
+        or time.monotonic() - index.built_at >= AUTOCOMPLETE_REFRESH_SECONDS
+    )
+
+
+def _refresh_index():
+    global _index, _refreshing
+    from django.db import connection
+
+    try:
+        _index = build_autocomplete_index()
+    except Exception as e:
+        print(f"음식 자동완성 인덱스 갱신 실패 (기존 인덱스 유지): {e}")
+    finally:
+        with _refresh_lock:
+            _refreshing = False
+        # 백그라운드 스레드의 DB 연결 정리
+        connection.close()
+
+
+def refresh_autocomplete_index_async():
+    """
+    백그라운드 스레드에서 인덱스를 다시 만들어 교체 (이미 갱신 중이면 무시)
+    """
+    global _refreshing
+    with _refresh_lock:
+        if _refreshing:
+            return False
+        _refreshing = True
+    threading.Thread(target=_refresh_index, name='autocomplete-refresh', daemon=True).start()
+    return True
+
+
+def get_autocomplete_index():
+    """
+    프로세스 공용 자동완성 인덱스
+    인덱스가 오래되었으면(카탈로그 버전 변경, 갱신 주기 경과) 기존 인덱스를 반환하고 백그라운드에서 갱신
+    """
+    global _index
+    index = _index
+    if index is None:
+        # 시작 시 예열 전의 첫 요청: 생성될 때까지 대기 (동시에 하나만 생성)
+        with _index_lock:
+            if _index is None:
+                _index = build_autocomplete_index()
+            return _index
+    if _is_index_stale(index):
+        refresh_autocomplete_index_async()
+    return index
+
+
+def _wait_and_build_index():
+    from django.apps import apps
+    from django.db import connection
+
+    # 앱 초기화(AppConfig.ready)가 모두 끝난 뒤 DB 조회
+    while not apps.ready:
+        time.sleep(0.1)
+    try:
+        get_autocomplete_index()
+    except Exception as e:
+        print(f"음식 자동완성 인덱스 예열 실패 (첫 요청 시 생성): {e}")
+    finally:
+        connection.close()
+
+
+def warm_autocomplete_index_on_startup():
+    """
+    웹 서버 프로세스 시작 시 백그라운드에서 인덱스 생성 (IbsafeConfig.ready에서 호출)
+    """
+    if os.environ.get(AUTOCOMPLETE_WARM_ENV) != '1':
+        return False
+    # runserver 자동 재시작용 부모 프로세스는 요청을 처리하지 않으므로 제외
+    if 'runserver' in sys.argv and '--noreload' not in sys.argv and os.environ.get('RUN_MAIN') != 'true':
+        return False
+    threading.Thread(target=_wait_and_build_index, name='autocomplete-warm', daemon=True).start()
+    return True
+
+
+def autocomplete_foods(query, limit=SEARCH_RESULT_LIMIT):
+    """
+    자동완성 검색 결과 (search_foods 응답과 같은 형식)
+    """
+    results = get_autocomplete_index().search(query, limit)
+    return [{key: value for key, value in entry.items() if key != 'food_pk'} for entry in results]
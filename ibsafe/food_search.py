@@ -0,0 +1,504 @@
+"""
+음식 검색용 요약 테이블(FoodSearchEntry) 관리
+
+Food는 150개가 넘는 컬럼을 가지므로 검색 응답에 필요한 컬럼만
+FoodSearchEntry로 복사해 두고 검색은 이 테이블에서 처리합니다.
+- Food / FoodCategory 저장·삭제 시 시그널로 자동 동기화 (ibsafe.signals)
+- bulk_create, loaddata 등 시그널이 발생하지 않는 적재 후에는 전체 재구성:
+    python manage.py rebuild_food_search
+
+인기순 정렬
+- 전체 기록 수(FoodSearchEntry.usage_count)와 사용자별 최근 기록 수(UserFoodUsage)를
+  주기적으로 집계하여 검색 결과를 인기순으로 정렬 (사용자가 최근 먹은 음식은 맨 앞):
+    python manage.py refresh_food_usage_stats
+
+검색 응답 캐시
+- 정규화된 검색어를 키로 프로세스 로컬 LRU + (설정 시) Redis 공유 캐시에 결과 저장
+- 음식 데이터가 바뀌면 카탈로그 버전(DB의 CatalogVersion, 프로세스 간 공유)을 올려
+  기존 캐시를 무효화 (키에 버전 포함, 각 프로세스는 1초마다 버전 확인)
+- 검색어 빈도를 기록해 두고 자주 쓰이는 접두어의 결과를 미리 계산:
+    python manage.py warm_food_search_cache
+  (검색어 빈도와 예열 결과를 웹 프로세스와 공유해야 하므로 Redis 설정 시에만 동작)
+"""
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, IntegerField, Max, Value, When
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from .models import CatalogVersion, Food, FoodSearchEntry, UserFoodRecord, UserFoodUsage
+
+# 검색 결과 최대 개수
+SEARCH_RESULT_LIMIT = 20
+# 사용자별 최근 사용 통계 집계 기간 (일)
+USER_USAGE_RECENT_DAYS = 30
+# 검색 개인화용 사용자 최근 음식 목록: 최대 개수, 프로세스 로컬 캐시 유지 시간 (초)
+USER_RECENT_FOODS_LIMIT = 200
+USER_RECENT_FOODS_TTL = 300
+
+# 검색 요약 테이블로 복사하는 Food 컬럼
+FOOD_SEARCH_FIELDS = (
+    'food_code', 'food_name', 'energy_kcal', 'protein_g', 'fat_g', 'carbohydrates_g',
+    'fodmap', 'dietary_fiber_type',
+)
+
+_whitespace_re = re.compile(r'\s+')
+
+
+def normalize_food_name(text):
+    """
+    검색용 정규화: 유니코드 NFKC 정규화, 소문자 변환, 공백 제거
+    (음식 이름과 검색어 모두 같은 방식으로 정규화하여 비교)
+    """
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    return _whitespace_re.sub('', text)
+
+
+def _entry_values(food, category_name):
+    values = {field: getattr(food, field) for field in FOOD_SEARCH_FIELDS}
+    values['normalized_name'] = normalize_food_name(food.food_name)
+    values['category_name'] = category_name or ''
+    return values
+
+
+def sync_food_search_entry(food):
+    """
+    음식 하나의 검색 항목 생성/갱신
+    """
+    category_name = food.category.main_category_name if food.category_id else ''
+    FoodSearchEntry.objects.update_or_create(
+        food=food,
+        defaults=_entry_values(food, category_name),
+    )
+
+
+def sync_category_search_entries(category):
+    """
+    분류명이 바뀐 경우 해당 분류 음식들의 검색 항목 분류명 갱신
+    """
+    return FoodSearchEntry.objects.filter(food__category=category).update(
+        category_name=category.main_category_name or ''
+    )
+
+
+def rebuild_food_search_entries(batch_size=1000):
+    """
+    Food 전체로부터 검색 요약 테이블 재구성 (하나의 트랜잭션)
+    반환: 생성된 항목 수
+    """
+    foods = Food.objects.select_related('category').only(
+        *FOOD_SEARCH_FIELDS, 'category__main_category_name'
+    ).order_by('pk')
+
+    usage_counts = _food_record_counts()
+    with transaction.atomic():
+        transaction.on_commit(bump_catalog_version)
+        FoodSearchEntry.objects.all().delete()
+        entries = []
+        count = 0
+        for food in foods.iterator(chunk_size=batch_size):
+            category_name = food.category.main_category_name if food.category_id else ''
+            entries.append(FoodSearchEntry(
+                food=food,
+                usage_count=usage_counts.get(food.pk, 0),
+                **_entry_values(food, category_name)
+            ))
+            if len(entries) >= batch_size:
+                FoodSearchEntry.objects.bulk_create(entries)
+                count += len(entries)
+                entries = []
+        if entries:
+            FoodSearchEntry.objects.bulk_create(entries)
+            count += len(entries)
+    return count
+
+
+def _food_record_counts():
+    """
+    음식별 전체 기록 수 {food_id: 기록 수}
+    """
+    return dict(
+        UserFoodRecord.objects.order_by().values('food_id').annotate(count=Count('id')).values_list('food_id', 'count')
+    )
+
+
+def refresh_food_usage_stats(recent_days=USER_USAGE_RECENT_DAYS, batch_size=1000):
+    """
+    음식 사용 통계 갱신 (하나의 트랜잭션)
+    - FoodSearchEntry.usage_count: 음식별 전체 기록 수
+    - UserFoodUsage: 최근 recent_days일 동안의 사용자별 음식 기록 수
+    반환: {'foods': 기록이 있는 음식 수, 'user_usages': 사용자별 통계 행 수}
+    """
+    usage_counts = _food_record_counts()
+    since = timezone.localdate() - timedelta(days=recent_days)
+    recent_usages = UserFoodRecord.objects.filter(record_date__gte=since).order_by().values(
+        'user_id', 'food_id'
+    ).annotate(record_count=Count('id'), last_record_date=Max('record_date'))
+
+    with transaction.atomic():
+        transaction.on_commit(bump_catalog_version)
+        FoodSearchEntry.objects.exclude(usage_count=0).update(usage_count=0)
+        entries = list(FoodSearchEntry.objects.filter(food_id__in=list(usage_counts)).only('id', 'food_id'))
+        for entry in entries:
+            entry.usage_count = usage_counts[entry.food_id]
+        FoodSearchEntry.objects.bulk_update(entries, ['usage_count'], batch_size=batch_size)
+
+        UserFoodUsage.objects.all().delete()
+        user_usages = [UserFoodUsage(**usage) for usage in recent_usages]
+        UserFoodUsage.objects.bulk_create(user_usages, batch_size=batch_size)
+
+    print(f"음식 사용 통계 갱신 완료: 음식 {len(entries)}개, 사용자별 통계 {len(user_usages)}개")
+    return {'foods': len(entries), 'user_usages': len(user_usages)}
+
+
+def entry_result(food):
+    """
+    FoodSearchEntry -> 검색 응답 항목
+    """
+    return {
+        'id': food.food_code,
+        'name': food.food_name,
+        'calories': food.energy_kcal or 0,
+        'protein': float(food.protein_g) if food.protein_g else 0.0,
+        'fat': float(food.fat_g) if food.fat_g else 0.0,
+        'carbs': float(food.carbohydrates_g) if food.carbohydrates_g else 0.0,
+        'amount': 100,  # 기본 100g 기준
+        'category': food.category_name,
+        'fodmap': food.fodmap,
+        'dietary_fiber_type': food.dietary_fiber_type,
+    }
+
+
+def search_food_entries(search_key):
+    """
+    정규화된 검색 키(검색어별 정규화 후 공백으로 연결)로 검색하여 응답용 결과 목록 반환
+    각 검색어에 대해 AND 조건으로 필터링 (normalized_name pg_trgm GIN 인덱스 사용)
+    """
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    terms = search_key.split()
+    normalized_query = ''.join(terms)
+    foods = FoodSearchEntry.objects.all()
+    for term in terms:
+        foods = foods.filter(normalized_name__contains=term)
+    
+    # 관련도 단계(정확히 일치 > 검색어로 시작 > 포함) 순으로 정렬하고,
+    # 같은 단계 안에서는 인기순(전체 기록 수), 유사도 높은 순, 짧은 이름 순
+    # (match_rank가 계산식이라 인덱스 순서로 읽을 수 없으므로 GIN 인덱스로 찾은 일치 항목만 정렬)
+    foods = foods.annotate(
+        match_rank=Case(
+            When(normalized_name=normalized_query, then=Value(0)),
+            When(normalized_name__startswith=terms[0], then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        ),
+        name_length=Length('normalized_name'),
+    )
+    if connection.vendor == 'postgresql':
+        foods = foods.annotate(similarity=TrigramSimilarity('normalized_name', normalized_query))
+        foods = foods.order_by('match_rank', '-usage_count', '-similarity', 'name_length', 'food_name')
+    else:
+        foods = foods.order_by('match_rank', '-usage_count', 'name_length', 'food_name')
+    
+    return [entry_result(food) for food in foods[:SEARCH_RESULT_LIMIT]]
+
+
+def _load_user_recent_foods(user_id):
+    """
+    사용자가 최근 기록한 음식 목록 [(정규화 이름, 검색 응답 항목), ...] (최근 기록 수 많은 순)
+    """
+    usages = UserFoodUsage.objects.filter(user_id=user_id).select_related('food__search_entry').order_by(
+        '-record_count', '-last_record_date'
+    )[:USER_RECENT_FOODS_LIMIT]
+    return [
+        (usage.food.search_entry.normalized_name, entry_result(usage.food.search_entry))
+        for usage in usages
+        if hasattr(usage.food, 'search_entry')
+    ]
+
+
+def get_user_recent_foods(user_id):
+    """
+    사용자 최근 음식 목록 (프로세스 로컬 캐시, USER_RECENT_FOODS_TTL초 또는 카탈로그 버전 변경 시 다시 조회)
+    """
+    cache_key = (get_catalog_version(), user_id)
+    with _user_recent_lock:
+        item = _user_recent_cache.get(cache_key)
+        if item is not None and item[1] >= time.monotonic():
+            _user_recent_cache.move_to_end(cache_key)
+            return item[0]
+
+    recent_foods = _load_user_recent_foods(user_id)
+    with _user_recent_lock:
+        _user_recent_cache[cache_key] = (recent_foods, time.monotonic() + USER_RECENT_FOODS_TTL)
+        _user_recent_cache.move_to_end(cache_key)
+        while len(_user_recent_cache) > _cache_size():
+            _user_recent_cache.popitem(last=False)
+    return recent_foods
+
+
+def search_user_recent_foods(user, search_key, limit=SEARCH_RESULT_LIMIT):
+    """
+    사용자가 최근 기록한 음식 중 검색어와 일치하는 항목 (최근 기록 수 많은 순)
+    """
+    terms = search_key.split()
+    matches = []
+    for normalized_name, result in get_user_recent_foods(user.id):
+        if all(term in normalized_name for term in terms):
+            matches.append(result)
+            if len(matches) >= limit:
+                break
+    return matches
+
+
+def personalize_results(user, query, results, limit=SEARCH_RESULT_LIMIT):
+    """
+    검색 결과 앞에 사용자가 최근 기록한 음식을 배치 (중복 제거)
+    """
+    search_key = make_search_key(query)
+    if not search_key:
+        return results
+    recent = search_user_recent_foods(user, search_key, limit)
+    if not recent:
+        return results
+    recent_ids = {item['id'] for item in recent}
+    return (recent + [item for item in results if item['id'] not in recent_ids])[:limit]
+
+
+def make_search_key(query):
+    """
+    검색어를 띄어쓰기 기준으로 나누어 각각 정규화한 캐시/검색 키
+    """
+    terms = [normalize_food_name(term) for term in query.split()]
+    return ' '.join(term for term in terms if term)
+
+
+# ===== 검색 응답 캐시 =====
+
+CATALOG_VERSION_NAME = 'food_search'
+_REDIS_RESULT_KEY = 'ibsafe:food_search:v{version}:{key}'
+_REDIS_LOG_KEY = 'ibsafe:food_search:log'
+# 카탈로그 버전 확인 간격 (초) - 요청마다 버전을 조회하지 않도록
+VERSION_CHECK_INTERVAL = 1.0
+# Redis 미사용 시 로컬에 기록하는 검색어 최대 종류 수
+LOCAL_LOG_MAX_KEYS = 10000
+
+_local_cache = OrderedDict()
+_local_cache_lock = threading.Lock()
+_local_log = Counter()
+_local_log_lock = threading.Lock()
+_user_recent_cache = OrderedDict()
+_user_recent_lock = threading.Lock()
+
+_redis_client = None
+_checked_version = None
+_checked_at = 0.0
+
+
+def _get_redis():
+    """
+    검색 캐시용 Redis 클라이언트 (FOOD_SEARCH_CACHE_REDIS_URL 미설정 시 None)
+    """
+    global _redis_client
+    url = getattr(settings, 'FOOD_SEARCH_CACHE_REDIS_URL', '')
+    if not url:
+        return None
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+    return _redis_client
+
+
+def _cache_ttl():
+    return getattr(settings, 'FOOD_SEARCH_CACHE_TTL', 3600)
+
+
+def _cache_size():
+    return getattr(settings, 'FOOD_SEARCH_CACHE_SIZE', 2048)
+
+
+def get_catalog_version():
+    """
+    현재 음식 카탈로그 버전 (DB의 CatalogVersion 행 - 모든 웹/워커 프로세스가 공유)
+    요청마다 조회하지 않도록 VERSION_CHECK_INTERVAL초 동안은 마지막으로 읽은 값을 사용
+    """
+    global _checked_version, _checked_at
+    now = time.monotonic()
+    if _checked_version is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return _checked_version
+    try:
+        version = CatalogVersion.objects.filter(name=CATALOG_VERSION_NAME).values_list('version', flat=True).first()
+    except Exception as e:
+        print(f"음식 검색 캐시 버전 조회 실패 (마지막 버전 사용): {e}")
+        return _checked_version or 0
+    _checked_version = version or 0
+    _checked_at = now
+    return _checked_version
+
+
+def bump_catalog_version():
+    """
+    음식 카탈로그 변경 시 호출 - 공유 버전을 올려 모든 프로세스의 검색 캐시 무효화
+    (다른 프로세스는 VERSION_CHECK_INTERVAL초 안에 새 버전을 읽음)
+    """
+    global _checked_version, _checked_at
+    with _local_cache_lock:
+        _local_cache.clear()
+    try:
+        CatalogVersion.objects.get_or_create(name=CATALOG_VERSION_NAME)
+        CatalogVersion.objects.filter(name=CATALOG_VERSION_NAME).update(version=F('version') + 1)
+    except Exception as e:
+        print(f"음식 검색 캐시 버전 갱신 실패: {e}")
+    # 현재 프로세스는 다음 조회 시 바로 새 버전을 읽음
+    _checked_version = None
+    _checked_at = 0.0
+
+
+def _local_get(cache_key):
+    with _local_cache_lock:
+        item = _local_cache.get(cache_key)
+        if item is None:
+            return None
+        results, expires_at = item
+        if expires_at < time.monotonic():
+            del _local_cache[cache_key]
+            return None
+        _local_cache.move_to_end(cache_key)
+        return results
+
+
+def _local_set(cache_key, results):
+    with _local_cache_lock:
+        _local_cache[cache_key] = (results, time.monotonic() + _cache_ttl())
+        _local_cache.move_to_end(cache_key)
+        while len(_local_cache) > _cache_size():
+            _local_cache.popitem(last=False)
+
+
+def _store_results(version, search_key, results):
+    _local_set((version, search_key), results)
+    client = _get_redis()
+    if client is not None:
+        try:
+            client.set(
+                _REDIS_RESULT_KEY.format(version=version, key=search_key),
+                json.dumps(results, ensure_ascii=False),
+                ex=_cache_ttl(),
+            )
+        except Exception as e:
+            print(f"음식 검색 캐시 저장 실패: {e}")
+
+
+def record_search(search_key):
+    """
+    검색어 빈도 기록 (캐시 예열 대상 선정용)
+    """
+    client = _get_redis()
+    if client is not None:
+        try:
+            client.zincrby(_REDIS_LOG_KEY, 1, search_key)
+            return
+        except Exception as e:
+            print(f"음식 검색어 기록 실패: {e}")
+    with _local_log_lock:
+        if search_key in _local_log or len(_local_log) < LOCAL_LOG_MAX_KEYS:
+            _local_log[search_key] += 1
+
+
+def get_frequent_searches(limit=500):
+    """
+    자주 검색된 검색 키 목록 [(키, 횟수), ...] (많은 순)
+    """
+    client = _get_redis()
+    if client is not None:
+        try:
+            items = client.zrevrange(_REDIS_LOG_KEY, 0, limit - 1, withscores=True)
+            return [(key.decode('utf-8') if isinstance(key, bytes) else key, int(score)) for key, score in items]
+        except Exception as e:
+            print(f"음식 검색어 기록 조회 실패: {e}")
+    with _local_log_lock:
+        return _local_log.most_common(limit)
+
+
+def search_foods_cached(query):
+    """
+    캐시를 거쳐 음식 검색 (로컬 LRU -> Redis -> DB 순)
+    """
+    search_key = make_search_key(query)
+    if not search_key:
+        return []
+    record_search(search_key)
+
+    version = get_catalog_version()
+    results = _local_get((version, search_key))
+    if results is not None:
+        return results
+
+    client = _get_redis()
+    if client is not None:
+        try:
+            cached = client.get(_REDIS_RESULT_KEY.format(version=version, key=search_key))
+        except Exception as e:
+            cached = None
+            print(f"음식 검색 캐시 조회 실패: {e}")
+        if cached is not None:
+            results = json.loads(cached)
+            _local_set((version, search_key), results)
+            return results
+
+    results = search_food_entries(search_key)
+    _store_results(version, search_key, results)
+    return results
+
+
+def clear_food_search_cache():
+    """
+    로컬 LRU 캐시 비우기 (Redis 캐시는 버전으로 무효화)
+    """
+    with _local_cache_lock:
+        _local_cache.clear()
+    with _user_recent_lock:
+        _user_recent_cache.clear()
+
+
+def get_frequent_prefixes(limit=200, log_limit=2000):
+    """
+    자주 검색된 검색어로부터 접두어별 빈도를 합산하여 상위 접두어 반환
+    (타이핑 중 입력되는 접두어도 같은 빈도로 검색된다고 가정)
+    """
+    prefix_counts = Counter()
+    for search_key, count in get_frequent_searches(log_limit):
+        for end in range(1, len(search_key) + 1):
+            prefix = search_key[:end].strip()
+            if prefix and not search_key[:end].endswith(' '):
+                prefix_counts[prefix] += count
+    return [prefix for prefix, _ in prefix_counts.most_common(limit)]
+
+
+def warm_food_search_cache(limit=200):
+    """
+    자주 검색된 접두어의 검색 결과를 미리 계산하여 캐시에 저장
+    반환: 예열한 검색 키 목록
+    
+    Redis 미설정 시 검색어 빈도와 LRU가 모두 이 프로세스에만 있어 웹 프로세스에
+    도움이 되지 않으므로 건너뜀 (빈 목록 반환)
+    """
+    if _get_redis() is None:
+        print("음식 검색 캐시 예열 건너뜀: FOOD_SEARCH_CACHE_REDIS_URL이 설정되지 않아 공유 캐시가 없습니다.")
+        return []
+    version = get_catalog_version()
+    prefixes = get_frequent_prefixes(limit)
+    for search_key in prefixes:
+        _store_results(version, search_key, search_food_entries(search_key))
+    print(f"음식 검색 캐시 예열 완료: {len(prefixes)}개 (카탈로그 버전 {version})")
+    return prefixes
@@ -0,0 +1,262 @@
+"""
+LLM 모드 상주 추론 워커
+
+전용 Celery 큐(기본값 'inference')만 소비하는 워커가 임베딩 모델, FAISS 인덱스,
+프롬프트 템플릿, 음식 카탈로그를 워커 시작 시 한 번만 로드해 두고 계속 유지합니다.
+LLM 모드 배치 샤드는 이 큐로 보내지므로 일반 워커는 모델을 로드하지 않습니다.
+
+워커 시작 (모델은 프로세스 하나에만 올리도록 solo/threads 풀 사용):
+    IBSAFE_INFERENCE_WORKER=1 celery -A backend worker -Q inference --pool=solo -n inference@%h
+
+상태 확인:
+    python manage.py check_inference_worker
+    GET /api/batch/inference-worker/health/
+
+solo 풀 워커는 샤드를 처리하는 동안 큐의 태스크나 원격 제어(ping/inspect)에 응답하지 못하므로,
+워커 프로세스의 백그라운드 스레드가 HEARTBEAT_INTERVAL마다 Redis에 상태를 기록하고
+헬스 체크는 이 하트비트만 읽습니다. (HEARTBEAT_TTL 동안 갱신이 없으면 응답 없음)
+"""
+import importlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+from celery.signals import task_postrun, task_prerun, worker_ready
+
+INFERENCE_WORKER_ENV = 'IBSAFE_INFERENCE_WORKER'
+
+HEARTBEAT_INTERVAL = 10
+HEARTBEAT_TTL = 60
+_HEARTBEAT_KEY = 'ibsafe:inference_worker:{queue}:{hostname}'
+
+_state = {
+    'ready': False,
+    'loaded_at': None,
+    'warm_seconds': None,
+    'components': {},
+    'errors': {},
+    'current_task': None,
+    'task_started_at': None,
+}
+_state_lock = threading.Lock()
+_heartbeat_thread = None
+_heartbeat_redis = None
+
+
+def get_inference_queue():
+    """
+    LLM 모드 작업을 보낼 Celery 큐 이름
+    """
+    from django.conf import settings
+    return getattr(settings, 'INTERVENTION_INFERENCE_QUEUE', 'inference')
+
+
+def is_inference_worker():
+    return os.environ.get(INFERENCE_WORKER_ENV) == '1'
+
+
+def _add_llm_oss_path():
+    # llm_oss 경로 추가 (프롬프트/RAG 모듈은 llm_oss 기준으로 import)
+    llm_oss_path = os.path.join(os.path.dirname(__file__), 'llm_oss')
+    if llm_oss_path not in sys.path:
+        sys.path.append(llm_oss_path)
+
+
+def _warm_prompts():
+    _add_llm_oss_path()
+    # 반환값은 쓰지 않고 모듈 로드(템플릿 준비)만 목적이므로 import_module로 sys.modules에 올려 둠
+    importlib.import_module('make_prompt_korean')
+
+
+def _warm_food_catalog():
+    from .llm_oss.food_catalog import get_food_catalog
+    catalog = get_food_catalog()
+    catalog.table_csv
+
+
+def _warm_embedder():
+    _add_llm_oss_path()
+    from rag_utility import get_embedder
+    get_embedder()
+
+
+def _warm_indexes():
+    _add_llm_oss_path()
+    from rag_utility import get_faiss_and_chunks, get_unified_index
+    if get_unified_index() is None:
+        get_faiss_and_chunks()
+
+
+def _warm_retrieval_cache():
+    _add_llm_oss_path()
+    from rag_utility import CATEGORIES, warm_retrieval_cache
+    warmed = warm_retrieval_cache()
+    if len(warmed) != len(CATEGORIES):
+        raise RuntimeError(f"일부 카테고리만 예열되었습니다: {warmed}")
+
+
+# (구성 요소 이름, 로드 함수) - 순서대로 로드
+WARM_COMPONENTS = (
+    ('prompts', _warm_prompts),
+    ('food_catalog', _warm_food_catalog),
+    ('embedder', _warm_embedder),
+    ('indexes', _warm_indexes),
+    ('retrieval_cache', _warm_retrieval_cache),
+)
+
+
+def warm_inference_resources(force=False):
+    """
+    추론에 필요한 자원을 로드 (프로세스당 한 번, 이미 준비되었으면 바로 반환)
+    모든 구성 요소가 로드되면 ready=True
+    """
+    with _state_lock:
+        if _state['ready'] and not force:
+            return get_inference_worker_state()
+
+        print("=== 추론 워커 예열 시작 ===")
+        start_time = time.time()
+        components = {}
+        errors = {}
+        for name, load in WARM_COMPONENTS:
+            component_start = time.time()
+            try:
+                load()
+                components[name] = round(time.time() - component_start, 3)
+                print(f"추론 워커 예열 완료 ({name}): {components[name]}초")
+            except Exception as e:
+                errors[name] = str(e)
+                print(f"추론 워커 예열 실패 ({name}): {e}")
+
+        _state['components'] = components
+        _state['errors'] = errors
+        _state['ready'] = not errors
+        _state['warm_seconds'] = round(time.time() - start_time, 3)
+        _state['loaded_at'] = time.time()
+        print(f"=== 추론 워커 예열 끝 (ready={_state['ready']}, {_state['warm_seconds']}초) ===")
+    return get_inference_worker_state()
+
+
+def get_inference_worker_state():
+    """
+    현재 프로세스의 추론 자원 상태 (헬스/레디니스 응답용)
+    """
+    return {
+        'ready': _state['ready'],
+        'loaded_at': _state['loaded_at'],
+        'warm_seconds': _state['warm_seconds'],
+        'components': dict(_state['components']),
+        'errors': dict(_state['errors']),
+        'current_task': _state['current_task'],
+        'task_started_at': _state['task_started_at'],
+        'hostname': socket.gethostname(),
+        'pid': os.getpid(),
+        'inference_worker': is_inference_worker(),
+    }
+
+
+def _get_heartbeat_redis():
+    """
+    하트비트 저장용 Redis 클라이언트 (Celery 브로커 Redis 사용)
+    """
+    global _heartbeat_redis
+    if _heartbeat_redis is None:
+        import redis
+        from django.conf import settings
+        _heartbeat_redis = redis.Redis.from_url(
+            settings.CELERY_BROKER_URL, socket_timeout=2, socket_connect_timeout=2
+        )
+    return _heartbeat_redis
+
+
+def write_heartbeat():
+    """
+    현재 프로세스 상태를 하트비트 키에 기록 (HEARTBEAT_TTL 후 만료)
+    """
+    state = get_inference_worker_state()
+    state['heartbeat_at'] = time.time()
+    key = _HEARTBEAT_KEY.format(queue=get_inference_queue(), hostname=state['hostname'])
+    _get_heartbeat_redis().set(key, json.dumps(state), ex=HEARTBEAT_TTL)
+
+
+def _heartbeat_loop():
+    while True:
+        try:
+            write_heartbeat()
+        except Exception as e:
+            print(f"추론 워커 하트비트 기록 실패: {e}")
+        time.sleep(HEARTBEAT_INTERVAL)
+
+
+def start_heartbeat():
+    """
+    하트비트 스레드 시작 (프로세스당 한 번)
+    """
+    global _heartbeat_thread
+    if _heartbeat_thread is None:
+        _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name='inference-heartbeat', daemon=True)
+        _heartbeat_thread.start()
+
+
+def check_inference_worker():
+    """
+    추론 큐 워커들의 하트비트를 읽어 상태 확인 (작업 처리 중이어도 응답 가능)
+    반환: {'reachable': bool, 'ready': bool, 'busy': bool, 'heartbeat_age': 초, ...워커 상태}
+    준비된 워커가 있으면 그 워커, 없으면 가장 최근 하트비트의 워커 상태를 반환
+    """
+    queue = get_inference_queue()
+    try:
+        client = _get_heartbeat_redis()
+        keys = list(client.scan_iter(match=_HEARTBEAT_KEY.format(queue=queue, hostname='*')))
+        states = [json.loads(value) for value in client.mget(keys) if value] if keys else []
+    except Exception as e:
+        return {
+            'reachable': False,
+            'ready': False,
+            'queue': queue,
+            'error': f'추론 워커 하트비트 조회 실패: {str(e)}',
+        }
+    if not states:
+        return {
+            'reachable': False,
+            'ready': False,
+            'queue': queue,
+            'error': f'추론 워커 하트비트 없음 ({HEARTBEAT_TTL}초 이내 기록 없음)',
+        }
+
+    states.sort(key=lambda state: (state['ready'], state['heartbeat_at']), reverse=True)
+    state = states[0]
+    state.update({
+        'reachable': True,
+        'busy': state['current_task'] is not None,
+        'heartbeat_age': round(time.time() - state['heartbeat_at'], 3),
+        'queue': queue,
+        'workers': len(states),
+    })
+    return state
+
+
+@task_prerun.connect
+def _mark_task_started(task=None, **kwargs):
+    if is_inference_worker():
+        _state['current_task'] = task.name if task else None
+        _state['task_started_at'] = time.time()
+
+
+@task_postrun.connect
+def _mark_task_finished(**kwargs):
+    if is_inference_worker():
+        _state['current_task'] = None
+        _state['task_started_at'] = None
+
+
+@worker_ready.connect
+def _warm_on_worker_ready(**kwargs):
+    # 추론 워커로 지정된 프로세스만 시작 시 예열 (일반 워커는 모델을 로드하지 않음)
+    if is_inference_worker():
+        # 예열 중에도 ready=False 하트비트가 보이도록 먼저 시작
+        start_heartbeat()
+        warm_inference_resources()
@@ -1,19 +1,16 @@
 import os
 import sys
 import time
-import torch
-import numpy as np
 import re
 import gc
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from django.contrib.auth.models import User
 from django.utils import timezone
 import pytz
+import requests
 
-# Django 설정 로드
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
-import django
-django.setup()
+# Django 부트스트랩(django.setup)은 진입점(manage.py, backend.celery, intervention_batch CLI)에서만 수행합니다.
 
 from .models import (
     UserProfile, UserSleepRecord, UserFoodRecord, UserWaterRecord, 
@@ -22,7 +19,36 @@ from .models import (
 )
 
 # rule.py에서 함수들 import
-from .rule import recommend_diet, recommend_sleep, recommend_step
+from .rule import recommend_diet, recommend_diet_many, recommend_sleep, recommend_step, recommend_step_lists
+from .llm_oss.food_catalog import get_food_catalog, REQUIRED_COLUMNS as FOOD_REQUIRED_COLUMNS
+from .ollama_client import ollama_generate
+
+
+def _get_loaded_torch_device():
+    """
+    이미 로드된 torch 기준 디바이스 이름 (torch를 새로 import 하지 않음)
+    torch/faiss/transformers는 임베딩 모델이 실제로 필요할 때 rag_utility에서만 import 됩니다.
+    """
+    torch = sys.modules.get('torch')
+    if torch is None:
+        return "cpu (torch 미로드)"
+    # 맥북 MPS 지원 확인
+    if torch.backends.mps.is_available():
+        return "mps"
+    elif torch.cuda.is_available():
+        return "cuda"
+    return "cpu"
+
+
+def _release_torch_memory():
+    """
+    메모리 정리 (torch가 로드된 경우에만 CUDA 캐시 정리)
+    """
+    gc.collect()
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    # MPS에서는 empty_cache가 없으므로 gc만 실행
 
 
 def get_number(number):
@@ -38,25 +64,15 @@ def get_number(number):
 
 def _call_ollama_api(base_url, model, prompt):
     """
-    Ollama API를 직접 호출하는 함수
+    Ollama API를 직접 호출하는 함수 (프로세스 공용 keep-alive 세션 사용)
     """
     try:
-        import requests
-        import json
-        
-        url = f"{base_url}/api/generate"
-        payload = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False
-        }
-        
-        print(f"Ollama API 호출 시작: {url}")
+        print(f"Ollama API 호출 시작: {base_url}/api/generate")
         print(f"모델: {model}")
         print(f"프롬프트 길이: {len(prompt)} 문자")
         
-        # 타임아웃을 더 길게 설정 (10분)
-        response = requests.post(url, json=payload, timeout=1500)
+        # 연결/읽기 타임아웃, 연결 오류 재시도는 ollama_client 설정을 따름
+        response = ollama_generate(base_url, model, prompt)
         
         if response.status_code == 200:
             result = response.json()
@@ -78,6 +94,24 @@ def _call_ollama_api(base_url, model, prompt):
         return f"API 호출 실패: {str(e)}"
 
 
+def _call_ollama_api_many(base_url, model, prompts, concurrent=True):
+    """
+    여러 프롬프트를 생성하여 {키: 응답} 딕셔너리로 반환
+    
+    concurrent=True면 스레드 풀로 동시에 요청합니다. 실제 동시 요청 수는
+    ollama_client의 백엔드별 제한(OLLAMA_MAX_CONCURRENCY)을 넘지 않습니다.
+    """
+    if not concurrent or len(prompts) <= 1:
+        return {key: _call_ollama_api(base_url, model, prompt) for key, prompt in prompts.items()}
+    
+    with ThreadPoolExecutor(max_workers=len(prompts), thread_name_prefix='ollama') as executor:
+        futures = {
+            key: executor.submit(_call_ollama_api, base_url, model, prompt)
+            for key, prompt in prompts.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+
 def format_allergies_list(user_profile_data):
     """
     사용자 프로필 데이터에서 알레르기 정보를 리스트로 변환
@@ -122,30 +156,40 @@ def get_week_step_counts(exercise_data):
     return step_counts
 
 
+FOOD_LIST_PATH = os.path.join(os.path.dirname(__file__), "llm_oss", "Food_list.xlsx")
+
+
 def inference_rule(
     allergies,
     restrictions,
     recent_3days,
-    week_step
+    week_step,
+    diet_recommendations=None,
+    step_recommendation=None
 ):
     """
     Rule-based 중재 추론 함수
+    
+    diet_recommendations: recommend_diet_many로 미리 계산한 식단 (없으면 여기서 계산)
+    step_recommendation: recommend_step_lists로 미리 계산한 (평가, 목표) 튜플 (없으면 여기서 계산)
     """
     try:
         outputs = {}
         # 결과를 JSON 형태로 구조화 (새로운 구조에 맞게)
-        EXCEL_PATH = os.path.join(os.path.dirname(__file__), "llm_oss", "Food_list.xlsx")
-        diet_recommendations = recommend_diet(excel_path=EXCEL_PATH,
-                                        recent_3days=recent_3days,
-                                        allergies=allergies,
-                                        restrictions=restrictions,
-                                        random_seed=None)
+        if diet_recommendations is None:
+            diet_recommendations = recommend_diet(excel_path=FOOD_LIST_PATH,
+                                            recent_3days=recent_3days,
+                                            allergies=allergies,
+                                            restrictions=restrictions,
+                                            random_seed=None)
         
         diet_breakfast = diet_recommendations['아침']
         diet_lunch = diet_recommendations['점심']
         diet_dinner = diet_recommendations['저녁']
 
-        exercise_evaluation, exercise_target = recommend_step(week_step)
+        if step_recommendation is None:
+            step_recommendation = recommend_step(week_step)
+        exercise_evaluation, exercise_target = step_recommendation
 
         results = {
             "diet": {
@@ -199,72 +243,49 @@ def inference_llm(
     use_rag,
     week_step,
     today_diet,
-    table_food
+    table_food,
+    concurrent=True
 ):
     """
     LLM 기반 중재 추론 함수
+    
+    concurrent: True면 식단/수면/운동/식단 평가 프롬프트를 동시에 생성
+                (백엔드별 동시 요청 수는 OLLAMA_MAX_CONCURRENCY로 제한)
     """
     try:
-        # 맥북 MPS 지원 확인 및 설정
-        if torch.backends.mps.is_available():
-            device = "mps"
-        elif torch.cuda.is_available():
-            device = "cuda"
-        else:
-            device = "cpu"
-        
-        print(f"사용 중인 디바이스: {device}")
+        print(f"사용 중인 디바이스: {_get_loaded_torch_device()}")
 
-        # --- 임베딩 및 VectorDB (함수 내부에서 import)
+        # --- 검색 컨텍스트 (함수 내부에서 import)
+        # 검색 쿼리가 고정이므로 캐시된 결과를 사용하고, 캐시가 없을 때만 임베딩/VectorDB를 로드
         try:
             # llm_oss 경로 추가
             llm_oss_path = os.path.join(os.path.dirname(__file__), 'llm_oss')
             if llm_oss_path not in sys.path:
                 sys.path.append(llm_oss_path)
             
-            from rag_utility import get_embedder, get_faiss_and_chunks
-            
-            embed_model = get_embedder()
-            vectorDB, chunks = get_faiss_and_chunks()
+            from rag_utility import retrieve_contexts
         except Exception as e:
             print(f"RAG 모듈 import 오류: {e}")
             # RAG 기능 없이 계속 진행
-            embed_model = None
-            vectorDB = None
-            chunks = None
-        
-        retrieval_queries = {
-            "diet": "Clinical guidelines for IBS dietary management, low FODMAP diet, and recommended meals",
-            "sleep": "Guidelines on sleep quality, sleep hygiene, and sleep disorders in IBS patients",
-            "exercise": "Recommendations on physical activity and walking for symptom relief in IBS",
-        }
-
+            retrieve_contexts = None
+        
         # 카테고리별 결과 저장
         contexts = {}
         outputs = {}
+        prompts = {}
+
+        # --- 컨텍스트 검색 (영어 쿼리, 세 카테고리를 한 번에)
+        if use_rag and retrieve_contexts:
+            try:
+                contexts = retrieve_contexts(["diet", "sleep", "exercise"], k=2)
+            except Exception as e:
+                print(f"RAG 검색 오류: {e}")
+                contexts = {}
 
         for category in ["diet", "sleep", "exercise"]:
-            # --- 컨텍스트 검색 (영어 쿼리)
-            context = ""
-            if use_rag and embed_model and vectorDB and chunks:
-                try:
-                    composed_query = f"{retrieval_queries[category]}"
-                    query_embedding = embed_model.encode([composed_query])
-                    if category == 'diet':
-                        _, top_indices = vectorDB["diet"].search(np.array(query_embedding), k=2)
-                        context = "\n\n".join([str(chunks["diet"][i]) for i in top_indices[0]])
-                    elif category == 'sleep':
-                        _, top_indices = vectorDB["sleep"].search(np.array(query_embedding), k=2)
-                        context = "\n\n".join([str(chunks["sleep"][i]) for i in top_indices[0]])
-                    elif category == 'exercise':
-                        _, top_indices = vectorDB["exercise"].search(np.array(query_embedding), k=2)
-                        context = "\n\n".join([str(chunks["exercise"][i]) for i in top_indices[0]])
-                except Exception as e:
-                    print(f"RAG 검색 오류 ({category}): {e}")
-                    context = ""
-            contexts[category] = context
-
-            # 중재 문장 생성 (함수 내부에서 import)
+            context = contexts.setdefault(category, "")
+
+            # 중재 프롬프트 생성 (함수 내부에서 import) - 생성은 아래에서 한 번에 요청
             try:
                 # llm_oss 경로 추가
                 llm_oss_path = os.path.join(os.path.dirname(__file__), 'llm_oss')
@@ -274,46 +295,45 @@ def inference_llm(
                 from make_prompt_korean import build_prompt_ko_from_csv, make_sleep_prompt_ko, make_exercise_prompt_ko, make_prompt_evalution_diet
                 
                 if category == "diet":
-                    prompt_ko = build_prompt_ko_from_csv(table_food, allergies, restrictions, recent_3days)
-                    response = _call_ollama_api(ollama_base_url, ollama_model, prompt_ko)
+                    prompts[category] = build_prompt_ko_from_csv(table_food, allergies, restrictions, recent_3days)
                 elif category == "sleep":
-                    prompt_ko = make_sleep_prompt_ko(context=context, today_sleep=today_sleep)
-                    response = _call_ollama_api(ollama_base_url, ollama_model, prompt_ko)
+                    prompts[category] = make_sleep_prompt_ko(context=context, today_sleep=today_sleep)
                 else:  # exercise
-                    prompt_ko = make_exercise_prompt_ko(context=context, week_step=week_step)
-                    response = _call_ollama_api(ollama_base_url, ollama_model, prompt_ko)
+                    prompts[category] = make_exercise_prompt_ko(context=context, week_step=week_step)
             except Exception as e:
                 print(f"프롬프트 생성 오류 ({category}): {e}")
-                response = f"{category} 권고사항을 생성할 수 없습니다."
+                outputs[category] = f"{category} 권고사항을 생성할 수 없습니다."
 
-            outputs[category] = response
-            print(f'=== {category} 완료 ===')
-            print(f'{category} 프롬프트: {prompt_ko}')
-            print(f'{category} 응답: {response}')
-            print(f'=== {category} 완료 끝 ===')
-            
-            # 메모리 정리
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-            elif torch.backends.mps.is_available():
-                # MPS에서는 empty_cache가 없으므로 gc만 실행
-                pass
-
-        # 오늘 식단 평가 생성
+        # 오늘 식단 평가 프롬프트
         try:
-            prompt_diet_evaluation = make_prompt_evalution_diet(today_diet)
+            prompts["diet_evaluation"] = make_prompt_evalution_diet(today_diet)
             print("=== 식단 평가 프롬프트 ===")
-            print(f"식단 평가 프롬프트: {prompt_diet_evaluation}")
+            print(f"식단 평가 프롬프트: {prompts['diet_evaluation']}")
             print("=== 식단 평가 프롬프트 끝 ===")
-            
-            diet_evaluation = _call_ollama_api(ollama_base_url, ollama_model, prompt_diet_evaluation)
+        except Exception as e:
+            print(f"식단 평가 생성 오류: {e}")
+        
+        # 메모리 정리
+        _release_torch_memory()
+
+        # 서로 독립적인 프롬프트(식단/수면/운동/식단 평가)를 동시에 생성
+        responses = _call_ollama_api_many(ollama_base_url, ollama_model, prompts, concurrent=concurrent)
+
+        for category in ["diet", "sleep", "exercise"]:
+            if category not in responses:
+                continue
+            outputs[category] = responses[category]
+            print(f'=== {category} 완료 ===')
+            print(f'{category} 프롬프트: {prompts[category]}')
+            print(f'{category} 응답: {responses[category]}')
+            print(f'=== {category} 완료 끝 ===')
+
+        if "diet_evaluation" in responses:
+            diet_evaluation = responses["diet_evaluation"]
             print("=== 식단 평가 응답 ===")
             print(f"식단 평가 원본 응답: {diet_evaluation}")
             print("=== 식단 평가 응답 끝 ===")
-            
-        except Exception as e:
-            print(f"식단 평가 생성 오류: {e}")
+        else:
             diet_evaluation = "오늘 식단을 평가할 수 없습니다."
 
         try:
@@ -473,42 +493,27 @@ def inference_llm_sleep(
     LLM 기반 수면 중재 추론 함수
     """
     try:
-        # 맥북 MPS 지원 확인 및 설정
-        if torch.backends.mps.is_available():
-            device = "mps"
-        elif torch.cuda.is_available():
-            device = "cuda"
-        else:
-            device = "cpu"
-        
-        print(f"사용 중인 디바이스: {device}")
+        print(f"사용 중인 디바이스: {_get_loaded_torch_device()}")
 
-        # --- 임베딩 및 VectorDB (함수 내부에서 import)
+        # --- 검색 컨텍스트 (함수 내부에서 import)
+        # 검색 쿼리가 고정이므로 캐시된 결과를 사용하고, 캐시가 없을 때만 임베딩/VectorDB를 로드
         try:
             # llm_oss 경로 추가
             llm_oss_path = os.path.join(os.path.dirname(__file__), 'llm_oss')
             if llm_oss_path not in sys.path:
                 sys.path.append(llm_oss_path)
             
-            from rag_utility import get_embedder, get_faiss_and_chunks
-            
-            embed_model = get_embedder()
-            vectorDB, chunks = get_faiss_and_chunks()
+            from rag_utility import retrieve_context
         except Exception as e:
             print(f"RAG 모듈 import 오류: {e}")
             # RAG 기능 없이 계속 진행
-            embed_model = None
-            vectorDB = None
-            chunks = None
+            retrieve_context = None
         
         # 수면 관련 컨텍스트 검색
         context = ""
-        if use_rag and embed_model and vectorDB and chunks:
+        if use_rag and retrieve_context:
             try:
-                retrieval_query = "Guidelines on sleep quality, sleep hygiene, and sleep disorders in IBS patients"
-                query_embedding = embed_model.encode([retrieval_query])
-                _, top_indices = vectorDB["sleep"].search(np.array(query_embedding), k=2)
-                context = "\n\n".join([str(chunks["sleep"][i]) for i in top_indices[0]])
+                context = retrieve_context("sleep", k=2)
             except Exception as e:
                 print(f"RAG 검색 오류 (sleep): {e}")
                 context = ""
@@ -534,12 +539,7 @@ def inference_llm_sleep(
         print(f'=== 수면 중재 완료 끝 ===')
         
         # 메모리 정리
-        gc.collect()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-        elif torch.backends.mps.is_available():
-            # MPS에서는 empty_cache가 없으므로 gc만 실행
-            pass
+        _release_torch_memory()
 
         try:
             # 수면 결과 파싱
@@ -617,7 +617,9 @@ def run_intervention_inference(
     week_step,
     today_diet,
     table_food,
-    mode='RULE'
+    mode='RULE',
+    diet_recommendations=None,
+    step_recommendation=None
 ):
     """
     통합 중재 추론 실행 함수
@@ -629,7 +631,9 @@ def run_intervention_inference(
             allergies=allergies,
             restrictions=restrictions,
             recent_3days=recent_3days,
-            week_step=week_step
+            week_step=week_step,
+            diet_recommendations=diet_recommendations,
+            step_recommendation=step_recommendation
         )
     else:  # LLM 모드
         return inference_llm(
@@ -645,80 +649,238 @@ def run_intervention_inference(
         )
 
 
-def process_user_intervention(user, record_date, mode='RULE'):
+def get_user_profile_data(profile):
+    """
+    사용자 프로필에서 알레르기 관련 필드만 추출
+    """
+    return {
+        'has_gluten_allergy': profile.has_gluten_allergy,
+        'has_lactose_allergy': profile.has_lactose_allergy,
+        'has_nut_allergy': profile.has_nut_allergy,
+        'has_seafood_allergy': profile.has_seafood_allergy,
+        'has_egg_allergy': profile.has_egg_allergy,
+        'has_soy_allergy': profile.has_soy_allergy,
+        'has_lactose_intolerance': profile.has_lactose_intolerance,
+    }
+
+
+def get_record_user_ids(record_date):
+    """
+    record_date에 음식 기록, 운동 기록이 있는 사용자 ID 집합을 각각 반환
+    (사용자별 exists() 대신 집계 쿼리 2회)
+    """
+    food_user_ids = set(
+        UserFoodRecord.objects.filter(record_date=record_date)
+        .order_by()
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+    exercise_user_ids = set(
+        UserExerciseRecord.objects.filter(record_date=record_date)
+        .order_by()
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+    return food_user_ids, exercise_user_ids
+
+
+def load_user_intervention_inputs(user, record_date):
+    """
+    단일 사용자의 중재 입력 데이터(음식 3일, 오늘 식단, 걸음수 7일)를 조회
+    """
+    # 음식 데이터 (최근 3일간)
+    three_days_start = record_date - timedelta(days=2)
+    food_records = UserFoodRecord.objects.filter(
+        user=user,
+        record_date__range=[three_days_start, record_date]
+    ).select_related('food').order_by('record_date', 'meal_type')
+    
+    food_data = []
+    for record in food_records:
+        food_data.append({
+            'food_name': record.food.food_name,
+        })
+    
+    # 오늘 음식 데이터 (today_diet용)
+    today_food_records = UserFoodRecord.objects.filter(
+        user=user,
+        record_date=record_date
+    ).select_related('food').order_by('meal_type')
+    
+    today_diet = []
+    for record in today_food_records:
+        food_name = record.food.food_name
+        if food_name not in today_diet:
+            today_diet.append(food_name)
+    
+    # 운동 데이터 (일주일간)
+    week_start = record_date - timedelta(days=6)
+    exercise_records = UserExerciseRecord.objects.filter(
+        user=user,
+        record_date__range=[week_start, record_date]
+    ).order_by('record_date')
+    
+    exercise_data = []
+    for record in exercise_records:
+        exercise_data.append({
+            'current_steps': record.current_steps,
+        })
+    
+    return {
+        'food_data': food_data,
+        'today_diet': today_diet,
+        'exercise_data': exercise_data,
+    }
+
+
+def prefetch_intervention_bundles(users, record_date):
+    """
+    여러 사용자의 중재 입력 데이터를 한 번에 조회하여 사용자 ID별 번들로 반환
+    
+    음식 3일치, 걸음수 7일치, 기존 중재 기록(gubun='all')을 각각 쿼리 1회로 가져오며,
+    번들 형식은 load_user_intervention_inputs의 반환값과 같습니다.
+    (기존 기록을 미리 삭제하지 않는 호출자도 중복 생성 없이 기존 기록을 갱신)
+    """
+    user_ids = [user.id for user in users]
+    bundles = {
+        user_id: {
+            'food_data': [],
+            'today_diet': [],
+            'exercise_data': [],
+            'existing_intervention': None,
+        }
+        for user_id in user_ids
+    }
+    if not user_ids:
+        return bundles
+    
+    # 음식 데이터 (최근 3일간) - Food 전체 컬럼 대신 음식 이름만 조회
+    three_days_start = record_date - timedelta(days=2)
+    food_rows = UserFoodRecord.objects.filter(
+        user_id__in=user_ids,
+        record_date__range=[three_days_start, record_date]
+    ).order_by('user_id', 'record_date', 'meal_type').values_list(
+        'user_id', 'record_date', 'food__food_name'
+    )
+    
+    for user_id, food_record_date, food_name in food_rows:
+        bundle = bundles[user_id]
+        bundle['food_data'].append({'food_name': food_name})
+        if food_record_date == record_date and food_name not in bundle['today_diet']:
+            bundle['today_diet'].append(food_name)
+    
+    # 운동 데이터 (일주일간)
+    week_start = record_date - timedelta(days=6)
+    exercise_rows = UserExerciseRecord.objects.filter(
+        user_id__in=user_ids,
+        record_date__range=[week_start, record_date]
+    ).order_by('user_id', 'record_date').values_list('user_id', 'current_steps')
+    
+    for user_id, current_steps in exercise_rows:
+        bundles[user_id]['exercise_data'].append({'current_steps': current_steps})
+    
+    # 기존 중재 기록
+    existing_interventions = InterventionRecord.objects.filter(
+        user_id__in=user_ids,
+        record_date=record_date,
+        gubun='all'
+    )
+    for intervention in existing_interventions:
+        bundles[intervention.user_id]['existing_intervention'] = intervention
+    
+    return bundles
+
+
+def prepare_rule_recommendations(users, bundles):
+    """
+    RULE 모드 배치용: 번들의 사용자 전체 식단(recommend_diet_many)과
+    걸음수 평가(recommend_step_lists)를 한 번에 계산하여
+    각 번들의 'diet_recommendations', 'step_recommendation'에 저장
+    
+    입력 준비에 실패한 사용자나 일괄 계산이 실패한 경우 해당 번들은 비워 두며,
+    process_user_intervention이 기존처럼 사용자별로 계산(실패 시 그 사용자만 오류)합니다.
+    """
+    targets = []
+    diet_inputs = []
+    for user in users:
+        try:
+            profile = user.profile
+        except UserProfile.DoesNotExist:
+            # 프로필이 없는 사용자는 process_user_intervention에서 오류로 처리됨
+            continue
+        bundle = bundles[user.id]
+        try:
+            diet_input = {
+                'allergies': format_allergies_list(get_user_profile_data(profile)),
+                'restrictions': [],
+                'recent_3days': get_recent_food_names(bundle['food_data']),
+            }
+        except Exception as e:
+            print(f"사용자 {user.username}: 일괄 식단 추천 입력 준비 실패, 개별 계산으로 처리 - {str(e)}")
+            continue
+        targets.append((user, bundle))
+        diet_inputs.append(diet_input)
+    
+    try:
+        for (user, bundle), diet in zip(targets, recommend_diet_many(FOOD_LIST_PATH, diet_inputs)):
+            bundle['diet_recommendations'] = diet
+    except Exception as e:
+        print(f"일괄 식단 추천 실패, 사용자별 계산으로 처리 - {str(e)}")
+    
+    # 걸음수 기록이 없는 사용자는 inference_rule에서 기존과 같이 오류로 처리됨
+    step_targets = []
+    step_lists = []
+    for user, bundle in targets:
+        try:
+            week_step = [int(steps) for steps in get_week_step_counts(bundle['exercise_data'])]
+        except Exception as e:
+            print(f"사용자 {user.username}: 일괄 걸음수 평가 입력 준비 실패, 개별 계산으로 처리 - {str(e)}")
+            continue
+        if week_step:
+            step_targets.append(bundle)
+            step_lists.append(week_step)
+    
+    try:
+        for bundle, step in zip(step_targets, recommend_step_lists(step_lists)):
+            bundle['step_recommendation'] = step
+    except Exception as e:
+        print(f"일괄 걸음수 평가 실패, 사용자별 계산으로 처리 - {str(e)}")
+
+
+def process_user_intervention(user, record_date, mode='RULE', prefetched=None):
     """
     특정 사용자의 중재 처리를 위한 통합 함수
+    
+    prefetched: prefetch_intervention_bundles로 미리 조회한 사용자 번들.
+                주어지면 사용자별 DB 조회 없이 번들 데이터를 사용합니다.
     """
     print(f"사용자 {user.username} 중재 처리 시작 - 모드: {mode}")
     
     try:
         # 사용자 프로필 정보
-        profile = user.profile
-        user_profile_data = {
-            'has_gluten_allergy': profile.has_gluten_allergy,
-            'has_lactose_allergy': profile.has_lactose_allergy,
-            'has_nut_allergy': profile.has_nut_allergy,
-            'has_seafood_allergy': profile.has_seafood_allergy,
-            'has_egg_allergy': profile.has_egg_allergy,
-            'has_soy_allergy': profile.has_soy_allergy,
-            'has_lactose_intolerance': profile.has_lactose_intolerance,
-        }
+        user_profile_data = get_user_profile_data(user.profile)
         
-        # 음식 데이터 (최근 3일간)
-        three_days_start = record_date - timedelta(days=2)
-        food_records = UserFoodRecord.objects.filter(
-            user=user,
-            record_date__range=[three_days_start, record_date]
-        ).select_related('food').order_by('record_date', 'meal_type')
+        if prefetched is None:
+            prefetched = load_user_intervention_inputs(user, record_date)
         
-        food_data = []
-        for record in food_records:
-            food_data.append({
-                'food_name': record.food.food_name,
-            })
-        
-        # 오늘 음식 데이터 (today_diet용)
-        today_food_records = UserFoodRecord.objects.filter(
-            user=user,
-            record_date=record_date
-        ).select_related('food').order_by('meal_type')
-        
-        today_diet = []
-        for record in today_food_records:
-            food_name = record.food.food_name
-            if food_name not in today_diet:
-                today_diet.append(food_name)
-        
-        # 운동 데이터 (일주일간)
-        week_start = record_date - timedelta(days=6)
-        exercise_records = UserExerciseRecord.objects.filter(
-            user=user,
-            record_date__range=[week_start, record_date]
-        ).order_by('record_date')
-        
-        exercise_data = []
-        for record in exercise_records:
-            exercise_data.append({
-                'current_steps': record.current_steps,
-            })
+        food_data = prefetched['food_data']
+        today_diet = prefetched['today_diet']
+        exercise_data = prefetched['exercise_data']
         
         # 수면 데이터는 처리하지 않음 (음식, 운동만 필수)
         
-        # 음식 DB 로드
+        # 음식 DB 로드 (프로세스 공용 캐시, 파일이 바뀐 경우에만 다시 파싱)
         llm_oss_path = os.path.join(os.path.dirname(__file__), 'llm_oss')
         food_db_path = os.path.join(llm_oss_path, "Food_list.xlsx")
         
         if not os.path.exists(food_db_path):
             raise Exception(f"음식 DB 파일을 찾을 수 없습니다: {food_db_path}")
         
-        import pandas as pd
-        df = pd.read_excel(food_db_path)
-        df.columns = [str(c).strip().lower() for c in df.columns]
-        required = {"food", "fodmap", "fiber"}
-        if not required.issubset(set(df.columns)):
-            raise Exception(f"CSV에 필수 컬럼이 없습니다: {required} / 현재: {set(df.columns)}")
+        food_catalog = get_food_catalog(food_db_path)
+        if not FOOD_REQUIRED_COLUMNS.issubset(food_catalog.columns):
+            raise Exception(f"CSV에 필수 컬럼이 없습니다: {FOOD_REQUIRED_COLUMNS} / 현재: {food_catalog.columns}")
         
-        table_food = df.to_csv(index=False)
+        table_food = food_catalog.table_csv
         
         # 중재 추론 실행
         start_time = time.time()
@@ -733,7 +895,9 @@ def process_user_intervention(user, record_date, mode='RULE'):
             week_step=get_week_step_counts(exercise_data),
             today_diet=today_diet,
             table_food=table_food,
-            mode=mode
+            mode=mode,
+            diet_recommendations=prefetched.get('diet_recommendations'),
+            step_recommendation=prefetched.get('step_recommendation')
         )
         
         processing_time = time.time() - start_time
@@ -742,11 +906,14 @@ def process_user_intervention(user, record_date, mode='RULE'):
         target_date = record_date + timedelta(days=1)
         
         # 기존 중재 기록이 있는지 확인 (record_date + gubun 기준)
-        existing_intervention = InterventionRecord.objects.filter(
-            user=user,
-            record_date=record_date,
-            gubun='all'
-        ).first()
+        if 'existing_intervention' in prefetched:
+            existing_intervention = prefetched['existing_intervention']
+        else:
+            existing_intervention = InterventionRecord.objects.filter(
+                user=user,
+                record_date=record_date,
+                gubun='all'
+            ).first()
         
         if existing_intervention:
             # 기존 중재 기록이 있으면 수면 관련 필드 제외하고 업데이트
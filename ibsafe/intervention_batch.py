@@ -36,11 +36,14 @@ django.setup()
 from django.contrib.auth.models import User
 from django.utils import timezone
 from ibsafe.models import (
-    UserProfile, UserSleepRecord, UserFoodRecord, UserWaterRecord, 
-    UserExerciseRecord, IBSSSSRecord, IBSQOLRecord, PSSStressRecord,
+    UserProfile, UserSleepRecord, UserWaterRecord, 
+    IBSSSSRecord, IBSQOLRecord, PSSStressRecord,
     InterventionRecord
 )
-from ibsafe.intervention import process_user_intervention, process_user_sleep_intervention
+from ibsafe.intervention import (
+    process_user_intervention, process_user_sleep_intervention,
+    get_record_user_ids, prefetch_intervention_bundles, prepare_rule_recommendations
+)
 
 
 def run_immediate_intervention_batch(target_date_str=None, username=None):
@@ -73,11 +76,11 @@ def run_immediate_intervention_batch(target_date_str=None, username=None):
         print(f"오늘 날짜를 target_date로 설정: {target_date}")
         print(f"어제 날짜를 record_date로 설정: {record_date}")
     
-    # 사용자 조회
+    # 사용자 조회 (프로필 함께 조회)
     if username:
         try:
-            users = User.objects.filter(username=username)
-            if not users.exists():
+            users = list(User.objects.select_related('profile').filter(username=username))
+            if not users:
                 print(f"❌ 사용자 '{username}'를 찾을 수 없습니다.")
                 return
             print(f"특정 사용자 처리: {username}")
@@ -85,71 +88,67 @@ def run_immediate_intervention_batch(target_date_str=None, username=None):
             print(f"❌ 사용자 조회 오류: {str(e)}")
             return
     else:
-        users = User.objects.all()
+        users = list(User.objects.select_related('profile').order_by('id'))
         print(f"모든 사용자 처리")
     
     processed_count = 0
     error_count = 0
     skipped_count = 0
     
-    print(f"총 사용자 수: {users.count()}명")
+    print(f"총 사용자 수: {len(users)}명")
     print(f"중재 적용 날짜 (target_date): {target_date}")
     print(f"중재 받는 날짜 (record_date): {record_date}")
     print("-" * 50)
     
+    # record_date 필수 기록(음식, 운동)이 있는 사용자 집합을 한 번에 조회
+    food_user_ids, exercise_user_ids = get_record_user_ids(record_date)
+    
+    eligible_users = []
     for user in users:
+        has_food = user.id in food_user_ids
+        has_exercise = user.id in exercise_user_ids
+        
+        if not (has_food and has_exercise):
+            missing_records = []
+            if not has_food:
+                missing_records.append("음식")
+            if not has_exercise:
+                missing_records.append("운동")
+            
+            print(f"사용자 {user.username}: ❌ 필수 기록 누락으로 실행 불가 - {', '.join(missing_records)} 기록이 필요합니다")
+            skipped_count += 1
+            continue
+        
+        eligible_users.append(user)
+    
+    # 이미 중재 기록이 있으면 일괄 삭제
+    deleted_count, _ = InterventionRecord.objects.filter(
+        user_id__in=[user.id for user in eligible_users],
+        record_date=record_date,
+        gubun='all'
+    ).delete()
+    if deleted_count:
+        print(f"🔄 기존 중재 기록 {deleted_count}건을 삭제합니다.")
+    
+    # 음식 3일치, 걸음수 7일치를 대상 사용자 전체에 대해 일괄 조회
+    bundles = prefetch_intervention_bundles(eligible_users, record_date)
+    
+    # RULE 모드 식단 추천을 대상 사용자 전체에 대해 한 번에 계산
+    prepare_rule_recommendations(eligible_users, bundles)
+    
+    for user in eligible_users:
         try:
             print(f"사용자 {user.username} 처리 중...")
-            
-            # 해당 사용자의 record_date 기록들 확인
-            has_sleep = UserSleepRecord.objects.filter(
-                user=user, 
-                record_date=record_date
-            ).exists()
-            
-            has_food = UserFoodRecord.objects.filter(
-                user=user, 
-                record_date=record_date
-            ).exists()
-            
-            has_exercise = UserExerciseRecord.objects.filter(
-                user=user, 
-                record_date=record_date
-            ).exists()
-            
-            # 필수 기록 확인 (음식, 운동만 필수)
-            essential_records = [has_food, has_exercise]
-            
-            if not all(essential_records):
-                missing_records = []
-                if not has_food:
-                    missing_records.append("음식")
-                if not has_exercise:
-                    missing_records.append("운동")
-                
-                print(f"  ❌ 필수 기록 누락으로 실행 불가 - {', '.join(missing_records)} 기록이 필요합니다")
-                skipped_count += 1
-                continue
-            
             print(f"  ✅ 필수 기록 모두 존재 - 실행 가능")
             
-            # 이미 중재 기록이 있는지 확인하고 삭제
-            existing_intervention = InterventionRecord.objects.filter(
-                user=user,
-                record_date=record_date
-            ).first()
-            
-            if existing_intervention:
-                print(f"  🔄 기존 중재 기록을 삭제합니다.")
-                existing_intervention.delete()
-            
             # 중재 권고사항 생성
             print(f"  🤖 중재 권고사항 생성 시작")
             
             success, processing_time, error_message = process_user_intervention(
                 user=user,
                 record_date=record_date,
-                mode='RULE'  # 또는 'LLM'
+                mode='RULE',  # 또는 'LLM'
+                prefetched=bundles[user.id]
             )
             
             if success:
@@ -168,7 +167,7 @@ def run_immediate_intervention_batch(target_date_str=None, username=None):
     print(f"✅ 처리된 사용자: {processed_count}명")
     print(f"⚠️  오류 발생: {error_count}명")
     print(f"⏭️  건너뛴 사용자: {skipped_count}명")
-    print(f"📊 총 사용자: {users.count()}명")
+    print(f"📊 총 사용자: {len(users)}명")
     print(f"📅 중재 적용 날짜 (target_date): {target_date}")
     print(f"📅 중재 받는 날짜 (record_date): {record_date}")
 
@@ -6,15 +6,14 @@ import sys
 import torch
 import gc
 import time
-import pandas as pd
-import numpy as np
 from crewai import LLM
 
 # 현재 디렉토리를 Python 경로에 추가
 sys.path.append(os.path.dirname(__file__))
 
 from backend.ibsafe.llm_oss.make_prompt_korean_org import build_prompt_ko_from_csv, make_sleep_prompt_ko, make_exercise_prompt_ko
-from rag_utility import get_embedder, get_faiss_and_chunks
+from rag_utility import retrieve_contexts, warm_retrieval_cache
+from food_catalog import get_food_catalog, REQUIRED_COLUMNS as FOOD_REQUIRED_COLUMNS
 
 app = FastAPI(title="IBS 중재 서비스", description="Ollama gpt-oss-20b를 이용한 IBS 환자 중재 서비스")
 
@@ -70,38 +69,17 @@ def run_inference(
     
     print(f"사용 중인 디바이스: {device}")
 
-    # --- 임베딩 
-    embed_model = get_embedder()
-    
-    # --- VectorDB
-    vectorDB, chunks = get_faiss_and_chunks()
-    
-    retrieval_queries = {
-        "diet": "Clinical guidelines for IBS dietary management, low FODMAP diet, and recommended meals",
-        "sleep": "Guidelines on sleep quality, sleep hygiene, and sleep disorders in IBS patients",
-        "exercise": "Recommendations on physical activity and walking for symptom relief in IBS",
-    }
-
     # 카테고리별 결과 저장
     contexts = {}
     outputs = {}
 
+    # --- 컨텍스트 검색 (영어 쿼리, 세 카테고리를 한 번에)
+    # 고정 쿼리의 검색 결과는 캐시에서 가져옴 (캐시가 없을 때만 임베딩/FAISS 사용)
+    if use_rag:
+        contexts = retrieve_contexts(["diet", "sleep", "exercise"], k=2)
+
     for category in ["diet", "sleep", "exercise"]:
-        # --- 컨텍스트 검색 (영어 쿼리)
-        context = ""
-        if use_rag:
-            composed_query = f"{retrieval_queries[category]}"
-            query_embedding = embed_model.encode([composed_query])
-            if category == 'diet':
-                _, top_indices = vectorDB["diet"].search(np.array(query_embedding), k=2)
-                context = "\n\n".join([str(chunks["diet"][i]) for i in top_indices[0]])
-            elif category == 'sleep':
-                _, top_indices = vectorDB["sleep"].search(np.array(query_embedding), k=2)
-                context = "\n\n".join([str(chunks["sleep"][i]) for i in top_indices[0]])
-            elif category == 'exercise':
-                _, top_indices = vectorDB["exercise"].search(np.array(query_embedding), k=2)
-                context = "\n\n".join([str(chunks["exercise"][i]) for i in top_indices[0]])
-        contexts[category] = context
+        context = contexts.setdefault(category, "")
 
         # 중재 문장 생성
         if category == "diet":
@@ -127,6 +105,11 @@ def run_inference(
 
     return outputs
 
+@app.on_event("startup")
+async def warm_up():
+    """서비스 시작 시 검색 캐시 예열"""
+    warm_retrieval_cache()
+
 @app.post("/intervention", response_model=InterventionResponse)
 async def generate_intervention(request: InterventionRequest):
     """
@@ -143,16 +126,15 @@ async def generate_intervention(request: InterventionRequest):
         if not os.path.exists(food_db_path):
             raise HTTPException(status_code=404, detail=f"음식 DB 파일을 찾을 수 없습니다: {food_db_path}")
         
-        df = pd.read_excel(food_db_path)
-        df.columns = [str(c).strip().lower() for c in df.columns]
-        required = {"food", "fodmap", "fiber"}
-        if not required.issubset(set(df.columns)):
+        # 프로세스 공용 캐시 (파일이 바뀐 경우에만 다시 파싱)
+        food_catalog = get_food_catalog(food_db_path)
+        if not FOOD_REQUIRED_COLUMNS.issubset(food_catalog.columns):
             raise HTTPException(
                 status_code=400, 
-                detail=f"CSV에 필수 컬럼이 없습니다: {required} / 현재: {set(df.columns)}"
+                detail=f"CSV에 필수 컬럼이 없습니다: {FOOD_REQUIRED_COLUMNS} / 현재: {food_catalog.columns}"
             )
         
-        table_food = df.to_csv(index=False)
+        table_food = food_catalog.table_csv
         
         # 중재 추론 실행
         results = run_inference(
@@ -0,0 +1,364 @@
+"""
+음식 카탈로그(Food_list.xlsx) 프로세스 공용 캐시
+
+엑셀 파싱(openpyxl)은 느리기 때문에 프로세스당 한 번만 읽고, 파일이 바뀐 경우에만 다시 읽습니다.
+- 파일 변경 감지: (mtime_ns, size)가 바뀌면 내용 해시(sha1)를 비교하여 실제 변경 시에만 재파싱
+- 보관 데이터: 컬럼명이 정규화된 DataFrame, 프롬프트용 CSV 문자열(최초 접근 시 1회 생성),
+  알러지 비트마스크, 사전 인코딩된 카테고리
+
+배포 시 `python manage.py compile_food_catalog`로 엑셀 옆에 바이너리 아티팩트(Food_list.npz)를
+만들어 두면 엑셀 대신 아티팩트를 읽습니다. 아티팩트가 없거나 원본 엑셀 해시와 다르면(stale)
+엑셀을 직접 파싱합니다.
+
+Django(배치, Celery 워커)와 FastAPI 서비스가 모두 사용하므로 Django에 의존하지 않습니다.
+"""
+import hashlib
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_FOOD_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Food_list.xlsx")
+
+# 프롬프트/추천에 필요한 필수 컬럼
+REQUIRED_COLUMNS = {"food", "fodmap", "fiber"}
+
+# === Canonical allergy types (비트마스크의 비트 순서) ===
+ALLERGY_CANON = [
+    "글루텐 알러지",
+    "유당 알러지",
+    "견과류 알러지",
+    "해산물 알러지",
+    "계란 알러지",
+    "대두 알러지",
+]
+
+# 아티팩트 포맷 버전 (저장 구조가 바뀌면 올려서 기존 아티팩트를 stale 처리)
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def artifact_path_for(path):
+    """엑셀 경로에 대응하는 바이너리 아티팩트 경로"""
+    return os.path.splitext(path)[0] + ".npz"
+
+
+def _parse_allergy_cell(cell):
+    """'알러지_tag' 셀 -> set. '해당 없음'이면 empty set."""
+    if not isinstance(cell, str) or not cell.strip() or cell.strip() == "해당 없음":
+        return set()
+    parts = [p.strip() for p in cell.split(",")]
+    return set(p for p in parts if p)
+
+
+def allergy_bitmask(allergy_names):
+    """알러지 이름 집합 -> ALLERGY_CANON 순서의 비트마스크 (정확히 일치하는 이름만)"""
+    mask = 0
+    for bit, name in enumerate(ALLERGY_CANON):
+        if name in allergy_names:
+            mask |= 1 << bit
+    return mask
+
+
+def compute_allergy_mask(df):
+    """'알러지_tag' 컬럼 -> 행별 알러지 비트마스크 배열 (int64)"""
+    if "알러지_tag" not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    return np.array(
+        [allergy_bitmask(_parse_allergy_cell(cell)) for cell in df["알러지_tag"]],
+        dtype=np.int64,
+    )
+
+
+def _encode_categories(df):
+    """category 컬럼 사전 인코딩 -> (codes, values). 결측은 -1"""
+    if "category" not in df.columns:
+        return np.full(len(df), -1, dtype=np.int32), np.array([], dtype=str)
+    codes, values = pd.factorize(df["category"], use_na_sentinel=True)
+    return codes.astype(np.int32), np.asarray(values, dtype=str)
+
+
+class FoodNameMatcher:
+    """
+    음식 이름 매처 - 카탈로그 로드 시 한 번 색인하고 사용자별 필터링은 집합 연산으로 처리
+
+    - exact_mask: 이름 정확 일치 (최근 섭취 음식 제외용), 이름 -> 행 번호 색인 사용
+    - contains_mask: 부분 문자열 일치 (기피 키워드 제외용), 문자 bigram 역색인으로 후보 행을
+      좁힌 뒤 확인. 키워드 목록별 결과를 캐시합니다.
+
+    결과는 카탈로그 행 순서의 읽기 전용 bool 배열입니다.
+    """
+
+    MAX_CACHED_TERM_LISTS = 1024
+
+    def __init__(self, names):
+        self.size = len(names)
+        # 결측 이름(NaN)은 어떤 조건에도 일치하지 않음 (str.contains(na=False)와 동일)
+        self.names = [name if isinstance(name, str) else None for name in names]
+        self.valid_rows = frozenset(i for i, name in enumerate(self.names) if name is not None)
+
+        self._name_rows = {}
+        self._char_rows = {}
+        self._bigram_rows = {}
+        for i, name in enumerate(self.names):
+            if name is None:
+                continue
+            self._name_rows.setdefault(name, []).append(i)
+            for ch in set(name):
+                self._char_rows.setdefault(ch, set()).add(i)
+            for gram in set(name[j:j + 2] for j in range(len(name) - 1)):
+                self._bigram_rows.setdefault(gram, set()).add(i)
+
+        self._term_cache = {}
+        self._term_list_cache = {}
+
+    def _to_mask(self, rows):
+        mask = np.zeros(self.size, dtype=bool)
+        if rows:
+            mask[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+        mask.setflags(write=False)
+        return mask
+
+    def exact_mask(self, names):
+        """이름이 names 중 하나와 정확히 일치하는 행"""
+        rows = set()
+        for name in names:
+            rows.update(self._name_rows.get(name, ()))
+        return self._to_mask(rows)
+
+    def _term_rows(self, term):
+        rows = self._term_cache.get(term)
+        if rows is not None:
+            return rows
+
+        if not term:
+            rows = self.valid_rows
+        else:
+            if len(term) == 1:
+                candidates = self._char_rows.get(term, set())
+            else:
+                grams = set(term[j:j + 2] for j in range(len(term) - 1))
+                postings = sorted((self._bigram_rows.get(gram, set()) for gram in grams), key=len)
+                candidates = set.intersection(*postings) if postings[0] else set()
+            rows = frozenset(i for i in candidates if term in self.names[i])
+
+        self._term_cache[term] = rows
+        return rows
+
+    def contains_mask(self, terms):
+        """이름에 terms 중 하나라도 부분 문자열로 포함된 행 (빈 키워드는 모든 행과 일치)"""
+        key = tuple(terms)
+        mask = self._term_list_cache.get(key)
+        if mask is not None:
+            return mask
+
+        rows = set()
+        for term in key:
+            rows |= self._term_rows(term)
+        mask = self._to_mask(rows)
+
+        if len(self._term_list_cache) >= self.MAX_CACHED_TERM_LISTS:
+            self._term_list_cache.clear()
+        self._term_list_cache[key] = mask
+        return mask
+
+
+class FoodCatalog:
+    """파싱된 음식 카탈로그 (읽기 전용으로 사용)"""
+
+    def __init__(self, path, version, df, allergy_mask=None, category_codes=None, category_values=None, source="xlsx"):
+        self.path = path
+        self.version = version  # 원본 엑셀 내용 sha1
+        self.df = df
+        self.source = source    # 'xlsx' 또는 'artifact'
+        if allergy_mask is None:
+            allergy_mask = compute_allergy_mask(df)
+        if category_codes is None or category_values is None:
+            category_codes, category_values = _encode_categories(df)
+        self.allergy_mask = allergy_mask
+        self.category_codes = category_codes
+        self.category_values = category_values
+        self._table_csv = None
+        self._name_matcher = None
+        self._category_rows = None
+        self._lock = threading.Lock()
+
+        # 음식 이름 ID (같은 이름은 같은 ID) - 추천 시 '이미 사용한 음식'을 bool 마스크로 관리
+        food_ids, food_names = pd.factorize(df["food"], use_na_sentinel=False)
+        self.food_ids = food_ids.astype(np.int64)
+        self.food_names = np.asarray(food_names, dtype=object)
+
+    @property
+    def category_rows(self):
+        """카테고리 이름 -> 해당 카테고리 행 번호 배열(카탈로그 순서)"""
+        if self._category_rows is None:
+            with self._lock:
+                if self._category_rows is None:
+                    self._category_rows = {
+                        str(value): np.flatnonzero(self.category_codes == code)
+                        for code, value in enumerate(self.category_values)
+                    }
+        return self._category_rows
+
+    @property
+    def name_matcher(self):
+        """음식 이름 매처 (최초 접근 시 한 번만 색인)"""
+        if self._name_matcher is None:
+            with self._lock:
+                if self._name_matcher is None:
+                    self._name_matcher = FoodNameMatcher(list(self.df["food"]))
+        return self._name_matcher
+
+    @property
+    def columns(self):
+        return set(self.df.columns)
+
+    @property
+    def table_csv(self):
+        """LLM 프롬프트에 넣을 CSV 문자열 (최초 접근 시 한 번만 생성)"""
+        if self._table_csv is None:
+            with self._lock:
+                if self._table_csv is None:
+                    self._table_csv = self.df.to_csv(index=False)
+        return self._table_csv
+
+
+_catalogs = {}      # abspath -> FoodCatalog
+_stat_keys = {}     # abspath -> (mtime_ns, size)
+_catalogs_lock = threading.Lock()
+
+
+def _parse_food_list(data):
+    df = pd.read_excel(io.BytesIO(data))
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+
+def compile_food_catalog(path=None, output_path=None):
+    """
+    엑셀 음식 카탈로그를 컬럼 단위 바이너리 아티팩트(.npz, pickle 미사용)로 변환
+
+    저장 내용:
+        - col:<컬럼명> / null:<컬럼명>: 컬럼 값과 결측 마스크
+        - category_codes / category_values: 사전 인코딩된 카테고리
+        - allergy_mask: ALLERGY_CANON 순서의 알러지 비트마스크
+        - source_sha1: 원본 엑셀 해시 (stale 판단용)
+
+    Returns:
+        tuple: (아티팩트 경로, FoodCatalog)
+    """
+    path = os.path.abspath(path or DEFAULT_FOOD_LIST_PATH)
+    output_path = output_path or artifact_path_for(path)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    catalog = FoodCatalog(path, hashlib.sha1(data).hexdigest(), _parse_food_list(data))
+    df = catalog.df
+
+    arrays = {
+        "format_version": np.array(ARTIFACT_FORMAT_VERSION),
+        "source_sha1": np.array(catalog.version),
+        "columns": np.array(list(df.columns), dtype=str),
+        "allergy_canon": np.array(ALLERGY_CANON, dtype=str),
+        "allergy_mask": catalog.allergy_mask,
+        "category_codes": catalog.category_codes,
+        "category_values": catalog.category_values,
+    }
+    for column in df.columns:
+        series = df[column]
+        nulls = series.isna().to_numpy()
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy()
+        else:
+            values = series.fillna("").astype(str).to_numpy(dtype=str)
+        arrays[f"col:{column}"] = values
+        arrays[f"null:{column}"] = nulls
+
+    # 임시 파일에 쓴 뒤 교체 (읽는 중인 프로세스가 깨진 파일을 보지 않도록)
+    tmp_path = f"{output_path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, output_path)
+    return output_path, catalog
+
+
+def _load_artifact(path, version):
+    """
+    아티팩트에서 카탈로그 로드. 없거나 stale이면 None
+    """
+    artifact_path = artifact_path_for(path)
+    if not os.path.exists(artifact_path):
+        return None
+    try:
+        with np.load(artifact_path, allow_pickle=False) as npz:
+            if int(npz["format_version"]) != ARTIFACT_FORMAT_VERSION:
+                return None
+            if str(npz["source_sha1"]) != version:
+                return None
+            if list(npz["allergy_canon"]) != ALLERGY_CANON:
+                return None
+            columns = [str(c) for c in npz["columns"]]
+            data = {}
+            for column in columns:
+                values = npz[f"col:{column}"]
+                nulls = npz[f"null:{column}"]
+                if values.dtype.kind == "U":
+                    values = values.astype(object)
+                    values[nulls] = np.nan
+                data[column] = values
+            return FoodCatalog(
+                path,
+                version,
+                pd.DataFrame(data, columns=columns),
+                allergy_mask=npz["allergy_mask"],
+                category_codes=npz["category_codes"],
+                category_values=npz["category_values"],
+                source="artifact",
+            )
+    except Exception as e:
+        print(f"음식 카탈로그 아티팩트 로드 실패, 엑셀을 사용합니다: {artifact_path} ({e})")
+        return None
+
+
+def get_food_catalog(path=None):
+    """
+    음식 카탈로그를 반환. 파일이 바뀌지 않았다면 stat 한 번으로 캐시된 카탈로그를 돌려줍니다.
+
+    Raises:
+        FileNotFoundError: 파일이 없는 경우
+    """
+    path = os.path.abspath(path or DEFAULT_FOOD_LIST_PATH)
+    stat = os.stat(path)
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+
+    catalog = _catalogs.get(path)
+    if catalog is not None and _stat_keys.get(path) == stat_key:
+        return catalog
+
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is not None and _stat_keys.get(path) == stat_key:
+            return catalog
+
+        with open(path, "rb") as f:
+            data = f.read()
+        version = hashlib.sha1(data).hexdigest()
+
+        # mtime만 바뀌고 내용이 같으면 재파싱하지 않음 (배포 시 touch 등)
+        if catalog is None or catalog.version != version:
+            catalog = _load_artifact(path, version)
+            if catalog is None:
+                catalog = FoodCatalog(path, version, _parse_food_list(data))
+            print(f"음식 카탈로그 로드: {path} ({len(catalog.df)}개, source={catalog.source}, version={version[:12]})")
+
+        _catalogs[path] = catalog
+        _stat_keys[path] = stat_key
+        return catalog
+
+
+def clear_food_catalog_cache():
+    """캐시 초기화 (테스트/강제 재로드용)"""
+    with _catalogs_lock:
+        _catalogs.clear()
+        _stat_keys.clear()
@@ -2,44 +2,460 @@
 
 import numpy as np
 import os
-import faiss
-import torch
+import json
+import hashlib
+import threading
 from functools import lru_cache
 
-from transformers import (
-    AutoTokenizer,
-    AutoModelForCausalLM,
-    AutoModelForSeq2SeqLM,
-    pipeline,
-)
+# torch / faiss / sentence_transformers는 무거우므로 실제로 필요한 함수 안에서만 import 합니다.
+# (RULE 모드, 검색 캐시 적중 시에는 로드되지 않음)
 
-from sentence_transformers import SentenceTransformer
 
+EMBED_MODEL_NAME = "BAAI/bge-base-en"
+# 쿼리 임베딩 배치 크기 (환경 변수로 변경 가능)
+EMBED_BATCH_SIZE = int(os.environ.get("IBSAFE_EMBED_BATCH_SIZE", "32"))
 
-@lru_cache(maxsize=1)
-def get_embedder():
-    # 맥북 MPS 지원 확인 및 설정
-    if torch.backends.mps.is_available():
-        device = "mps"
-    elif torch.cuda.is_available():
-        device = "cuda"
-    else:
-        device = "cpu"
+
+@lru_cache(maxsize=2)
+def get_embedder(device=None):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # 맥북 MPS 지원 확인 및 설정 (device를 지정하면 그대로 사용)
+    if device is None:
+        if torch.backends.mps.is_available():
+            device = "mps"
+        elif torch.cuda.is_available():
+            device = "cuda"
+        else:
+            device = "cpu"
     
     print(f"임베딩 모델 사용 디바이스: {device}")
-    return SentenceTransformer("BAAI/bge-base-en", device=device)
+    return SentenceTransformer(EMBED_MODEL_NAME, device=device)
+
+
+def embed_queries(queries, batch_size=None, embed_model=None):
+    """
+    여러 쿼리를 한 번에 임베딩하여 FAISS search에 바로 넣을 수 있는
+    L2 정규화된 float32 (쿼리 수 × 차원) C-연속 배열로 반환
+
+    batch_size: 모델 forward 한 번에 넣을 쿼리 수 (기본값 EMBED_BATCH_SIZE)
+    """
+    queries = [str(query) for query in queries]
+    if embed_model is None:
+        embed_model = get_embedder()
+    embeddings = embed_model.encode(
+        queries,
+        batch_size=batch_size or EMBED_BATCH_SIZE,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(queries), -1)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+    return np.ascontiguousarray(embeddings)
+
+# === 벡터 저장소 위치 ===
+# IBSAFE_VECTORDB_DIR 아래 index/, chunk/ 디렉터리를 사용 (각각 개별 환경 변수로 변경 가능)
+VECTORDB_DIR = os.environ.get("IBSAFE_VECTORDB_DIR", "/Users/shon/ws/ws_proj/aicu/ibsafe_serv/vectordb")
+VECTORDB_INDEX_DIR = os.environ.get("IBSAFE_VECTORDB_INDEX_DIR", os.path.join(VECTORDB_DIR, "index"))
+VECTORDB_CHUNK_DIR = os.environ.get("IBSAFE_VECTORDB_CHUNK_DIR", os.path.join(VECTORDB_DIR, "chunk"))
+CATEGORIES = ("diet", "sleep", "exercise")
+
+# 카테고리별 검색 쿼리 (고정 영어 문장)
+RETRIEVAL_QUERIES = {
+    "diet": "Clinical guidelines for IBS dietary management, low FODMAP diet, and recommended meals",
+    "sleep": "Guidelines on sleep quality, sleep hygiene, and sleep disorders in IBS patients",
+    "exercise": "Recommendations on physical activity and walking for symptom relief in IBS",
+}
+RETRIEVAL_K = 2
+
+
+def _index_path(category):
+    return os.path.join(VECTORDB_INDEX_DIR, f"ibs_faiss_{category}.index")
+
+
+def _legacy_chunk_path(category):
+    # 이전 형식: 문자열 object 배열 (pickle 필요)
+    return os.path.join(VECTORDB_CHUNK_DIR, f"chunk_texts_{category}.npy")
+
+
+def _chunk_data_path(category):
+    return os.path.join(VECTORDB_CHUNK_DIR, f"chunk_texts_{category}.bin")
+
+
+def _chunk_offsets_path(category):
+    return os.path.join(VECTORDB_CHUNK_DIR, f"chunk_texts_{category}.offsets.npy")
+
+
+def _chunk_files(category):
+    """
+    현재 사용하는 청크 파일 목록 (변환된 저장소가 있으면 그것을, 없으면 이전 .npy)
+    """
+    data_path, offsets_path = _chunk_data_path(category), _chunk_offsets_path(category)
+    if os.path.exists(data_path) and os.path.exists(offsets_path):
+        return [data_path, offsets_path]
+    return [_legacy_chunk_path(category)]
+
+
+class ChunkStore:
+    """
+    청크 텍스트 저장소 (pickle 없음)
+
+    - .bin: 모든 청크의 UTF-8 바이트를 이어 붙인 파일
+    - .offsets.npy: 청크 경계 오프셋 (int64, 청크 수 + 1개)
+    두 파일 모두 메모리 매핑으로 열어 id로 필요한 청크만 디코딩합니다.
+    여러 워커 프로세스가 같은 페이지 캐시를 공유합니다.
+    """
+
+    def __init__(self, data_path, offsets_path):
+        self.data_path = data_path
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        if int(self.offsets[-1]) > 0:
+            self._data = np.memmap(data_path, dtype=np.uint8, mode="r")
+        else:
+            # 빈 파일은 memmap 할 수 없음
+            self._data = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"chunk id out of range: {i}")
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self._data[start:end].tobytes().decode("utf-8")
+
+
+def write_chunk_store(texts, data_path, offsets_path):
+    """
+    청크 텍스트 리스트를 ChunkStore 형식(.bin + .offsets.npy)으로 저장 (원자적 교체)
+    """
+    encoded = [str(text).encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    tmp_data = f"{data_path}.{os.getpid()}.tmp"
+    tmp_offsets = f"{offsets_path}.{os.getpid()}.tmp.npy"
+    with open(tmp_data, "wb") as f:
+        for b in encoded:
+            f.write(b)
+    np.save(tmp_offsets, offsets, allow_pickle=False)
+    os.replace(tmp_data, data_path)
+    os.replace(tmp_offsets, offsets_path)
+    return len(encoded), int(offsets[-1])
+
+
+def convert_legacy_chunks(categories=CATEGORIES):
+    """
+    이전 .npy(object 배열) 청크 파일을 ChunkStore 형식으로 변환
+    반환: {카테고리: (청크 수, 바이트 수)}
+    """
+    converted = {}
+    for category in categories:
+        # 신뢰할 수 있는 내부 파일을 한 번만 변환하기 위해 pickle 로드
+        texts = np.load(_legacy_chunk_path(category), allow_pickle=True)
+        converted[category] = write_chunk_store(
+            texts, _chunk_data_path(category), _chunk_offsets_path(category)
+        )
+    return converted
+
+
+def _read_flags():
+    import faiss
+    # IO_FLAG_MMAP은 IVF 역색인 리스트만 매핑하고 IndexFlat은 워커마다 RAM으로 복사하므로,
+    # 평면 인덱스 벡터를 매핑하는 IO_FLAG_MMAP_IFC(faiss 1.10 이상)로 열어 워커 간 페이지를 공유
+    return faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+
+
+def _read_index(category):
+    import faiss
+    return faiss.read_index(_index_path(category), _read_flags())
+
+
+def _load_chunks(category):
+    data_path, offsets_path = _chunk_data_path(category), _chunk_offsets_path(category)
+    if os.path.exists(data_path) and os.path.exists(offsets_path):
+        return ChunkStore(data_path, offsets_path)
+    print(f"청크 저장소가 없어 이전 형식(.npy)을 사용합니다 ({category}). "
+          f"python manage.py build_chunk_store 로 변환하세요.")
+    return np.load(_legacy_chunk_path(category), allow_pickle=True)
+
 
 @lru_cache(maxsize=1)
 def get_faiss_and_chunks():
-    base_idx = "/Users/shon/ws/ws_proj/aicu/ibsafe_serv/vectordb/index"
-    base_ck  = "/Users/shon/ws/ws_proj/aicu/ibsafe_serv/vectordb/chunk"
-    index_diet = faiss.read_index(os.path.join(base_idx, "ibs_faiss_diet.index"))
-    index_sleep = faiss.read_index(os.path.join(base_idx, "ibs_faiss_sleep.index"))
-    index_exercise = faiss.read_index(os.path.join(base_idx, "ibs_faiss_exercise.index"))
-    chunk_diet = np.load(os.path.join(base_ck, "chunk_texts_diet.npy"), allow_pickle=True)
-    chunk_sleep = np.load(os.path.join(base_ck, "chunk_texts_sleep.npy"), allow_pickle=True)
-    chunk_exercise = np.load(os.path.join(base_ck, "chunk_texts_exercise.npy"), allow_pickle=True)
     return (
-        {"diet": index_diet, "sleep": index_sleep, "exercise": index_exercise},
-        {"diet": chunk_diet, "sleep": chunk_sleep, "exercise": chunk_exercise},
-    )
\ No newline at end of file
+        {category: _read_index(category) for category in CATEGORIES},
+        {category: _load_chunks(category) for category in CATEGORIES},
+    )
+
+
+# === 통합 인덱스 ===
+# 카테고리별 인덱스의 벡터를 하나의 인덱스에 카테고리 순서대로 이어 붙이고,
+# 카테고리별 id 구간(bounds)을 메타데이터로 저장합니다.
+# 검색 시 IDSelectorRange로 원하는 카테고리 구간만 검색합니다.
+UNIFIED_NAME = "all"
+
+
+def _unified_index_path():
+    return os.path.join(VECTORDB_INDEX_DIR, f"ibs_faiss_{UNIFIED_NAME}.index")
+
+
+def _unified_meta_path():
+    return os.path.join(VECTORDB_INDEX_DIR, f"ibs_faiss_{UNIFIED_NAME}.meta.npz")
+
+
+def _unified_files():
+    return [
+        _unified_index_path(),
+        _unified_meta_path(),
+        _chunk_data_path(UNIFIED_NAME),
+        _chunk_offsets_path(UNIFIED_NAME),
+    ]
+
+
+def has_unified_index():
+    return all(os.path.exists(path) for path in _unified_files())
+
+
+def build_unified_index(categories=CATEGORIES):
+    """
+    카테고리별 인덱스/청크를 통합 인덱스(ibs_faiss_all.*)와 통합 청크 저장소로 변환
+    (벡터를 reconstruct 할 수 있는 Flat 계열 인덱스 기준)
+    반환: {카테고리: (시작 id, 끝 id)}
+    """
+    import faiss
+
+    vectors = []
+    texts = []
+    bounds = [0]
+    metric_type = None
+    for category in categories:
+        index = faiss.read_index(_index_path(category))
+        chunks = _load_chunks(category)
+        if index.ntotal != len(chunks):
+            raise ValueError(f"인덱스/청크 개수가 다릅니다 ({category}): {index.ntotal} != {len(chunks)}")
+        if metric_type is None:
+            metric_type = index.metric_type
+        elif index.metric_type != metric_type:
+            raise ValueError(f"카테고리별 인덱스의 거리 척도가 다릅니다 ({category})")
+        vectors.append(index.reconstruct_n(0, index.ntotal))
+        texts.extend(str(chunks[i]) for i in range(len(chunks)))
+        bounds.append(bounds[-1] + index.ntotal)
+
+    matrix = np.ascontiguousarray(np.vstack(vectors), dtype=np.float32)
+    unified = faiss.IndexFlat(matrix.shape[1], metric_type)
+    unified.add(matrix)
+
+    tmp_index = f"{_unified_index_path()}.{os.getpid()}.tmp"
+    faiss.write_index(unified, tmp_index)
+    os.replace(tmp_index, _unified_index_path())
+    write_chunk_store(texts, _chunk_data_path(UNIFIED_NAME), _chunk_offsets_path(UNIFIED_NAME))
+    tmp_meta = f"{_unified_meta_path()}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_meta, categories=np.array(categories, dtype=str), bounds=np.array(bounds, dtype=np.int64))
+    os.replace(tmp_meta, _unified_meta_path())
+
+    get_unified_index.cache_clear()
+    return {category: (bounds[i], bounds[i + 1]) for i, category in enumerate(categories)}
+
+
+@lru_cache(maxsize=1)
+def get_unified_index():
+    """
+    (통합 인덱스, 통합 청크 저장소, {카테고리: (시작 id, 끝 id)}) 반환. 없으면 None
+    """
+    import faiss
+
+    if not has_unified_index():
+        return None
+    index = faiss.read_index(_unified_index_path(), _read_flags())
+    chunks = ChunkStore(_chunk_data_path(UNIFIED_NAME), _chunk_offsets_path(UNIFIED_NAME))
+    with np.load(_unified_meta_path(), allow_pickle=False) as meta:
+        categories = [str(category) for category in meta["categories"]]
+        bounds = meta["bounds"].tolist()
+    ranges = {category: (bounds[i], bounds[i + 1]) for i, category in enumerate(categories)}
+    return index, chunks, ranges
+
+
+def retrieve(query, categories=CATEGORIES, k=RETRIEVAL_K):
+    """
+    여러 카테고리를 한 번에 검색하여 {카테고리: top-k 청크 텍스트 리스트} 반환
+
+    query: 모든 카테고리에 같은 쿼리(str) 또는 {카테고리: 쿼리}
+    서로 다른 쿼리는 한 번의 encode로 임베딩합니다. 통합 인덱스가 있으면 카테고리 id 구간으로
+    필터링하여 검색하고, 없으면 카테고리별 인덱스를 사용합니다.
+    """
+    import faiss
+
+    categories = list(categories)
+    queries = {
+        category: (query[category] if isinstance(query, dict) else query)
+        for category in categories
+    }
+    unique_queries = list(dict.fromkeys(queries.values()))
+    if not unique_queries:
+        return {}
+    embeddings = embed_queries(unique_queries)
+    rows = {text: i for i, text in enumerate(unique_queries)}
+
+    unified = get_unified_index()
+    results = {}
+    for category in categories:
+        query_embedding = embeddings[rows[queries[category]]][np.newaxis, :]
+        if unified is not None:
+            index, chunks, ranges = unified
+            if category not in ranges:
+                raise KeyError(f"통합 인덱스에 없는 카테고리입니다: {category}")
+            start, end = ranges[category]
+            params = faiss.SearchParameters(sel=faiss.IDSelectorRange(start, end))
+            _, top_indices = index.search(query_embedding, k, params=params)
+        else:
+            vectorDB, category_chunks = get_faiss_and_chunks()
+            chunks = category_chunks[category]
+            _, top_indices = vectorDB[category].search(query_embedding, k)
+        # 구간 내 벡터가 k개보다 적으면 -1이 반환됨
+        results[category] = [str(chunks[i]) for i in top_indices[0] if i >= 0]
+    return results
+
+
+# === 검색 결과 캐시 ===
+# 검색 쿼리가 고정이므로 (카테고리, 쿼리, 인덱스 버전, k) 단위로 top-k 청크 텍스트를 저장합니다.
+# 디스크 캐시가 있으면 임베딩 모델/FAISS 인덱스를 로드하지 않고 바로 반환합니다.
+RETRIEVAL_CACHE_PATH = os.path.join(VECTORDB_DIR, "retrieval_cache.json")
+
+_retrieval_cache = {}
+_retrieval_disk_loaded = set()
+_retrieval_lock = threading.Lock()
+
+
+def get_index_version():
+    """
+    사용 중인 인덱스/청크 파일의 (이름, 수정 시각, 크기)로 만든 버전 문자열 (파일 내용은 읽지 않음)
+    """
+    if has_unified_index():
+        paths = _unified_files()
+    else:
+        paths = []
+        for category in CATEGORIES:
+            paths += [_index_path(category)] + _chunk_files(category)
+    digest = hashlib.sha1()
+    for path in paths:
+        st = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{st.st_mtime_ns}:{st.st_size};".encode())
+    return digest.hexdigest()[:16]
+
+
+def _disk_key(category, query, k):
+    return json.dumps([category, query, k], ensure_ascii=False)
+
+
+def _load_disk_cache(version):
+    # 같은 버전의 디스크 캐시는 프로세스당 한 번만 읽음
+    if version in _retrieval_disk_loaded:
+        return
+    _retrieval_disk_loaded.add(version)
+    try:
+        with open(RETRIEVAL_CACHE_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if data.get("version") != version:
+        return
+    for key, context in data.get("entries", {}).items():
+        category, query, k = json.loads(key)
+        _retrieval_cache[(category, query, version, k)] = context
+
+
+def _save_disk_cache(version):
+    entries = {
+        _disk_key(category, query, k): context
+        for (category, query, entry_version, k), context in _retrieval_cache.items()
+        if entry_version == version
+    }
+    tmp_path = f"{RETRIEVAL_CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, RETRIEVAL_CACHE_PATH)
+    except OSError as e:
+        print(f"검색 캐시 저장 실패: {e}")
+
+
+def retrieve_contexts(categories=CATEGORIES, k=RETRIEVAL_K, queries=None):
+    """
+    카테고리별 top-k 청크를 "\n\n"으로 이어 붙인 컨텍스트 {카테고리: 컨텍스트} 반환 (캐시 사용)
+    캐시에 없는 카테고리만 모아 retrieve 한 번으로 검색합니다.
+    queries: {카테고리: 쿼리} (없으면 RETRIEVAL_QUERIES)
+    """
+    queries = {
+        category: (queries or {}).get(category) or RETRIEVAL_QUERIES[category]
+        for category in categories
+    }
+    version = get_index_version()
+    keys = {category: (category, queries[category], version, k) for category in categories}
+
+    contexts = {}
+    for category, key in keys.items():
+        context = _retrieval_cache.get(key)
+        if context is not None:
+            contexts[category] = context
+    if len(contexts) == len(keys):
+        return contexts
+
+    with _retrieval_lock:
+        _load_disk_cache(version)
+        missing = []
+        for category, key in keys.items():
+            context = _retrieval_cache.get(key)
+            if context is not None:
+                contexts[category] = context
+            else:
+                missing.append(category)
+        if not missing:
+            return contexts
+
+        found = retrieve({category: queries[category] for category in missing}, missing, k)
+        for category in missing:
+            context = "\n\n".join(found[category])
+            _retrieval_cache[keys[category]] = context
+            contexts[category] = context
+        _save_disk_cache(version)
+        return {category: contexts[category] for category in keys}
+
+
+def retrieve_context(category, query=None, k=RETRIEVAL_K):
+    """
+    단일 카테고리 컨텍스트 반환 (retrieve_contexts 참고)
+    """
+    queries = {category: query} if query is not None else None
+    return retrieve_contexts([category], k=k, queries=queries)[category]
+
+
+def warm_retrieval_cache(categories=CATEGORIES, k=RETRIEVAL_K):
+    """
+    프로세스 시작 시 고정 검색 쿼리의 컨텍스트를 미리 계산 (실패한 카테고리는 건너뜀)
+    반환: 캐시된 카테고리 목록
+    """
+    try:
+        return list(retrieve_contexts(categories, k=k))
+    except Exception as e:
+        print(f"검색 캐시 일괄 예열 실패, 카테고리별로 재시도: {e}")
+
+    warmed = []
+    for category in categories:
+        try:
+            retrieve_context(category, k=k)
+            warmed.append(category)
+        except Exception as e:
+            print(f"검색 캐시 예열 실패 ({category}): {e}")
+    return warmed
+
+
+def clear_retrieval_cache():
+    with _retrieval_lock:
+        _retrieval_cache.clear()
+        _retrieval_disk_loaded.clear()
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'RAG 쿼리 임베딩(embed_queries) 처리량을 배치 크기별로 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-sizes',
+            nargs='+',
+            type=int,
+            default=[1, 8, 64],
+            help='측정할 배치 크기 (기본값: 1 8 64)',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=256,
+            help='배치 크기별로 임베딩할 쿼리 수 (기본값: 256)',
+        )
+        parser.add_argument(
+            '--device',
+            default='cpu',
+            help='임베딩 디바이스 (기본값: cpu)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='반복 측정 횟수, 가장 빠른 값을 사용 (기본값: 3)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=== 임베딩 처리량 측정 시작 ==='))
+        
+        try:
+            # llm_oss 경로 추가 (rag_utility는 llm_oss 기준으로 import)
+            llm_oss_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'llm_oss'))
+            if llm_oss_path not in sys.path:
+                sys.path.append(llm_oss_path)
+            
+            from rag_utility import RETRIEVAL_QUERIES, embed_queries, get_embedder
+            
+            embed_model = get_embedder(options['device'])
+            # 고정 쿼리에 번호를 붙여 서로 다른 쿼리 목록 생성 (사용자별 개인화 쿼리 가정)
+            base_queries = list(RETRIEVAL_QUERIES.values())
+            queries = [
+                f"{base_queries[i % len(base_queries)]} (user {i})"
+                for i in range(options['queries'])
+            ]
+            
+            # 예열 (모델 초기화/캐시 영향 제거)
+            embed_queries(queries[:8], batch_size=8, embed_model=embed_model)
+            
+            self.stdout.write(f'디바이스: {options["device"]}, 쿼리 수: {len(queries)}')
+            for batch_size in options['batch_sizes']:
+                best = None
+                for _ in range(max(1, options['repeat'])):
+                    start_time = time.perf_counter()
+                    embeddings = embed_queries(queries, batch_size=batch_size, embed_model=embed_model)
+                    elapsed = time.perf_counter() - start_time
+                    best = elapsed if best is None else min(best, elapsed)
+                self.stdout.write(
+                    f'batch_size={batch_size:>3}: {len(queries) / best:8.1f} queries/s '
+                    f'({best * 1000 / len(queries):.2f} ms/query, shape={embeddings.shape}, dtype={embeddings.dtype})'
+                )
+            self.stdout.write(self.style.SUCCESS('임베딩 처리량 측정 완료'))
+            
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'임베딩 처리량 측정 중 오류 발생: {str(e)}')
+            )
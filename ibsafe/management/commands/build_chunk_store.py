@@ -0,0 +1,29 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'RAG 청크 파일(.npy, pickle)을 메모리 매핑 가능한 청크 저장소(.bin + .offsets.npy)로 변환합니다.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=== 청크 저장소 변환 시작 ==='))
+        
+        try:
+            # llm_oss 경로 추가 (rag_utility는 llm_oss 기준으로 import)
+            llm_oss_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'llm_oss'))
+            if llm_oss_path not in sys.path:
+                sys.path.append(llm_oss_path)
+            
+            from rag_utility import VECTORDB_CHUNK_DIR, convert_legacy_chunks
+            
+            self.stdout.write(f'청크 디렉터리: {VECTORDB_CHUNK_DIR}')
+            for category, (count, size) in convert_legacy_chunks().items():
+                self.stdout.write(f'{category}: 청크 {count}개, {size} bytes')
+            self.stdout.write(self.style.SUCCESS('청크 저장소 변환 완료'))
+            
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'청크 저장소 변환 중 오류 발생: {str(e)}')
+            )
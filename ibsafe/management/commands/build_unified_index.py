@@ -0,0 +1,39 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = '카테고리별 FAISS 인덱스/청크를 카테고리 메타데이터가 있는 통합 인덱스로 변환합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--categories',
+            nargs='+',
+            default=None,
+            help='통합할 카테고리 (기본값: diet sleep exercise)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=== 통합 인덱스 생성 시작 ==='))
+        
+        try:
+            # llm_oss 경로 추가 (rag_utility는 llm_oss 기준으로 import)
+            llm_oss_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'llm_oss'))
+            if llm_oss_path not in sys.path:
+                sys.path.append(llm_oss_path)
+            
+            from rag_utility import CATEGORIES, VECTORDB_INDEX_DIR, build_unified_index
+            
+            ranges = build_unified_index(options['categories'] or CATEGORIES)
+            
+            self.stdout.write(f'인덱스 디렉터리: {VECTORDB_INDEX_DIR}')
+            for category, (start, end) in ranges.items():
+                self.stdout.write(f'{category}: id {start} ~ {end - 1} ({end - start}개)')
+            self.stdout.write(self.style.SUCCESS('통합 인덱스 생성 완료'))
+            
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'통합 인덱스 생성 중 오류 발생: {str(e)}')
+            )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from ibsafe.inference_worker import check_inference_worker
+
+
+class Command(BaseCommand):
+    help = 'LLM 모드 상주 추론 워커의 헬스/레디니스를 확인합니다. 준비되지 않았으면 오류로 종료합니다.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=== 추론 워커 상태 확인 ==='))
+        
+        state = check_inference_worker()
+        
+        self.stdout.write(f'큐: {state["queue"]}')
+        if not state['reachable']:
+            raise CommandError(state['error'])
+        
+        self.stdout.write(f'워커: {state["hostname"]} (pid {state["pid"]}, 하트비트 {state["heartbeat_age"]}초 전)')
+        if state['busy']:
+            self.stdout.write(f'처리 중인 작업: {state["current_task"]}')
+        self.stdout.write(f'예열 시간: {state["warm_seconds"]}초')
+        for name, seconds in state['components'].items():
+            self.stdout.write(f'  {name}: {seconds}초')
+        for name, error in state['errors'].items():
+            self.stdout.write(self.style.WARNING(f'  {name}: {error}'))
+        
+        if not state['ready']:
+            raise CommandError('추론 워커가 아직 준비되지 않았습니다.')
+        self.stdout.write(self.style.SUCCESS('추론 워커 준비 완료'))
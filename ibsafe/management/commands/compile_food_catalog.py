@@ -0,0 +1,39 @@
+import os
+
+from django.core.management.base import BaseCommand
+from ibsafe.llm_oss.food_catalog import DEFAULT_FOOD_LIST_PATH, compile_food_catalog
+
+
+class Command(BaseCommand):
+    help = '음식 카탈로그(Food_list.xlsx)를 바이너리 아티팩트(.npz)로 변환합니다. 배포 시 실행하세요.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            default=DEFAULT_FOOD_LIST_PATH,
+            help='원본 엑셀 경로 (기본값: ibsafe/llm_oss/Food_list.xlsx)',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='아티팩트 저장 경로 (기본값: 원본과 같은 위치의 .npz)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=== 음식 카탈로그 컴파일 시작 ==='))
+        
+        try:
+            output_path, catalog = compile_food_catalog(options['source'], options['output'])
+            
+            self.stdout.write(f'원본: {catalog.path}')
+            self.stdout.write(f'음식 수: {len(catalog.df)}개')
+            self.stdout.write(f'카테고리 수: {len(catalog.category_values)}개')
+            self.stdout.write(f'원본 해시: {catalog.version}')
+            self.stdout.write(
+                self.style.SUCCESS(f'아티팩트 생성 완료: {output_path} ({os.path.getsize(output_path)} bytes)')
+            )
+            
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'음식 카탈로그 컴파일 중 오류 발생: {str(e)}')
+            )
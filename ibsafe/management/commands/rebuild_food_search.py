@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from ibsafe.food_search import rebuild_food_search_entries
+
+
+class Command(BaseCommand):
+    help = 'Food 전체로부터 음식 검색 요약 테이블(FoodSearchEntry)을 재구성합니다. 음식 데이터를 일괄 적재한 후 실행하세요.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='한 번에 저장할 항목 수 (기본값: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=== 음식 검색 테이블 재구성 시작 ==='))
+        
+        try:
+            count = rebuild_food_search_entries(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'음식 검색 테이블 재구성 완료: {count}개'))
+            
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'음식 검색 테이블 재구성 중 오류 발생: {str(e)}')
+            )
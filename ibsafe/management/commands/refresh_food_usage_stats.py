@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from ibsafe.food_search import USER_USAGE_RECENT_DAYS, refresh_food_usage_stats
+from ibsafe.utils import sync_food_usage_stats_schedule
+
+
+class Command(BaseCommand):
+    help = '음식 검색 인기순 정렬용 사용 통계(전체 기록 수, 사용자별 최근 기록 수)를 갱신합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recent-days',
+            type=int,
+            default=USER_USAGE_RECENT_DAYS,
+            help=f'사용자별 통계 집계 기간 (기본값: {USER_USAGE_RECENT_DAYS}일)',
+        )
+        parser.add_argument(
+            '--schedule',
+            action='store_true',
+            help='매일 자동 갱신하도록 Celery Beat 스케줄도 등록합니다.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=== 음식 사용 통계 갱신 시작 ==='))
+        
+        try:
+            result = refresh_food_usage_stats(recent_days=options['recent_days'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'음식 사용 통계 갱신 완료: 음식 {result["foods"]}개, 사용자별 통계 {result["user_usages"]}개'
+                )
+            )
+            
+            if options['schedule']:
+                if sync_food_usage_stats_schedule():
+                    self.stdout.write(self.style.SUCCESS('매일 갱신 스케줄 등록 완료'))
+                else:
+                    self.stdout.write(self.style.ERROR('매일 갱신 스케줄 등록 실패'))
+            
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'음식 사용 통계 갱신 중 오류 발생: {str(e)}')
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from ibsafe.food_search import warm_food_search_cache
+
+
+class Command(BaseCommand):
+    help = '자주 검색된 접두어의 음식 검색 결과를 미리 계산하여 캐시에 저장합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=200,
+            help='예열할 접두어 수 (기본값: 200)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=== 음식 검색 캐시 예열 시작 ==='))
+        
+        try:
+            prefixes = warm_food_search_cache(limit=options['limit'])
+            self.stdout.write(self.style.SUCCESS(f'음식 검색 캐시 예열 완료: {len(prefixes)}개'))
+            
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'음식 검색 캐시 예열 중 오류 발생: {str(e)}')
+            )
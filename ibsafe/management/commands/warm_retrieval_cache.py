@@ -0,0 +1,36 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'RAG 고정 검색 쿼리의 컨텍스트를 미리 계산하여 디스크 캐시에 저장합니다. 배포 시 실행하세요.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=== RAG 검색 캐시 예열 시작 ==='))
+        
+        try:
+            # llm_oss 경로 추가 (rag_utility는 llm_oss 기준으로 import)
+            llm_oss_path = os.path.join(os.path.dirname(__file__), '..', '..', 'llm_oss')
+            llm_oss_path = os.path.abspath(llm_oss_path)
+            if llm_oss_path not in sys.path:
+                sys.path.append(llm_oss_path)
+            
+            from rag_utility import CATEGORIES, RETRIEVAL_CACHE_PATH, get_index_version, warm_retrieval_cache
+            
+            warmed = warm_retrieval_cache()
+            
+            self.stdout.write(f'인덱스 버전: {get_index_version()}')
+            self.stdout.write(f'캐시 파일: {RETRIEVAL_CACHE_PATH}')
+            if len(warmed) == len(CATEGORIES):
+                self.stdout.write(self.style.SUCCESS(f'검색 캐시 예열 완료: {", ".join(warmed)}'))
+            else:
+                self.stdout.write(
+                    self.style.WARNING(f'일부 카테고리만 예열되었습니다: {", ".join(warmed) or "없음"}')
+                )
+            
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'RAG 검색 캐시 예열 중 오류 발생: {str(e)}')
+            )
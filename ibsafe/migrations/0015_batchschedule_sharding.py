@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibsafe', '0014_notificationschedule_send_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batchschedule',
+            name='shard_concurrency',
+            field=models.IntegerField(default=4, help_text='동시에 실행되는 샤드 태스크 최대 개수', verbose_name='샤드 동시 실행 수'),
+        ),
+        migrations.AddField(
+            model_name='batchschedule',
+            name='shard_size',
+            field=models.IntegerField(default=200, help_text='샤드 하나에 포함되는 사용자 수', verbose_name='샤드 크기'),
+        ),
+        migrations.AddField(
+            model_name='batchschedule',
+            name='use_sharding',
+            field=models.BooleanField(default=False, help_text='True이면 사용자를 샤드로 나누어 여러 워커에서 병렬 실행', verbose_name='샤딩 실행 여부'),
+        ),
+    ]
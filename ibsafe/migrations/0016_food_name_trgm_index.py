@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:20
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibsafe', '0015_batchschedule_sharding'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='food',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['food_name'], name='food_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:35
+
+import re
+import unicodedata
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+# 마이그레이션 시점의 값 고정 (이후 ibsafe.food_search가 바뀌어도 이 마이그레이션은 그대로 동작)
+FOOD_SEARCH_FIELDS = (
+    'food_code', 'food_name', 'energy_kcal', 'protein_g', 'fat_g', 'carbohydrates_g',
+    'fodmap', 'dietary_fiber_type',
+)
+
+_whitespace_re = re.compile(r'\s+')
+
+
+def normalize_food_name(text):
+    # 검색용 정규화: NFKC 정규화, 소문자 변환, 공백 제거
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    return _whitespace_re.sub('', text)
+
+
+def populate_food_search_entries(apps, schema_editor):
+    # 기존 Food 데이터로 검색 요약 테이블 채우기
+    Food = apps.get_model('ibsafe', 'Food')
+    FoodSearchEntry = apps.get_model('ibsafe', 'FoodSearchEntry')
+    entries = []
+    for food in Food.objects.select_related('category').iterator(chunk_size=1000):
+        values = {field: getattr(food, field) for field in FOOD_SEARCH_FIELDS}
+        entries.append(FoodSearchEntry(
+            food=food,
+            normalized_name=normalize_food_name(food.food_name),
+            category_name=(food.category.main_category_name if food.category_id else '') or '',
+            **values
+        ))
+        if len(entries) >= 1000:
+            FoodSearchEntry.objects.bulk_create(entries)
+            entries = []
+    if entries:
+        FoodSearchEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibsafe', '0016_food_name_trgm_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodSearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('food_code', models.CharField(help_text='식품 고유 코드', max_length=20, unique=True)),
+                ('food_name', models.CharField(help_text='식품명', max_length=100)),
+                ('normalized_name', models.CharField(help_text='검색용 정규화 식품명 (소문자, 공백 제거)', max_length=100)),
+                ('energy_kcal', models.IntegerField(blank=True, help_text='에너지 (kcal)', null=True)),
+                ('protein_g', models.DecimalField(blank=True, decimal_places=2, help_text='단백질 (g)', max_digits=8, null=True)),
+                ('fat_g', models.DecimalField(blank=True, decimal_places=2, help_text='지방 (g)', max_digits=8, null=True)),
+                ('carbohydrates_g', models.DecimalField(blank=True, decimal_places=2, help_text='탄수화물 (g)', max_digits=8, null=True)),
+                ('category_name', models.CharField(blank=True, default='', help_text='대분류명', max_length=50)),
+                ('fodmap', models.CharField(blank=True, help_text='포드맵', max_length=50, null=True)),
+                ('dietary_fiber_type', models.CharField(blank=True, help_text='식이섬유종류', max_length=10, null=True)),
+                ('food', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to='ibsafe.food')),
+            ],
+            options={
+                'verbose_name': '음식 검색 항목',
+                'verbose_name_plural': '음식 검색 항목들',
+                'ordering': ['food_name'],
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['normalized_name'], name='food_search_name_trgm_idx', opclasses=['gin_trgm_ops'])],
+            },
+        ),
+        migrations.RunPython(populate_food_search_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibsafe', '0017_foodsearchentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserFoodUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_count', models.IntegerField(default=0, help_text='최근 기간 기록 수')),
+                ('last_record_date', models.DateField(help_text='마지막 기록 날짜')),
+            ],
+            options={
+                'verbose_name': '사용자 음식 사용 통계',
+                'verbose_name_plural': '사용자 음식 사용 통계들',
+            },
+        ),
+        migrations.AddField(
+            model_name='foodsearchentry',
+            name='usage_count',
+            field=models.IntegerField(default=0, help_text='전체 사용자 음식 기록 수 (refresh_food_usage_stats로 주기적 갱신)'),
+        ),
+        migrations.AddIndex(
+            model_name='foodsearchentry',
+            index=models.Index(fields=['-usage_count', 'food_name'], name='food_search_usage_idx'),
+        ),
+        migrations.AddField(
+            model_name='userfoodusage',
+            name='food',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_usages', to='ibsafe.food'),
+        ),
+        migrations.AddField(
+            model_name='userfoodusage',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='food_usages', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='userfoodusage',
+            index=models.Index(fields=['user', '-record_count'], name='user_food_usage_rank_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='userfoodusage',
+            unique_together={('user', 'food')},
+        ),
+    ]
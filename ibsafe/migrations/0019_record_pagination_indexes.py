@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibsafe', '0018_food_usage_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicationrecord',
+            index=models.Index(fields=['user', 'record_date', 'id'], name='medication_record_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfoodrecord',
+            index=models.Index(fields=['user', 'record_date', 'id'], name='food_record_page_idx'),
+        ),
+    ]
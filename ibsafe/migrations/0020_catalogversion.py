@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibsafe', '0019_record_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='카탈로그 이름 (예: food_search)', max_length=50, unique=True)),
+                ('version', models.IntegerField(default=0, help_text='현재 버전')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '카탈로그 버전',
+                'verbose_name_plural': '카탈로그 버전들',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ibsafe', '0020_catalogversion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='foodsearchentry',
+            name='food_search_usage_idx',
+        ),
+    ]
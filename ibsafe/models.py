@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
 from decimal import Decimal
 
 # Create your models here.
@@ -134,6 +135,10 @@ class MedicationRecord(models.Model):
         ordering = ['-record_date', '-created_at']
         # 같은 날짜, 같은 사용자, 같은 약에 대한 중복 방지
         unique_together = ('user', 'medication_name', 'record_date')
+        indexes = [
+            # 기간별 조회 키셋 페이지네이션 (record_date, id)용
+            models.Index(fields=['user', 'record_date', 'id'], name='medication_record_page_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username}의 {self.record_date} {self.medication_name} 복용 기록"
@@ -363,6 +368,10 @@ class Food(models.Model):
         verbose_name = "음식"
         verbose_name_plural = "음식들"
         ordering = ['food_name']
+        indexes = [
+            # 음식 검색(food_name ILIKE '%검색어%', 유사도 정렬)용 pg_trgm 인덱스
+            GinIndex(fields=['food_name'], name='food_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.food_name
@@ -397,6 +406,66 @@ class Food(models.Model):
         return 0
 
 
+class FoodSearchEntry(models.Model):
+    """음식 검색용 요약 모델 - 검색 응답에 필요한 컬럼만 Food에서 복사 (ibsafe.food_search에서 동기화)"""
+    food = models.OneToOneField(Food, on_delete=models.CASCADE, related_name='search_entry')
+    food_code = models.CharField(max_length=20, unique=True, help_text="식품 고유 코드")
+    food_name = models.CharField(max_length=100, help_text="식품명")
+    normalized_name = models.CharField(max_length=100, help_text="검색용 정규화 식품명 (소문자, 공백 제거)")
+    energy_kcal = models.IntegerField(null=True, blank=True, help_text="에너지 (kcal)")
+    protein_g = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, help_text="단백질 (g)")
+    fat_g = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, help_text="지방 (g)")
+    carbohydrates_g = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, help_text="탄수화물 (g)")
+    category_name = models.CharField(max_length=50, blank=True, default='', help_text="대분류명")
+    fodmap = models.CharField(max_length=50, null=True, blank=True, help_text="포드맵")
+    dietary_fiber_type = models.CharField(max_length=10, null=True, blank=True, help_text="식이섬유종류")
+    usage_count = models.IntegerField(default=0, help_text="전체 사용자 음식 기록 수 (refresh_food_usage_stats로 주기적 갱신)")
+    
+    class Meta:
+        verbose_name = "음식 검색 항목"
+        verbose_name_plural = "음식 검색 항목들"
+        ordering = ['food_name']
+        indexes = [
+            GinIndex(fields=['normalized_name'], name='food_search_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+    
+    def __str__(self):
+        return self.food_name
+
+
+class CatalogVersion(models.Model):
+    """캐시 무효화용 카탈로그 버전 - 데이터가 바뀔 때마다 증가 (모든 프로세스가 공유)"""
+    name = models.CharField(max_length=50, unique=True, help_text="카탈로그 이름 (예: food_search)")
+    version = models.IntegerField(default=0, help_text="현재 버전")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "카탈로그 버전"
+        verbose_name_plural = "카탈로그 버전들"
+    
+    def __str__(self):
+        return f"{self.name}: v{self.version}"
+
+
+class UserFoodUsage(models.Model):
+    """사용자별 최근 음식 기록 수 (검색 개인화용, refresh_food_usage_stats로 주기적 갱신)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='food_usages')
+    food = models.ForeignKey(Food, on_delete=models.CASCADE, related_name='user_usages')
+    record_count = models.IntegerField(default=0, help_text="최근 기간 기록 수")
+    last_record_date = models.DateField(help_text="마지막 기록 날짜")
+    
+    class Meta:
+        verbose_name = "사용자 음식 사용 통계"
+        verbose_name_plural = "사용자 음식 사용 통계들"
+        unique_together = ('user', 'food')
+        indexes = [
+            models.Index(fields=['user', '-record_count'], name='user_food_usage_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.food_id}: {self.record_count}회"
+
+
 class UserFoodRecord(models.Model):
     """사용자 음식 기록 모델"""
     MEAL_TYPE_CHOICES = [
@@ -419,6 +488,10 @@ class UserFoodRecord(models.Model):
         ordering = ['-record_date', '-created_at']
         # 같은 날짜, 같은 사용자, 같은 음식, 같은 식사 타입에 대한 중복 방지
         unique_together = ('user', 'food', 'meal_type', 'record_date')
+        indexes = [
+            # 기간별 조회 키셋 페이지네이션 (record_date, id)용
+            models.Index(fields=['user', 'record_date', 'id'], name='food_record_page_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username}의 {self.record_date} {self.get_meal_type_display()} - {self.food.food_name}"
@@ -1027,6 +1100,12 @@ class BatchSchedule(models.Model):
     hour = models.IntegerField(default=9, verbose_name='실행 시간 (시)', help_text='0-23')
     minute = models.IntegerField(default=0, verbose_name='실행 시간 (분)', help_text='0-59')
     is_active = models.BooleanField(default=True, verbose_name='활성화 여부')
+    
+    # 샤딩 실행 설정 (여러 Celery 워커에 사용자 분산)
+    use_sharding = models.BooleanField(default=False, verbose_name='샤딩 실행 여부', help_text='True이면 사용자를 샤드로 나누어 여러 워커에서 병렬 실행')
+    shard_size = models.IntegerField(default=200, verbose_name='샤드 크기', help_text='샤드 하나에 포함되는 사용자 수')
+    shard_concurrency = models.IntegerField(default=4, verbose_name='샤드 동시 실행 수', help_text='동시에 실행되는 샤드 태스크 최대 개수')
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -0,0 +1,188 @@
+"""
+Ollama HTTP 클라이언트
+
+프로세스당 하나의 keep-alive 세션(연결 풀)을 재사용하여 LLM 호출마다
+TCP 연결을 새로 맺지 않도록 합니다.
+- 풀 크기 제한(pool_block=True): 풀이 가득 차면 연결이 반환될 때까지 대기 (백프레셔)
+- 연결/읽기 타임아웃 분리
+- 연결 오류에 한해 지수 백오프 + 지터로 재시도 (읽기 타임아웃은 재시도하지 않음)
+- 호출별 지연시간 메트릭 (get_ollama_metrics)
+- 백엔드(base_url)별 동시 생성 요청 수 제한 (OLLAMA_MAX_CONCURRENCY)
+"""
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 설정 (환경 변수로 변경 가능)
+OLLAMA_POOL_MAXSIZE = _env_int('OLLAMA_POOL_MAXSIZE', 4)
+OLLAMA_CONNECT_TIMEOUT = _env_float('OLLAMA_CONNECT_TIMEOUT', 5.0)
+OLLAMA_READ_TIMEOUT = _env_float('OLLAMA_READ_TIMEOUT', 1500.0)
+OLLAMA_MAX_RETRIES = _env_int('OLLAMA_MAX_RETRIES', 3)
+OLLAMA_RETRY_BACKOFF = _env_float('OLLAMA_RETRY_BACKOFF', 0.5)
+OLLAMA_RETRY_BACKOFF_MAX = _env_float('OLLAMA_RETRY_BACKOFF_MAX', 8.0)
+# 백엔드별 동시 생성 요청 수 (1이면 순차 실행과 동일)
+OLLAMA_MAX_CONCURRENCY = max(1, _env_int('OLLAMA_MAX_CONCURRENCY', 4))
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+_backend_slots = {}
+_backend_slots_lock = threading.Lock()
+
+
+def get_ollama_session():
+    """
+    프로세스 공용 keep-alive 세션 반환 (fork된 워커 프로세스에서는 새로 생성)
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=OLLAMA_POOL_MAXSIZE,
+                pool_block=True,
+                max_retries=0,
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+            _session_pid = pid
+    return _session
+
+
+def close_ollama_session():
+    """
+    공용 세션과 풀의 연결을 모두 닫음
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
+
+
+def _backend_slot(base_url):
+    """
+    백엔드별 동시 요청 제한 세마포어
+    """
+    with _backend_slots_lock:
+        slot = _backend_slots.get(base_url)
+        if slot is None:
+            slot = threading.BoundedSemaphore(OLLAMA_MAX_CONCURRENCY)
+            _backend_slots[base_url] = slot
+        return slot
+
+
+def _retry_delay(attempt):
+    # full jitter: 0 ~ min(최대, 기본 * 2^attempt)
+    return random.uniform(0, min(OLLAMA_RETRY_BACKOFF_MAX, OLLAMA_RETRY_BACKOFF * (2 ** attempt)))
+
+
+def _record_metric(model, elapsed, ok):
+    with _metrics_lock:
+        stat = _metrics.setdefault(model, {
+            'calls': 0,
+            'errors': 0,
+            'total_seconds': 0.0,
+            'max_seconds': 0.0,
+            'last_seconds': 0.0,
+        })
+        stat['calls'] += 1
+        if not ok:
+            stat['errors'] += 1
+        stat['total_seconds'] += elapsed
+        stat['max_seconds'] = max(stat['max_seconds'], elapsed)
+        stat['last_seconds'] = elapsed
+
+
+def get_ollama_metrics():
+    """
+    모델별 호출 횟수/오류 수/지연시간(평균·최대·마지막, 초) 스냅샷 반환
+    """
+    with _metrics_lock:
+        snapshot = {}
+        for model, stat in _metrics.items():
+            item = dict(stat)
+            item['avg_seconds'] = stat['total_seconds'] / stat['calls'] if stat['calls'] else 0.0
+            snapshot[model] = item
+        return snapshot
+
+
+def reset_ollama_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def ollama_generate(base_url, model, prompt):
+    """
+    /api/generate 호출 (stream=False). requests.Response를 반환하며
+    연결 오류는 재시도 후에도 실패하면 그대로 raise 합니다.
+    백엔드별 동시 요청이 OLLAMA_MAX_CONCURRENCY개를 넘으면 슬롯이 빌 때까지 대기합니다.
+    """
+    url = f"{base_url}/api/generate"
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": False
+    }
+    session = get_ollama_session()
+
+    with _backend_slot(base_url):
+        return _post_generate(session, url, model, payload)
+
+
+def _post_generate(session, url, model, payload):
+    start_time = time.perf_counter()
+    ok = False
+    try:
+        attempt = 0
+        while True:
+            try:
+                response = session.post(
+                    url,
+                    json=payload,
+                    timeout=(OLLAMA_CONNECT_TIMEOUT, OLLAMA_READ_TIMEOUT),
+                )
+                break
+            except requests.exceptions.ConnectionError as e:
+                # 읽기 타임아웃(ReadTimeout)은 ConnectionError가 아니므로 재시도하지 않음
+                if attempt >= OLLAMA_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(attempt)
+                attempt += 1
+                print(f"Ollama API 연결 재시도 {attempt}/{OLLAMA_MAX_RETRIES} ({delay:.2f}초 후): {e}")
+                time.sleep(delay)
+        ok = response.status_code == 200
+        return response
+    finally:
+        elapsed = time.perf_counter() - start_time
+        _record_metric(model, elapsed, ok)
+        print(f"Ollama API 호출 시간: {elapsed:.2f}초 (모델: {model})")
@@ -0,0 +1,124 @@
+"""
+기간별 기록 조회 API 공용 키셋(커서) 페이지네이션
+
+(record_date, id) 순으로 정렬하고, 다음 페이지는 마지막 항목의 (record_date, id) 이후부터 조회합니다.
+OFFSET을 쓰지 않으므로 페이지가 뒤로 가도 조회 비용이 일정합니다.
+날짜 안에서 다른 순서로 표시하는 API(음식: 식사 타입 순, 복용약: 약 이름 순)는
+한 날짜가 두 페이지로 나뉘지 않도록 날짜 경계에서 끊습니다 (paginate_by_record_date_boundary).
+
+요청 파라미터:
+    limit  - 페이지 크기 (기본값 DEFAULT_PAGE_SIZE, 최대 MAX_PAGE_SIZE)
+    cursor - 이전 응답의 next_cursor (첫 페이지는 생략)
+응답:
+    next_cursor - 다음 페이지 커서 (마지막 페이지이면 None)
+
+클라이언트(모바일 앱) 변경 사항:
+    기간별 조회 API 7종(음식/수면/물/운동/IBS-SSS/PSS 스트레스/복약)은 limit을 생략해도
+    최대 DEFAULT_PAGE_SIZE개만 반환합니다. 기존처럼 기간 전체가 필요하면 next_cursor가 None이
+    될 때까지 cursor를 넘겨 반복 조회해야 하며, next_cursor를 무시하는 이전 버전 앱은
+    긴 기간을 조회할 때 뒷부분 기록이 누락됩니다.
+"""
+import base64
+from datetime import date
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 500
+
+
+class PaginationError(ValueError):
+    """잘못된 limit/cursor 파라미터"""
+
+
+def encode_cursor(record_date, record_id):
+    raw = f'{record_date.isoformat()}:{record_id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    커서 -> (record_date, id)
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        record_date, record_id = raw.split(':', 1)
+        return date.fromisoformat(record_date), int(record_id)
+    except (ValueError, UnicodeError):
+        raise PaginationError('잘못된 커서입니다.')
+
+
+def get_page_size(request):
+    limit = request.GET.get('limit')
+    if limit in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise PaginationError('limit은 숫자여야 합니다.')
+    if limit < 1:
+        raise PaginationError('limit은 1 이상이어야 합니다.')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def paginate_by_record_date(queryset, request):
+    """
+    queryset을 (record_date, id) 키셋으로 페이지네이션
+
+    Returns:
+        tuple: (현재 페이지 기록 리스트, next_cursor 또는 None)
+    Raises:
+        PaginationError: limit/cursor 파라미터가 잘못된 경우
+    """
+    page_size = get_page_size(request)
+    cursor = request.GET.get('cursor')
+
+    queryset = queryset.order_by('record_date', 'id')
+    if cursor:
+        record_date, record_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(record_date__gt=record_date) | Q(record_date=record_date, id__gt=record_id)
+        )
+
+    # 다음 페이지 존재 여부 확인을 위해 하나 더 조회
+    records = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(records) > page_size:
+        records = records[:page_size]
+        last = records[-1]
+        next_cursor = encode_cursor(last.record_date, last.id)
+    return records, next_cursor
+
+
+def paginate_by_record_date_boundary(queryset, request, ordering=()):
+    """
+    queryset을 날짜 경계에서 끊어 페이지네이션 (한 날짜의 기록은 항상 같은 페이지에 포함)
+
+    limit번째 기록의 날짜까지 포함하므로 마지막 날짜의 기록 수만큼 limit을 넘을 수 있습니다.
+    페이지 안의 기록은 record_date, ordering 순으로 정렬합니다.
+
+    Returns:
+        tuple: (현재 페이지 기록 리스트, next_cursor 또는 None)
+    Raises:
+        PaginationError: limit/cursor 파라미터가 잘못된 경우
+    """
+    page_size = get_page_size(request)
+    cursor = request.GET.get('cursor')
+
+    if cursor:
+        record_date, _ = decode_cursor(cursor)
+        queryset = queryset.filter(record_date__gt=record_date)
+
+    # limit번째 기록의 날짜 (남은 기록이 limit개 이하이면 마지막 페이지)
+    boundary = list(
+        queryset.order_by('record_date', 'id').values_list('record_date', flat=True)[page_size - 1:page_size]
+    )
+    page_queryset = queryset.filter(record_date__lte=boundary[0]) if boundary else queryset
+    records = list(page_queryset.order_by('record_date', *ordering))
+
+    next_cursor = None
+    if boundary and queryset.filter(record_date__gt=boundary[0]).exists():
+        last = records[-1]
+        next_cursor = encode_cursor(last.record_date, last.id)
+    return records, next_cursor
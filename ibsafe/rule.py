@@ -1,16 +1,11 @@
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional, Set
-
-# === Canonical allergy types you can pass in `allergies` ===
-ALLERGY_CANON = [
-    "글루텐 알러지",
-    "유당 알러지",
-    "견과류 알러지",
-    "해산물 알러지",
-    "계란 알러지",
-    "대두 알러지",
-]
+from typing import Any, List, Dict, Optional, Set
+
+# === Canonical allergy types you can pass in `allergies` (food_catalog과 공유) ===
+from .llm_oss.food_catalog import (
+    ALLERGY_CANON, FoodNameMatcher, allergy_bitmask, compute_allergy_mask, get_food_catalog
+)
 
 def _canon_allergies(allergies: List[str]) -> Set[str]:
     """
@@ -29,27 +24,44 @@ def _canon_allergies(allergies: List[str]) -> Set[str]:
                 out.add(key)
     return out
 
-def _parse_allergy_cell(cell: str) -> Set[str]:
-    """Split the 엑셀의 '알러지_tag' 셀 -> set. '해당 없음'이면 empty set."""
-    if not isinstance(cell, str) or not cell.strip() or cell.strip() == "해당 없음":
-        return set()
-    parts = [p.strip() for p in cell.split(",")]
-    return set(p for p in parts if p)
+def _recent_and_dislike_terms(recent_list: List[str], dislikes: List[str]):
+    recent_set = set([s.strip() for s in (recent_list or []) if isinstance(s, str) and s.strip()])
+    dislike_terms = [k.strip() for k in dislikes if k and isinstance(k, str)] if dislikes else None
+    return recent_set, dislike_terms
+
+def _recent_and_dislike_drop_mask(
+    matcher: FoodNameMatcher,
+    recent_list: List[str],
+    dislikes: List[str]
+) -> np.ndarray:
+    """True=drop. 카탈로그 행 순서의 bool 배열"""
+    recent_set, dislike_terms = _recent_and_dislike_terms(recent_list, dislikes)
+    drop = matcher.exact_mask(recent_set)
+    if dislike_terms is not None:
+        # 유효한 키워드가 없으면 빈 패턴과 같이 모든 행과 일치 (정규식 경로와 동일)
+        drop = drop | matcher.contains_mask(dislike_terms or [""])
+    return drop
 
 def _exclude_recent_and_dislikes(
     df: pd.DataFrame,
     recent_list: List[str],
-    dislikes: List[str]
+    dislikes: List[str],
+    matcher: Optional[FoodNameMatcher] = None
 ) -> pd.Series:
-    """True=keep. 최근 3일 섭취(정확 일치) 제외 + 기피 키워드(부분 일치) 제외"""
-    recent_set = set([s.strip() for s in (recent_list or []) if isinstance(s, str) and s.strip()])
+    """
+    True=keep. 최근 3일 섭취(정확 일치) 제외 + 기피 키워드(부분 일치) 제외
+    matcher: 카탈로그의 음식 이름 매처 (없으면 df 전체를 스캔)
+    """
+    if matcher is not None:
+        return pd.Series(~_recent_and_dislike_drop_mask(matcher, recent_list, dislikes), index=df.index)
+
+    recent_set, dislike_terms = _recent_and_dislike_terms(recent_list, dislikes)
     not_recent = ~df["food"].isin(recent_set)
 
-    if dislikes:
+    if dislike_terms is not None:
         # Escape regex special chars
         import re
-        dislike_terms = [re.escape(k.strip()) for k in dislikes if k and isinstance(k, str)]
-        pat = "|".join(dislike_terms)
+        pat = "|".join(re.escape(k) for k in dislike_terms)
         not_disliked = ~df["food"].str.contains(pat, na=False)
     else:
         not_disliked = pd.Series(True, index=df.index)
@@ -58,55 +70,106 @@ def _exclude_recent_and_dislikes(
 
 def _exclude_allergies(
     df: pd.DataFrame,
-    allergies: List[str]
+    allergies: List[str],
+    allergy_mask: Optional[np.ndarray] = None
 ) -> pd.Series:
-    """True=keep. Row의 알러지_tag와 요청 알러지 집합이 교집합이면 제외."""
-    want = _canon_allergies(allergies)
-    if not want:
+    """
+    True=keep. Row의 알러지_tag와 요청 알러지 집합이 교집합이면 제외.
+    allergy_mask: 카탈로그 로드 시 미리 계산한 행별 알러지 비트마스크 (없으면 df에서 계산)
+    """
+    want_mask = allergy_bitmask(_canon_allergies(allergies))
+    if not want_mask:
         return pd.Series(True, index=df.index)
-    row_sets = df["알러지_tag"].apply(_parse_allergy_cell)
-    return ~row_sets.apply(lambda s: bool(s & want))
+    if allergy_mask is None:
+        allergy_mask = compute_allergy_mask(df)
+    return pd.Series((allergy_mask & want_mask) == 0, index=df.index)
 
-def recommend_diet(
-    excel_path: str,
-    recent_3days: Optional[List[str]]=None,
-    allergies: Optional[List[str]]=None,
-    restrictions: Optional[List[str]]=None,
-    random_seed: int = 42
-) -> Dict[str, List[str]]:
-    
-    CATEGORY_RULE = {
+# 끼니별 카테고리 추천 개수
+DIET_CATEGORY_RULE = {
     "아침": {"밥류": 2, "죽류": 2, "국/찌개/탕": 3, "반찬/나물/무침": 4},
     "점심": {"밥류": 2, "면/국수": 2, "국/찌개/탕": 2, "단백질/메인(육·해산물)": 4},
     "저녁": {"밥류": 2, "죽류": 1, "국/찌개/탕": 2, "단백질/메인(육·해산물)": 4},
 }
-    rng = np.random.default_rng(random_seed)
-    df = pd.read_excel(excel_path)
-    
-    # --- 기존 필터링 (최근 3일, 알러지, 기피) 적용 ---
-    #from rule_based_recommender import _exclude_recent_and_dislikes, _exclude_allergies
-    keep = _exclude_recent_and_dislikes(df, recent_3days or [], restrictions or [])
-    keep &= _exclude_allergies(df, allergies or [])
-    df = df[keep].copy()
 
-    # --- 끼니별 추천 ---
+def _pick_diet(catalog, keep: np.ndarray, rng: np.random.Generator) -> Dict[str, List[str]]:
+    """
+    필터링된 행(keep)에서 끼니별 음식을 고름.
+    카테고리별 행 번호 배열과 '사용한 음식' bool 마스크만 다루므로 전체 테이블을 스캔하지 않습니다.
+    후보(pool) 순서는 카탈로그 순서의 고유 음식 이름이라 같은 시드면 기존 결과와 동일합니다.
+    """
+    food_ids = catalog.food_ids
+    used = np.zeros(len(catalog.food_names), dtype=bool)
     result = {"아침": [], "점심": [], "저녁": []}
-    used = set()
 
-    for meal, rules in CATEGORY_RULE.items():
+    for meal, rules in DIET_CATEGORY_RULE.items():
         picks = []
         for cat, n in rules.items():
-            pool = df[(df["category"]==cat) & (~df["food"].isin(used))]["food"].unique().tolist()
-            if len(pool) == 0:
+            rows = catalog.category_rows.get(cat)
+            if rows is None:
                 continue
+            ids = food_ids[rows]
+            ids = ids[keep[rows] & ~used[ids]]
+            if len(ids) == 0:
+                continue
+            # 고유 음식 ID (첫 등장 순서 유지)
+            _, first = np.unique(ids, return_index=True)
+            pool = ids[np.sort(first)]
             chosen = rng.choice(pool, size=min(len(pool), n), replace=False)
-            chosen = [str(x) for x in chosen]
-            picks.extend(chosen)
-            used.update(chosen)
+            used[chosen] = True
+            picks.extend(str(x) for x in catalog.food_names[chosen])
         result[meal] = picks
 
     return result
 
+def recommend_diet(
+    excel_path: str,
+    recent_3days: Optional[List[str]]=None,
+    allergies: Optional[List[str]]=None,
+    restrictions: Optional[List[str]]=None,
+    random_seed: int = 42
+) -> Dict[str, List[str]]:
+    rng = np.random.default_rng(random_seed)
+    # 프로세스 공용 캐시 (파일이 바뀐 경우에만 다시 파싱)
+    catalog = get_food_catalog(excel_path)
+    df = catalog.df
+    
+    # --- 기존 필터링 (최근 3일, 알러지, 기피) 적용 ---
+    keep = _exclude_recent_and_dislikes(df, recent_3days or [], restrictions or [], catalog.name_matcher)
+    keep &= _exclude_allergies(df, allergies or [], catalog.allergy_mask)
+
+    # --- 끼니별 추천 ---
+    return _pick_diet(catalog, keep.to_numpy(dtype=bool), rng)
+
+def recommend_diet_many(
+    excel_path: str,
+    users: List[Dict[str, Any]],
+    random_seed: Optional[int] = None
+) -> List[Dict[str, List[str]]]:
+    """
+    여러 사용자의 식단을 한 번에 추천 (야간 배치용)
+    
+    users: 사용자별 {'recent_3days', 'allergies', 'restrictions'} 딕셔너리 리스트
+    random_seed: 사용자마다 이 시드로 recommend_diet를 호출한 것과 같은 결과 (None이면 사용자별 무작위)
+    
+    알러지 필터는 (사용자 수 × 음식 수) 행렬에 대한 비트 연산 한 번으로 계산합니다.
+    """
+    catalog = get_food_catalog(excel_path)
+    if not users:
+        return []
+
+    user_masks = np.array(
+        [allergy_bitmask(_canon_allergies(u.get("allergies") or [])) for u in users],
+        dtype=np.int64,
+    )
+    keep = (catalog.allergy_mask[np.newaxis, :] & user_masks[:, np.newaxis]) == 0
+
+    matcher = catalog.name_matcher
+    results = []
+    for i, u in enumerate(users):
+        keep[i] &= ~_recent_and_dislike_drop_mask(matcher, u.get("recent_3days") or [], u.get("restrictions") or [])
+        results.append(_pick_diet(catalog, keep[i], np.random.default_rng(random_seed)))
+    return results
+
 
 def recommend_sleep(hours: float) -> str:
     if hours <= 4:
@@ -160,88 +223,20 @@ def _clip(a: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, a))
 
 
-def recommend_step(steps: List[int], target: int = 6000) -> Tuple[str, str]:
-    """
-    입력: 최근 7일 걸음수 리스트(정수). 길이가 7 미만이면 앞을 0으로 채움.
-    출력: (이번주 걸음수 평가, 내일의 목표 걸음수)
-         - 평가: 숫자 없이 '규칙성 + 목표 대비 수준 + 권고' 자연어 문장 1개
-         - 목표: '내일의 목표 걸음수: 7,000보' 형식 1개
-    규칙성 판단은 '변동성(CV) 기준'만 사용하고, 목표 대비 평가는 별도로 함.
-    """
-    if not steps:
-        raise ValueError("steps must be a non-empty list of integers.")
-    xs = [max(0, int(v)) for v in steps[-7:]]
-    n = len(xs)
-    if n <= 3:
-        today = xs[-1]
-        if today < target*0.5:
-            level = "매우 낮음"; eval_txt = "목표 걸음수 대비 크게 미달했습니다"; action = "더 많이 걸으세요"
-        elif today < target*0.85:
-            level = "낮음";     eval_txt = "목표 걸음수 대비 미비했습니다";       action = "조금 더 걸음을 늘려보세요"
-        elif today < target*1.1:
-            level = "적정";     eval_txt = "목표 범위에 근접했습니다";           action = "현재 수준을 유지해 보세요"
-        else:
-            level = "높음";     eval_txt = "목표를 잘 달성했습니다";             action = "무리하지 않도록 안정적으로 유지해 보세요"
-
-        # 내일 목표(500보 단위, 증량 상한 = 오늘 + min(10%, 1500))
-        propose = (
-            min(target, max(4000, int(round(today/500)*500 + 1000)))
-            if level in ("매우 낮음","낮음") else (7000 if level=="적정" else 8000)
-        )
-        cap_inc = min(int(today*0.10), 1500)
-        base = min(propose, int(today + cap_inc)) if today > 0 else propose
-        base = max(4000, min(10000, int(round(base/500)*500)))
-
-        eval_sentence = f"이번 주 데이터가 부족하여 오늘 기준으로 평가합니다. 오늘은 {eval_txt}. {action}."
-        target_step = f"{base}"
-        return eval_sentence, target_step
-
-    # 통계/지표
-
-    mean = sum(xs)/n
-    var  = sum((v-mean)**2 for v in xs)/n
-    std  = var**0.5
-    cv   = (std/(mean+1e-9)) if mean > 0 else 1.0
-    band_low, band_high = int(target*0.8), int(target*1.2)   # 목표 ±20% (목표 관련 보정에만 활용)
-    within_band = sum(1 for v in xs if band_low <= v <= band_high)
-    avg3d = sum(xs[-3:])/3 if n >= 3 else mean
+# === 걸음수 평가 라벨 / 문장 템플릿 ===
+STEP_LEVELS = ["매우 낮음", "낮음", "적정", "높음"]
+STEP_REGULARITY = ["매우 규칙적", "규칙적", "다소 불규칙", "불규칙"]
 
-    # --- 목표 대비 수준 라벨 ---
-    if mean < target*0.5:      level = "매우 낮음"
-    elif mean < target*0.85:   level = "낮음"
-    elif mean < target*1.1:    level = "적정"
-    else:                      level = "높음"
-
-    # --- 규칙성 라벨(★ CV만으로 판단) ---
-    # 매우 규칙적: CV ≤ 0.15 / 규칙적: CV ≤ 0.30 / 다소 불규칙: CV ≤ 0.50 / 불규칙: 그 외
-    if cv <= 0.15:             reg = "매우 규칙적"
-    elif cv <= 0.30:           reg = "규칙적"
-    elif cv <= 0.50:           reg = "다소 불규칙"
-    else:                      reg = "불규칙"
-
-    # --- 내일 목표 산정(500보 단위, 안전 상한: 최근3일평균 + min(10%, 1500)) ---
-    if level in ("매우 낮음", "낮음"):
-        base = min(target, max(4000, int(round(avg3d/500)*500 + 1000)))
-    elif level == "적정":
-        base = 7000
-    else:  # 높음
-        base = 8000
-
-    # 규칙성 나쁠 때 과도한 목표 방지
-    if reg in ("불규칙", "다소 불규칙"):
-        base = max(5500, min(7500, base))
-    # 목표 밴드에 거의 못 들어간 주는 상한 7천으로
-    if within_band < 3:
-        base = min(base, 7000)
-
-    # 증량 상한
-    if avg3d > 0:
-        cap_inc = min(int(avg3d * 0.10), 1500)
-        base = min(base, int(avg3d + cap_inc))
-
-    # 범위/반올림
-    base = max(4000, min(10000, base))
-    base = int(round(base/500)*500)
+def _step_eval_sentence(level: str, reg: Optional[str]) -> str:
+    """(목표 대비 수준, 규칙성) -> 평가 문장. reg가 None이면 데이터 부족(3일 이하) 문장"""
+    if reg is None:
+        eval_txt, action = {
+            "매우 낮음": ("목표 걸음수 대비 크게 미달했습니다", "더 많이 걸으세요"),
+            "낮음": ("목표 걸음수 대비 미비했습니다", "조금 더 걸음을 늘려보세요"),
+            "적정": ("목표 범위에 근접했습니다", "현재 수준을 유지해 보세요"),
+            "높음": ("목표를 잘 달성했습니다", "무리하지 않도록 안정적으로 유지해 보세요"),
+        }[level]
+        return f"이번 주 데이터가 부족하여 오늘 기준으로 평가합니다. 오늘은 {eval_txt}. {action}."
 
     # --- 자연어 문장 (대조 + 맞춤 마무리) ---
     reg_bad = reg in ("불규칙", "다소 불규칙")
@@ -282,12 +277,145 @@ def recommend_step(steps: List[int], target: int = 6000) -> Tuple[str, str]:
         closing = action_phrase_default
 
     if reg_bad and level_good:
-        eval_sentence = f"이번 주는 {reg_phrase}. 하지만 {level_phrase_contrast.get(level, level_phrase_plain)}. {closing}."
+        return f"이번 주는 {reg_phrase}. 하지만 {level_phrase_contrast.get(level, level_phrase_plain)}. {closing}."
     elif (not reg_bad) and level_bad:
-        eval_sentence = f"이번 주는 {reg_phrase}. 하지만 {level_phrase_plain}. {closing}."
+        return f"이번 주는 {reg_phrase}. 하지만 {level_phrase_plain}. {closing}."
     else:
-        eval_sentence = f"이번 주는 {reg_phrase}. 또한 {level_phrase_plain}. {closing}."
+        return f"이번 주는 {reg_phrase}. 또한 {level_phrase_plain}. {closing}."
+
+# 템플릿 ID: 0~3 = 데이터 부족(수준별), 4 + 규칙성*4 + 수준 = 주간 평가
+STEP_EVAL_TEMPLATES = (
+    [_step_eval_sentence(level, None) for level in STEP_LEVELS]
+    + [_step_eval_sentence(level, reg) for reg in STEP_REGULARITY for level in STEP_LEVELS]
+)
+
+def _round500(x: np.ndarray) -> np.ndarray:
+    # Python round()와 같은 half-to-even 반올림 후 500 단위
+    return np.round(x / 500) * 500
+
+def recommend_step_many(
+    steps: np.ndarray,
+    target: int = 6000,
+    lengths: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    여러 사용자의 걸음수 평가/목표를 한 번에 계산 (recommend_step의 벡터화 버전)
 
-    target_step = f"{base}"
-    return eval_sentence, target_step
+    입력:
+        steps: (사용자 수 × 7) 걸음수 행렬. 각 행은 앞에서부터 lengths[i]개가 유효(오래된 날 → 최근 날)
+        lengths: 행별 유효 일수 (1~7). 없으면 모두 7
+    출력 (모두 길이 N 배열):
+        level: 목표 대비 수준 라벨, regularity: 규칙성 라벨(3일 이하는 None),
+        target: 내일의 목표 걸음수(int), template_id: STEP_EVAL_TEMPLATES 인덱스
 
+    규칙과 부동소수점 연산 순서는 recommend_step과 동일하므로 결과가 정확히 일치합니다.
+    """
+    xs = np.maximum(np.asarray(steps, dtype=np.int64).reshape(-1, 7), 0)
+    count = xs.shape[0]
+    n = np.full(count, 7, dtype=np.int64) if lengths is None else np.asarray(lengths, dtype=np.int64)
+    if count and (n.min() < 1 or n.max() > 7):
+        raise ValueError("lengths must be between 1 and 7.")
+
+    rows = np.arange(count)
+    valid = np.arange(7)[np.newaxis, :] < n[:, np.newaxis]
+    xs = np.where(valid, xs, 0)
+    short = n <= 3
+
+    # --- 데이터 부족(3일 이하): 오늘 기준 ---
+    today = xs[rows, n - 1].astype(np.float64)
+
+    # --- 주간 통계/지표 ---
+    nf = n.astype(np.float64)
+    mean = xs.sum(axis=1) / nf
+    var = np.where(valid, (xs - mean[:, np.newaxis]) ** 2, 0.0).sum(axis=1) / nf
+    std = var ** 0.5
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(mean > 0, std / (mean + 1e-9), 1.0)
+    band_low, band_high = int(target*0.8), int(target*1.2)   # 목표 ±20% (목표 관련 보정에만 활용)
+    within_band = (valid & (xs >= band_low) & (xs <= band_high)).sum(axis=1)
+    last3 = xs[rows[:, np.newaxis], np.clip(n[:, np.newaxis] - 3 + np.arange(3), 0, 6)]
+    avg3d = last3.sum(axis=1) / 3
+
+    # --- 목표 대비 수준 라벨 (데이터 부족이면 오늘, 아니면 주간 평균 기준) ---
+    basis = np.where(short, today, mean)
+    level_idx = np.select(
+        [basis < target*0.5, basis < target*0.85, basis < target*1.1],
+        [0, 1, 2],
+        default=3,
+    )
+    level_low = level_idx <= 1
+
+    # --- 규칙성 라벨(★ CV만으로 판단) ---
+    reg_idx = np.select([cv <= 0.15, cv <= 0.30, cv <= 0.50], [0, 1, 2], default=3)
+    reg_bad = reg_idx >= 2
+
+    # --- 내일 목표 산정 ---
+    # 데이터 부족: 500보 단위, 증량 상한 = 오늘 + min(10%, 1500)
+    propose = np.where(
+        level_low,
+        np.minimum(target, np.maximum(4000, np.trunc(_round500(today) + 1000))),
+        np.where(level_idx == 2, 7000, 8000),
+    )
+    cap_inc = np.minimum(np.trunc(today*0.10), 1500)
+    short_base = np.where(today > 0, np.minimum(propose, np.trunc(today + cap_inc)), propose)
+    short_base = np.maximum(4000, np.minimum(10000, np.trunc(_round500(short_base))))
+
+    # 주간: 500보 단위, 안전 상한 = 최근3일평균 + min(10%, 1500)
+    base = np.where(
+        level_low,
+        np.minimum(target, np.maximum(4000, np.trunc(_round500(avg3d) + 1000))),
+        np.where(level_idx == 2, 7000, 8000),
+    )
+    # 규칙성 나쁠 때 과도한 목표 방지
+    base = np.where(reg_bad, np.maximum(5500, np.minimum(7500, base)), base)
+    # 목표 밴드에 거의 못 들어간 주는 상한 7천으로
+    base = np.where(within_band < 3, np.minimum(base, 7000), base)
+    # 증량 상한
+    cap_inc = np.minimum(np.trunc(avg3d * 0.10), 1500)
+    base = np.where(avg3d > 0, np.minimum(base, np.trunc(avg3d + cap_inc)), base)
+    # 범위/반올림
+    base = np.maximum(4000, np.minimum(10000, base))
+    base = np.trunc(_round500(base))
+
+    level_labels = np.array(STEP_LEVELS, dtype=object)[level_idx]
+    reg_labels = np.where(short, None, np.array(STEP_REGULARITY, dtype=object)[reg_idx])
+    return {
+        "level": level_labels,
+        "regularity": reg_labels,
+        "target": np.where(short, short_base, base).astype(np.int64),
+        "template_id": np.where(short, level_idx, 4 + reg_idx * 4 + level_idx),
+    }
+
+
+def recommend_step_lists(step_lists: List[List[int]], target: int = 6000) -> List[Tuple[str, str]]:
+    """
+    사용자별 걸음수 리스트 여러 개를 (N × 7) 행렬로 묶어 recommend_step_many로 한 번에 평가
+    반환: 사용자 순서대로 recommend_step과 같은 (평가 문장, 목표 걸음수) 튜플 리스트
+    """
+    if any(not steps for steps in step_lists):
+        raise ValueError("steps must be a non-empty list of integers.")
+    matrix = np.zeros((len(step_lists), 7), dtype=np.int64)
+    lengths = np.zeros(len(step_lists), dtype=np.int64)
+    for i, steps in enumerate(step_lists):
+        xs = [max(0, int(v)) for v in steps[-7:]]
+        matrix[i, :len(xs)] = xs
+        lengths[i] = len(xs)
+    out = recommend_step_many(matrix, target=target, lengths=lengths)
+    return [
+        (STEP_EVAL_TEMPLATES[int(tid)], f"{int(goal)}")
+        for tid, goal in zip(out["template_id"], out["target"])
+    ]
+
+
+def recommend_step(steps: List[int], target: int = 6000) -> Tuple[str, str]:
+    """
+    입력: 최근 7일 걸음수 리스트(정수). 길이가 7 미만이면 앞을 0으로 채움.
+    출력: (이번주 걸음수 평가, 내일의 목표 걸음수)
+         - 평가: 숫자 없이 '규칙성 + 목표 대비 수준 + 권고' 자연어 문장 1개
+         - 목표: '내일의 목표 걸음수: 7,000보' 형식 1개
+    규칙성 판단은 '변동성(CV) 기준'만 사용하고, 목표 대비 평가는 별도로 함.
+    계산은 recommend_step_lists / recommend_step_many에 위임합니다.
+    """
+    if not steps:
+        raise ValueError("steps must be a non-empty list of integers.")
+    return recommend_step_lists([steps], target=target)[0]
@@ -0,0 +1,31 @@
+"""
+모델 시그널 핸들러 (IbsafeConfig.ready에서 등록)
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .food_search import bump_catalog_version, sync_category_search_entries, sync_food_search_entry
+from .models import Food, FoodCategory
+
+
+@receiver(post_save, sender=Food)
+def _sync_food_search_entry(sender, instance, raw=False, **kwargs):
+    # loaddata(raw=True)로 적재하는 경우는 rebuild_food_search로 재구성
+    if raw:
+        return
+    sync_food_search_entry(instance)
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_delete, sender=Food)
+def _invalidate_food_search_cache(sender, instance, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=FoodCategory)
+def _sync_category_search_entries(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    sync_category_search_entries(instance)
+    transaction.on_commit(bump_catalog_version)
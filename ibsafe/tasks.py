@@ -1,94 +1,100 @@
-import os
-import sys
-import django
 from datetime import datetime, timedelta
 from celery import shared_task
 from django.contrib.auth.models import User
 from django.utils import timezone
 import pytz
 from .models import (
-    UserProfile, UserSleepRecord, UserFoodRecord, UserWaterRecord, 
-    UserExerciseRecord, IBSSSSRecord, IBSQOLRecord, PSSStressRecord,
+    UserProfile, UserSleepRecord, UserWaterRecord, 
+    IBSSSSRecord, IBSQOLRecord, PSSStressRecord,
     InterventionRecord, BatchSchedule
 )
 
-# Django 설정 로드
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
-django.setup()
+# LLM 모드 상주 추론 워커 (worker_ready 시그널 등록)
+from .inference_worker import get_inference_queue, warm_inference_resources
 
+# Django 부트스트랩(django.setup)은 진입점(manage.py, backend.celery, intervention_batch CLI)에서만 수행합니다.
 
-@shared_task
-def run_intervention_batch():
+
+def _split_eligible_users(users, record_date):
     """
-    모든 사용자에 대해 배치로 중재 권고사항을 생성하는 태스크
+    record_date에 필수 기록(음식, 운동)이 모두 있는 사용자만 골라 반환
+    
+    Returns:
+        tuple: (eligible_users, skipped_count)
     """
-    print("=== 배치 중재 작업 시작 ===")
+    from .intervention import get_record_user_ids
     
-    # 활성화된 스케줄 확인
-    active_schedules = BatchSchedule.objects.filter(is_active=True)
-    if not active_schedules.exists():
-        print("활성화된 배치 스케줄이 없습니다.")
-        return
+    # 필수 기록이 있는 사용자 집합을 한 번에 조회
+    food_user_ids, exercise_user_ids = get_record_user_ids(record_date)
     
-    # 어제 날짜 계산 (한국 시간 기준)
-    korea_tz = pytz.timezone('Asia/Seoul')
-    korea_now = timezone.now().astimezone(korea_tz)
-    yesterday = korea_now.date() - timedelta(days=1)
-    print(f"처리 대상 날짜: {yesterday}")
+    eligible_users = []
+    skipped_count = 0
+    for user in users:
+        has_food = user.id in food_user_ids
+        has_exercise = user.id in exercise_user_ids
+        
+        if not (has_food and has_exercise):
+            missing_records = []
+            if not has_food:
+                missing_records.append("음식")
+            if not has_exercise:
+                missing_records.append("운동")
+            
+            print(f"사용자 {user.username}: 필수 기록 누락 - {', '.join(missing_records)}")
+            skipped_count += 1
+            continue
+        
+        eligible_users.append(user)
+    
+    return eligible_users, skipped_count
+
+
+def _delete_existing_interventions(user_ids, record_date):
+    """
+    대상 사용자들의 기존 중재 기록(gubun='all')을 일괄 삭제
+    """
+    deleted_count, _ = InterventionRecord.objects.filter(
+        user_id__in=user_ids,
+        record_date=record_date,
+        gubun='all'
+    ).delete()
+    if deleted_count:
+        print(f"기존 중재 기록 {deleted_count}건을 삭제합니다.")
+
+
+def _process_intervention_users(users, record_date, mode='RULE'):
+    """
+    사용자 목록의 입력 데이터를 일괄 조회한 뒤 사용자별 중재 권고사항을 생성
+    
+    Returns:
+        tuple: (processed_count, error_count)
+    """
+    from .intervention import (
+        prefetch_intervention_bundles, prepare_rule_recommendations, process_user_intervention
+    )
     
-    # 모든 사용자 조회
-    users = User.objects.all()
     processed_count = 0
     error_count = 0
     
+    # 음식 3일치, 걸음수 7일치를 대상 사용자 전체에 대해 일괄 조회
+    bundles = prefetch_intervention_bundles(users, record_date)
+    
+    # RULE 모드는 식단 추천을 대상 사용자 전체에 대해 한 번에 계산
+    if mode == 'RULE':
+        prepare_rule_recommendations(users, bundles)
+    
     for user in users:
         try:
             print(f"사용자 {user.username} 처리 중...")
             
-            # 해당 사용자의 어제 날짜 필수 기록들 확인 (음식, 운동만)
-            has_food = UserFoodRecord.objects.filter(
-                user=user, 
-                record_date=yesterday
-            ).exists()
-            
-            has_exercise = UserExerciseRecord.objects.filter(
-                user=user, 
-                record_date=yesterday
-            ).exists()
-            
-            # 필수 기록이 있는지 확인 (음식, 운동)
-            required_records = [has_food, has_exercise]
-            
-            if not all(required_records):
-                missing_records = []
-                if not has_food:
-                    missing_records.append("음식")
-                if not has_exercise:
-                    missing_records.append("운동")
-                
-                print(f"사용자 {user.username}: 필수 기록 누락 - {', '.join(missing_records)}")
-                continue
-            
-            # 이미 중재 기록이 있는지 확인하고 삭제
-            existing_intervention = InterventionRecord.objects.filter(
-                user=user,
-                record_date=yesterday
-            ).first()
-            
-            if existing_intervention:
-                print(f"사용자 {user.username}: 기존 중재 기록을 삭제합니다.")
-                existing_intervention.delete()
-            
             # 중재 권고사항 생성
             print(f"사용자 {user.username}: 중재 권고사항 생성 시작")
             
-            # intervention.py의 통합 함수 사용
-            from .intervention import process_user_intervention
-            
             success, processing_time, error_message = process_user_intervention(
                 user=user,
-                record_date=yesterday,
-                mode='RULE'  # 또는 'LLM'
+                record_date=record_date,
+                mode=mode,
+                prefetched=bundles[user.id]
             )
             
             if success:
@@ -102,10 +108,188 @@ def run_intervention_batch():
             print(f"사용자 {user.username} 처리 중 오류: {str(e)}")
             error_count += 1
     
+    return processed_count, error_count
+
+
+def _get_batch_record_date():
+    """
+    배치 처리 대상 날짜(어제, 한국 시간 기준) 반환
+    """
+    korea_tz = pytz.timezone('Asia/Seoul')
+    korea_now = timezone.now().astimezone(korea_tz)
+    return korea_now.date() - timedelta(days=1)
+
+
+def _partition_shards(user_ids, shard_size):
+    """
+    사용자 ID를 정렬한 뒤 shard_size 단위의 ID 범위로 분할
+    """
+    user_ids = sorted(user_ids)
+    shard_size = max(1, shard_size)
+    return [user_ids[i:i + shard_size] for i in range(0, len(user_ids), shard_size)]
+
+
+def _assign_lanes(shards, shard_concurrency):
+    """
+    샤드를 최대 shard_concurrency개의 레인에 라운드로빈으로 배정 (레인 간 샤드 수 차이는 최대 1)
+    """
+    lane_count = max(1, min(shard_concurrency, len(shards)))
+    return [shards[lane_index::lane_count] for lane_index in range(lane_count)]
+
+
+@shared_task
+def run_intervention_batch():
+    """
+    모든 사용자에 대해 배치로 중재 권고사항을 생성하는 태스크
+    """
+    print("=== 배치 중재 작업 시작 ===")
+    
+    # 활성화된 스케줄 확인
+    active_schedules = BatchSchedule.objects.filter(is_active=True)
+    if not active_schedules.exists():
+        print("활성화된 배치 스케줄이 없습니다.")
+        return
+    
+    # 어제 날짜 계산 (한국 시간 기준)
+    yesterday = _get_batch_record_date()
+    print(f"처리 대상 날짜: {yesterday}")
+    
+    # 모든 사용자 조회 (프로필 함께 조회)
+    users = list(User.objects.select_related('profile').order_by('id'))
+    
+    eligible_users, skipped_count = _split_eligible_users(users, yesterday)
+    print(f"처리 대상 사용자: {len(eligible_users)}명")
+    
+    # 이미 중재 기록이 있으면 일괄 삭제
+    _delete_existing_interventions([user.id for user in eligible_users], yesterday)
+    
+    processed_count, error_count = _process_intervention_users(
+        eligible_users, yesterday, mode='RULE'  # 또는 'LLM'
+    )
+    
     print(f"=== 배치 중재 작업 완료 ===")
     print(f"처리된 사용자: {processed_count}명")
     print(f"오류 발생: {error_count}명")
-    print(f"총 사용자: {users.count()}명")
+    print(f"총 사용자: {len(users)}명")
+
+
+@shared_task
+def run_intervention_batch_sharded(schedule_id=None, mode='RULE'):
+    """
+    중재 배치를 샤드 단위로 여러 워커에 분산 실행하는 코디네이터 태스크
+    
+    대상 사용자를 ID 범위 샤드로 나누고, shard_concurrency개의 레인(chain)에
+    라운드로빈으로 배정한 뒤 chord로 실행합니다. 각 레인 안의 샤드는 순서대로
+    실행되므로 동시에 실행되는 샤드 수는 shard_concurrency를 넘지 않습니다.
+    최종 집계는 summary_task_id의 결과로 조회할 수 있습니다.
+    
+    mode='LLM'이면 샤드를 추론 큐로 보내 모델이 미리 로드된 상주 추론 워커에서 실행합니다.
+    """
+    from celery import chain, chord
+    
+    print("=== 샤딩 배치 중재 작업 시작 ===")
+    
+    # 활성화된 스케줄 확인
+    active_schedules = BatchSchedule.objects.filter(is_active=True)
+    if schedule_id is not None:
+        active_schedules = active_schedules.filter(id=schedule_id)
+    schedule = active_schedules.order_by('id').first()
+    if schedule is None:
+        print("활성화된 배치 스케줄이 없습니다.")
+        return
+    
+    yesterday = _get_batch_record_date()
+    print(f"처리 대상 날짜: {yesterday}")
+    
+    users = list(User.objects.order_by('id'))
+    eligible_users, skipped_count = _split_eligible_users(users, yesterday)
+    eligible_user_ids = [user.id for user in eligible_users]
+    
+    # 이미 중재 기록이 있으면 일괄 삭제
+    _delete_existing_interventions(eligible_user_ids, yesterday)
+    
+    shards = _partition_shards(eligible_user_ids, schedule.shard_size)
+    lane_shards_list = _assign_lanes(shards, schedule.shard_concurrency)
+    lane_count = len(lane_shards_list)
+    print(f"처리 대상 사용자: {len(eligible_user_ids)}명 / 샤드: {len(shards)}개 / 동시 실행: {lane_count}")
+    
+    record_date_str = yesterday.isoformat()
+    summary_args = (record_date_str, skipped_count, len(users))
+    
+    if not shards:
+        return summarize_intervention_shards([], *summary_args)
+    
+    # 레인별 샤드를 순서대로 실행하는 chain으로 묶음
+    lanes = []
+    shard_options = {'queue': get_inference_queue()} if mode == 'LLM' else {}
+    for lane_shards in lane_shards_list:
+        signatures = [run_intervention_shard.s(None, lane_shards[0], record_date_str, mode=mode)]
+        signatures += [run_intervention_shard.s(shard, record_date_str, mode=mode) for shard in lane_shards[1:]]
+        lanes.append(chain(*[signature.set(**shard_options) for signature in signatures]))
+    
+    summary_result = chord(lanes)(summarize_intervention_shards.s(*summary_args))
+    
+    return {
+        'record_date': record_date_str,
+        'summary_task_id': summary_result.id,
+        'shard_count': len(shards),
+        'shard_concurrency': lane_count,
+        'eligible_users': len(eligible_user_ids),
+        'mode': mode,
+    }
+
+
+@shared_task
+def run_intervention_shard(previous, user_ids, record_date_str, mode='RULE'):
+    """
+    샤드 하나(사용자 ID 목록)에 대한 중재 권고사항을 생성하는 태스크
+    
+    같은 레인의 이전 샤드 결과(previous)에 이번 샤드의 처리 건수를 더해 반환합니다.
+    """
+    record_date = datetime.strptime(record_date_str, '%Y-%m-%d').date()
+    counts = dict(previous or {'processed': 0, 'error': 0, 'shards': 0})
+    
+    if mode == 'LLM':
+        # 상주 추론 워커에서는 이미 로드되어 바로 반환 (프로세스당 한 번만 로드)
+        warm_inference_resources()
+    
+    print(f"=== 샤드 처리 시작: 사용자 {len(user_ids)}명 ({min(user_ids)}~{max(user_ids)}) ===")
+    
+    users = list(User.objects.select_related('profile').filter(id__in=user_ids).order_by('id'))
+    processed_count, error_count = _process_intervention_users(users, record_date, mode=mode)
+    
+    # 샤드 분배 이후 삭제된 사용자는 오류로 집계
+    error_count += len(user_ids) - len(users)
+    
+    counts['processed'] += processed_count
+    counts['error'] += error_count
+    counts['shards'] += 1
+    return counts
+
+
+@shared_task
+def summarize_intervention_shards(lane_results, record_date_str, skipped_count, total_users):
+    """
+    레인별 샤드 처리 결과를 합산하여 최종 배치 결과를 반환하는 태스크
+    """
+    processed_count = sum(result['processed'] for result in lane_results)
+    error_count = sum(result['error'] for result in lane_results)
+    shard_count = sum(result['shards'] for result in lane_results)
+    
+    print("=== 샤딩 배치 중재 작업 완료 ===")
+    print(f"처리된 사용자: {processed_count}명")
+    print(f"오류 발생: {error_count}명")
+    print(f"건너뛴 사용자: {skipped_count}명")
+    print(f"총 사용자: {total_users}명")
+    
+    return {
+        'record_date': record_date_str,
+        'processed': processed_count,
+        'error': error_count,
+        'skipped': skipped_count,
+        'total_users': total_users,
+        'shards': shard_count,
+    }
 
 
 @shared_task
@@ -211,3 +395,25 @@ def create_default_batch_schedule():
             print("이미 배치 스케줄이 존재합니다.")
     except Exception as e:
         print(f"기본 배치 스케줄 생성 중 오류: {str(e)}")
+
+
+@shared_task
+def warm_food_search_cache_task(limit=200):
+    """
+    자주 검색된 접두어의 음식 검색 결과를 미리 계산하는 태스크
+    (FOOD_SEARCH_CACHE_REDIS_URL 설정 시 공유 캐시에 저장되어 모든 웹 프로세스가 사용)
+    """
+    from .food_search import warm_food_search_cache
+    
+    prefixes = warm_food_search_cache(limit=limit)
+    return {'warmed': len(prefixes)}
+
+
+@shared_task
+def refresh_food_usage_stats_task():
+    """
+    음식 검색 인기순 정렬용 사용 통계(전체/사용자별 최근 기록 수)를 갱신하는 태스크
+    """
+    from .food_search import refresh_food_usage_stats
+    
+    return refresh_food_usage_stats()
@@ -1,3 +1,722 @@
-from django.test import TestCase
+import os
+import random
+import subprocess
+import sys
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from . import food_autocomplete, food_search, intervention, tasks
+from .food_autocomplete import FoodAutocompleteIndex, decompose_jamo, extract_choseong
+from django.contrib.auth.models import User
+
+from .models import (
+    BatchSchedule, CatalogVersion, Food, FoodCategory, FoodSearchEntry, InterventionRecord, MedicationRecord,
+    UserExerciseRecord, UserFoodRecord, UserFoodUsage, UserProfile, UserWaterRecord,
+)
+from .rule import (
+    STEP_EVAL_TEMPLATES, STEP_LEVELS, recommend_step, recommend_step_lists, recommend_step_many,
+)
+
+
+# 벡터화 이전 recommend_step 원본 (패리티 기준)
+def _reference_recommend_step(steps, target=6000):
+    """
+    입력: 최근 7일 걸음수 리스트(정수). 길이가 7 미만이면 앞을 0으로 채움.
+    출력: (이번주 걸음수 평가, 내일의 목표 걸음수)
+         - 평가: 숫자 없이 '규칙성 + 목표 대비 수준 + 권고' 자연어 문장 1개
+         - 목표: '내일의 목표 걸음수: 7,000보' 형식 1개
+    규칙성 판단은 '변동성(CV) 기준'만 사용하고, 목표 대비 평가는 별도로 함.
+    """
+    if not steps:
+        raise ValueError("steps must be a non-empty list of integers.")
+    xs = [max(0, int(v)) for v in steps[-7:]]
+    n = len(xs)
+    if n <= 3:
+        today = xs[-1]
+        if today < target*0.5:
+            level = "매우 낮음"; eval_txt = "목표 걸음수 대비 크게 미달했습니다"; action = "더 많이 걸으세요"
+        elif today < target*0.85:
+            level = "낮음";     eval_txt = "목표 걸음수 대비 미비했습니다";       action = "조금 더 걸음을 늘려보세요"
+        elif today < target*1.1:
+            level = "적정";     eval_txt = "목표 범위에 근접했습니다";           action = "현재 수준을 유지해 보세요"
+        else:
+            level = "높음";     eval_txt = "목표를 잘 달성했습니다";             action = "무리하지 않도록 안정적으로 유지해 보세요"
+
+        # 내일 목표(500보 단위, 증량 상한 = 오늘 + min(10%, 1500))
+        propose = (
+            min(target, max(4000, int(round(today/500)*500 + 1000)))
+            if level in ("매우 낮음","낮음") else (7000 if level=="적정" else 8000)
+        )
+        cap_inc = min(int(today*0.10), 1500)
+        base = min(propose, int(today + cap_inc)) if today > 0 else propose
+        base = max(4000, min(10000, int(round(base/500)*500)))
+
+        eval_sentence = f"이번 주 데이터가 부족하여 오늘 기준으로 평가합니다. 오늘은 {eval_txt}. {action}."
+        target_step = f"{base}"
+        return eval_sentence, target_step
+
+    # 통계/지표
+
+    mean = sum(xs)/n
+    var  = sum((v-mean)**2 for v in xs)/n
+    std  = var**0.5
+    cv   = (std/(mean+1e-9)) if mean > 0 else 1.0
+    band_low, band_high = int(target*0.8), int(target*1.2)   # 목표 ±20% (목표 관련 보정에만 활용)
+    within_band = sum(1 for v in xs if band_low <= v <= band_high)
+    avg3d = sum(xs[-3:])/3 if n >= 3 else mean
+
+    # --- 목표 대비 수준 라벨 ---
+    if mean < target*0.5:      level = "매우 낮음"
+    elif mean < target*0.85:   level = "낮음"
+    elif mean < target*1.1:    level = "적정"
+    else:                      level = "높음"
+
+    # --- 규칙성 라벨(★ CV만으로 판단) ---
+    # 매우 규칙적: CV ≤ 0.15 / 규칙적: CV ≤ 0.30 / 다소 불규칙: CV ≤ 0.50 / 불규칙: 그 외
+    if cv <= 0.15:             reg = "매우 규칙적"
+    elif cv <= 0.30:           reg = "규칙적"
+    elif cv <= 0.50:           reg = "다소 불규칙"
+    else:                      reg = "불규칙"
+
+    # --- 내일 목표 산정(500보 단위, 안전 상한: 최근3일평균 + min(10%, 1500)) ---
+    if level in ("매우 낮음", "낮음"):
+        base = min(target, max(4000, int(round(avg3d/500)*500 + 1000)))
+    elif level == "적정":
+        base = 7000
+    else:  # 높음
+        base = 8000
+
+    # 규칙성 나쁠 때 과도한 목표 방지
+    if reg in ("불규칙", "다소 불규칙"):
+        base = max(5500, min(7500, base))
+    # 목표 밴드에 거의 못 들어간 주는 상한 7천으로
+    if within_band < 3:
+        base = min(base, 7000)
+
+    # 증량 상한
+    if avg3d > 0:
+        cap_inc = min(int(avg3d * 0.10), 1500)
+        base = min(base, int(avg3d + cap_inc))
+
+    # 범위/반올림
+    base = max(4000, min(10000, base))
+    base = int(round(base/500)*500)
+
+    # --- 자연어 문장 (대조 + 맞춤 마무리) ---
+    reg_bad = reg in ("불규칙", "다소 불규칙")
+    level_good = level in ("적정", "높음")
+    level_bad  = level in ("매우 낮음", "낮음")
+
+    reg_phrase = {
+        "매우 규칙적": "매우 규칙적입니다",
+        "규칙적": "규칙적입니다",
+        "다소 불규칙": "규칙적이지 못했습니다",
+        "불규칙": "규칙적이지 못했습니다",
+    }[reg]
+
+    level_phrase_plain = {
+        "매우 낮음": "목표 걸음수 대비 크게 미달합니다",
+        "낮음": "목표 걸음수 대비 미비합니다",
+        "적정": "목표 범위에 근접합니다",
+        "높음": "목표를 잘 달성했습니다",
+    }[level]
+    level_phrase_contrast = {
+        "적정": "평균적으로 목표 범위에는 근접했습니다",
+        "높음": "평균적으로 목표를 잘 달성했습니다",
+    }
+
+    action_phrase_default = {
+        "매우 낮음": "더 많이 걸으셔야 합니다",
+        "낮음": "조금 더 걸음을 늘려보세요",
+        "적정": "현재 수준을 유지해 보세요",
+        "높음": "무리하지 않도록 안정적으로 유지해 보세요",
+    }[level]
+
+    # 규칙성 나쁠 때 마무리 문구
+    if reg_bad and level_good:
+        closing = "꾸준하게 걸으세요"
+    elif reg_bad and level_bad:
+        closing = "더 많이 꾸준하게 걸으세요"
+    else:
+        closing = action_phrase_default
+
+    if reg_bad and level_good:
+        eval_sentence = f"이번 주는 {reg_phrase}. 하지만 {level_phrase_contrast.get(level, level_phrase_plain)}. {closing}."
+    elif (not reg_bad) and level_bad:
+        eval_sentence = f"이번 주는 {reg_phrase}. 하지만 {level_phrase_plain}. {closing}."
+    else:
+        eval_sentence = f"이번 주는 {reg_phrase}. 또한 {level_phrase_plain}. {closing}."
+
+    target_step = f"{base}"
+    return eval_sentence, target_step
+
+
+class RecommendStepParityTest(SimpleTestCase):
+    """recommend_step_many / recommend_step이 원본 스칼라 규칙과 정확히 일치하는지 확인"""
+
+    def _random_steps(self, rng):
+        length = rng.randint(1, 9)
+        return [
+            rng.choice([0, -100, 3000, 4800, 6000, 7200, rng.randint(0, 15000), rng.randint(0, 30000)])
+            for _ in range(length)
+        ]
+
+    def test_scalar_wrapper_matches_reference(self):
+        rng = random.Random(20240601)
+        for _ in range(5000):
+            steps = self._random_steps(rng)
+            target = rng.choice([4000, 5000, 6000, 8000, 10000])
+            self.assertEqual(
+                recommend_step(steps, target),
+                _reference_recommend_step(steps, target),
+                msg=f"steps={steps}, target={target}",
+            )
+
+    def test_matrix_matches_reference(self):
+        rng = random.Random(7)
+        step_lists = [self._random_steps(rng) for _ in range(2000)]
+        expected = [_reference_recommend_step(steps) for steps in step_lists]
+        self.assertEqual(recommend_step_lists(step_lists), expected)
+
+        out = recommend_step_many(np.array([[6000] * 7, [0] * 7]))
+        self.assertEqual(list(out["level"]), ["적정", "매우 낮음"])
+        self.assertEqual(list(out["regularity"]), ["매우 규칙적", "불규칙"])
+        for tid, target, steps in zip(out["template_id"], out["target"], ([6000] * 7, [0] * 7)):
+            self.assertEqual((STEP_EVAL_TEMPLATES[tid], str(target)), _reference_recommend_step(steps))
+
+    def test_short_history_has_no_regularity(self):
+        out = recommend_step_many(np.array([[3000, 9000, 0, 0, 0, 0, 0]]), lengths=[2])
+        self.assertIsNone(out["regularity"][0])
+        self.assertIn(out["level"][0], STEP_LEVELS)
+
+    def test_empty_steps_raises(self):
+        with self.assertRaises(ValueError):
+            recommend_step([])
+
+
+class ImportTimeBudgetTest(SimpleTestCase):
+    """API/RULE 경로 모듈이 무거운 ML 라이브러리(torch 등)를 import 하지 않는지 확인"""
+
+    HEAVY_MODULES = ("torch", "faiss", "transformers", "sentence_transformers")
+
+    def _imported_modules(self, module):
+        # 새 인터프리터에서 python -X importtime 으로 import된 모듈 이름을 수집
+        code = f"import django; django.setup(); import {module}"
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+            timeout=300,
+        )
+        self.assertEqual(result.returncode, 0, msg=result.stderr[-2000:])
+        names = set()
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and line.count("|") == 2:
+                names.add(line.rsplit("|", 1)[1].strip())
+        return names
+
+    def assertNoHeavyImports(self, module):
+        names = self._imported_modules(module)
+        heavy = sorted(
+            name for name in names
+            if name.split(".")[0] in self.HEAVY_MODULES
+        )
+        self.assertEqual(heavy, [], msg=f"{module} imports heavy ML modules: {heavy[:10]}")
+
+    def test_views_does_not_import_torch(self):
+        self.assertNoHeavyImports("ibsafe.views")
+
+    def test_rule_batch_path_does_not_import_torch(self):
+        self.assertNoHeavyImports("ibsafe.tasks")
+
+
+class FoodAutocompleteIndexTest(SimpleTestCase):
+    """
+    자동완성 인덱스: 자모 접두어, 초성, n-gram 보조 검색, 인기순 정렬
+    """
+
+    def setUp(self):
+        names = ['김치볶음밥', '김치', '배추김치', '닭갈비', '쌀밥', '김치찌개_돼지고기']
+        entries = [{'food_pk': pk, 'id': f'F{pk}', 'name': name} for pk, name in enumerate(names)]
+        # 배추김치(2) > 김치찌개_돼지고기(5) 순으로 많이 기록됨, 나머지는 짧은 이름 순
+        self.index = FoodAutocompleteIndex(entries, popularity={2: 10, 5: 3})
+
+    def _names(self, query):
+        return [entry['name'] for entry in self.index.search(query)]
+
+    def test_decompose(self):
+        self.assertEqual(decompose_jamo('닭'), 'ㄷㅏㄹㄱ')
+        self.assertEqual(decompose_jamo('과'), 'ㄱㅗㅏ')
+        self.assertEqual(extract_choseong('김치볶음밥'), 'ㄱㅊㅂㅇㅂ')
+
+    def test_prefix_while_typing(self):
+        self.assertEqual(self._names('김ㅊ'), ['김치찌개_돼지고기', '김치', '김치볶음밥'])
+        self.assertEqual(self._names('달ㄱ'), ['닭갈비'])
+        # 단어 시작 위치부터도 접두어 검색
+        self.assertEqual(self._names('돼지'), ['김치찌개_돼지고기'])
+
+    def test_choseong(self):
+        self.assertEqual(self._names('ㄱㅊㅂ'), ['김치볶음밥'])
+        self.assertEqual(self._names('ㄱㅊ'), ['김치찌개_돼지고기', '김치', '김치볶음밥'])
+
+    def test_ngram_fallback_after_prefix_matches(self):
+        self.assertEqual(self._names('김치'), ['김치찌개_돼지고기', '김치', '김치볶음밥', '배추김치'])
+        self.assertEqual(self._names('밥'), ['쌀밥', '김치볶음밥'])
+        self.assertEqual(self._names('없는음식'), [])
+
+
+class FoodSearchCacheVersionTest(TestCase):
+    """
+    검색 캐시는 다른 프로세스가 올린 카탈로그 버전(DB 공유)을 보고 무효화되어야 함
+    """
+
+    def setUp(self):
+        category = FoodCategory.objects.create(main_category_code=1, main_category_name='밥류')
+        food = Food.objects.create(food_code='F1', food_name='쌀밥', category=category)
+        FoodSearchEntry.objects.update_or_create(
+            food=food,
+            defaults={'food_code': 'F1', 'food_name': '쌀밥', 'normalized_name': '쌀밥'},
+        )
+        food_search.clear_food_search_cache()
+        food_search._checked_version = None
+
+    def _expire_version_check(self):
+        # VERSION_CHECK_INTERVAL이 지난 것처럼 처리
+        food_search._checked_at = 0.0
+
+    def test_version_bumped_elsewhere_drops_cached_result(self):
+        self.assertEqual([r['name'] for r in food_search.search_foods_cached('쌀밥')], ['쌀밥'])
+
+        # 시그널 없이 데이터 변경 -> 같은 버전에서는 캐시된 결과 유지
+        FoodSearchEntry.objects.filter(food_code='F1').update(food_name='쌀밥(백미)')
+        self._expire_version_check()
+        self.assertEqual([r['name'] for r in food_search.search_foods_cached('쌀밥')], ['쌀밥'])
+
+        # 다른 프로세스가 버전을 올린 상황 (이 프로세스의 로컬 상태는 건드리지 않음)
+        CatalogVersion.objects.get_or_create(name=food_search.CATALOG_VERSION_NAME)
+        CatalogVersion.objects.filter(name=food_search.CATALOG_VERSION_NAME).update(version=F('version') + 1)
+        self._expire_version_check()
+        self.assertEqual([r['name'] for r in food_search.search_foods_cached('쌀밥')], ['쌀밥(백미)'])
+
+    @override_settings(FOOD_SEARCH_CACHE_REDIS_URL='')
+    def test_warmup_skipped_without_shared_cache(self):
+        food_search.record_search(food_search.make_search_key('쌀밥'))
+        with self.assertNumQueries(0):
+            self.assertEqual(food_search.warm_food_search_cache(), [])
+
+
+class FoodAutocompleteRefreshTest(TestCase):
+    """
+    자동완성 인덱스가 오래되면 요청 경로에서 다시 만들지 않고 기존 인덱스로 응답 (갱신은 백그라운드)
+    """
+
+    def setUp(self):
+        category = FoodCategory.objects.create(main_category_code=1, main_category_name='밥류')
+        food = Food.objects.create(food_code='F1', food_name='쌀밥', category=category)
+        FoodSearchEntry.objects.update_or_create(
+            food=food,
+            defaults={'food_code': 'F1', 'food_name': '쌀밥', 'normalized_name': '쌀밥'},
+        )
+        food_search._checked_version = None
+        food_autocomplete._index = None
+        self.addCleanup(setattr, food_autocomplete, '_index', None)
+
+    def test_stale_index_is_served_while_refreshing_in_background(self):
+        index = food_autocomplete.get_autocomplete_index()
+        index.built_at -= food_autocomplete.AUTOCOMPLETE_REFRESH_SECONDS
+        with mock.patch.object(food_autocomplete, 'refresh_autocomplete_index_async') as refresh:
+            self.assertIs(food_autocomplete.get_autocomplete_index(), index)
+            self.assertEqual([r['name'] for r in food_autocomplete.autocomplete_foods('쌀')], ['쌀밥'])
+        self.assertTrue(refresh.called)
+
+    def test_fresh_index_is_not_refreshed(self):
+        index = food_autocomplete.get_autocomplete_index()
+        with mock.patch.object(food_autocomplete, 'refresh_autocomplete_index_async') as refresh:
+            self.assertIs(food_autocomplete.get_autocomplete_index(), index)
+        refresh.assert_not_called()
+
+    def test_startup_warmup_only_in_marked_process(self):
+        with mock.patch.dict(os.environ, {food_autocomplete.AUTOCOMPLETE_WARM_ENV: '0'}):
+            self.assertFalse(food_autocomplete.warm_autocomplete_index_on_startup())
+
+
+class FoodSearchRankingTest(TestCase):
+    """
+    관련도 단계가 인기도보다 우선, 개인화 목록은 캐시되어 반복 검색 시 DB를 조회하지 않음
+    """
+
+    def setUp(self):
+        category = FoodCategory.objects.create(main_category_code=1, main_category_name='밥류')
+        for code, name, usage_count in [('F1', '쌀', 0), ('F2', '볶음쌀국수', 50), ('F3', '쌀국수', 5)]:
+            food = Food.objects.create(food_code=code, food_name=name, category=category)
+            FoodSearchEntry.objects.update_or_create(
+                food=food,
+                defaults={'food_code': code, 'food_name': name, 'normalized_name': name, 'usage_count': usage_count},
+            )
+        self.user = User.objects.create(username='ranking')
+        UserFoodUsage.objects.create(
+            user=self.user, food=Food.objects.get(food_code='F2'), record_count=3, last_record_date='2026-10-01'
+        )
+        food_search.clear_food_search_cache()
+        food_search._checked_version = None
+
+    def test_exact_match_ranks_above_popular_partial_match(self):
+        self.assertEqual(
+            [r['name'] for r in food_search.search_food_entries('쌀')],
+            ['쌀', '쌀국수', '볶음쌀국수']
+        )
+
+    def test_personalization_is_cached_per_user(self):
+        results = food_search.search_foods_cached('쌀')
+        self.assertEqual(
+            [r['name'] for r in food_search.personalize_results(self.user, '쌀', results)],
+            ['볶음쌀국수', '쌀', '쌀국수']
+        )
+        # 같은 검색어 반복 + 다른 검색어의 개인화: 검색 결과와 사용자 최근 음식 목록 모두 캐시 사용
+        with self.assertNumQueries(0):
+            results = food_search.search_foods_cached('쌀')
+            food_search.personalize_results(self.user, '쌀국', results)
+
+
+class RecordPaginationTest(TestCase):
+    """
+    기간별 조회 API 커서 페이지네이션: 커서로 전체 기간을 빠짐없이 순회, 잘못된 파라미터는 400
+    음식 기록은 날짜 경계에서 페이지를 끊어 한 날짜가 두 페이지로 나뉘지 않음
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username='pagination')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for day in range(1, 6):
+            UserWaterRecord.objects.create(
+                user=self.user, water_intake=250 * day, cup_count=day, record_date=f'2026-10-0{day}'
+            )
+        category = FoodCategory.objects.create(main_category_code=1, main_category_name='밥류')
+        foods = [Food.objects.create(food_code=f'F{i}', food_name=f'음식{i}', category=category) for i in range(3)]
+        # 10/1: 3건, 10/2: 3건, 10/3: 1건 (날짜 안에서 id 순서와 식사 순서가 다르도록 저녁부터 생성)
+        for record_date, count in [('2026-10-01', 3), ('2026-10-02', 3), ('2026-10-03', 1)]:
+            for food, meal_type in list(zip(foods, ['dinner', 'lunch', 'breakfast']))[:count]:
+                UserFoodRecord.objects.create(
+                    user=self.user, food=food, meal_type=meal_type, amount=100, record_date=record_date
+                )
+
+    def _get(self, name, **params):
+        params.setdefault('start_date', '2026-10-01')
+        params.setdefault('end_date', '2026-10-31')
+        return self.client.get(reverse(name), params)
+
+    def test_cursor_round_trip_visits_every_record_once(self):
+        dates = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            response = self._get('get_water_records', **params)
+            self.assertEqual(response.status_code, 200)
+            dates += [record['record_date'] for record in response.data['water_records']]
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(dates, [f'2026-10-0{day}' for day in range(1, 6)])
+
+    def test_last_page_has_no_next_cursor(self):
+        response = self._get('get_water_records', limit=5)
+        self.assertEqual(len(response.data['water_records']), 5)
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_invalid_limit_and_cursor_return_400(self):
+        for params in ({'limit': 'abc'}, {'limit': 0}, {'cursor': '!!!'}, {'cursor': 'bm90LWEtY3Vyc29y'}):
+            for name in ('get_water_records', 'get_food_records_by_date_range'):
+                self.assertEqual(self._get(name, **params).status_code, 400, (name, params))
+
+    def test_food_pages_end_on_date_boundary(self):
+        # limit=4 이면 4번째 기록의 날짜(10/2)까지 모두 포함
+        response = self._get('get_food_records_by_date_range', limit=4)
+        self.assertEqual(
+            [day['record_date'] for day in response.data['foodRecords']], ['2026-10-01', '2026-10-02']
+        )
+        meals = response.data['foodRecords'][1]['meal_records']
+        self.assertEqual({meal: len(records) for meal, records in meals.items()}, {'breakfast': 1, 'lunch': 1, 'dinner': 1})
+        self.assertIsNotNone(response.data['next_cursor'])
+
+        response = self._get('get_food_records_by_date_range', limit=4, cursor=response.data['next_cursor'])
+        self.assertEqual([day['record_date'] for day in response.data['foodRecords']], ['2026-10-03'])
+        self.assertIsNone(response.data['next_cursor'])
+
+
+    def test_medication_pages_keep_name_order_within_date(self):
+        # id 순서와 이름 순서가 다르도록 생성: 10/1에 다, 가, 나 / 10/2에 라
+        for name, record_date in [('다약', '2026-10-01'), ('가약', '2026-10-01'), ('나약', '2026-10-01'),
+                                  ('라약', '2026-10-02')]:
+            MedicationRecord.objects.create(user=self.user, medication_name=name, record_date=record_date)
+
+        names = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            response = self._get('get_medication_records_by_date_range', **params)
+            self.assertEqual(response.status_code, 200)
+            names.append([record['medication_name'] for record in response.data['medication_records']])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+        # 10/1의 기록은 limit을 넘어도 한 페이지에 이름 순으로
+        self.assertEqual(names, [['가약', '나약', '다약'], ['라약']])
+
+def _create_intervention_user(username, record_date, food):
+    """
+    record_date에 음식 기록과 7일치 걸음수 기록이 있는 중재 대상 사용자 생성
+    """
+    user = User.objects.create(username=username)
+    UserProfile.objects.create(user=user)
+    UserFoodRecord.objects.create(user=user, food=food, meal_type='lunch', amount=100, record_date=record_date)
+    for days_ago in range(7):
+        UserExerciseRecord.objects.create(
+            user=user, target_steps=6000, current_steps=5000 + days_ago * 100,
+            record_date=record_date - timedelta(days=days_ago)
+        )
+    return user
+
+
+class InterventionBatchIsolationTest(TestCase):
+    """
+    일괄 계산 단계에서 한 사용자의 데이터 오류가 배치 전체를 중단시키지 않음
+    """
+
+    def setUp(self):
+        self.record_date = date(2026, 10, 1)
+        category = FoodCategory.objects.create(main_category_code=1, main_category_name='밥류')
+        food = Food.objects.create(food_code='F1', food_name='쌀밥', category=category)
+        self.users = [
+            _create_intervention_user(f'batch{i}', self.record_date, food) for i in range(3)
+        ]
+
+    def _users(self):
+        return list(User.objects.select_related('profile').filter(id__in=[u.id for u in self.users]).order_by('id'))
+
+    def test_one_bad_user_does_not_abort_batch(self):
+        bad_profile_id = self.users[1].profile.id
+        get_user_profile_data = intervention.get_user_profile_data
+
+        def failing_profile_data(profile):
+            if profile.id == bad_profile_id:
+                raise ValueError('잘못된 프로필')
+            return get_user_profile_data(profile)
+
+        with mock.patch.object(intervention, 'get_user_profile_data', side_effect=failing_profile_data):
+            processed_count, error_count = tasks._process_intervention_users(self._users(), self.record_date)
+
+        self.assertEqual((processed_count, error_count), (2, 1))
+        self.assertEqual(
+            set(InterventionRecord.objects.values_list('user__username', flat=True)), {'batch0', 'batch2'}
+        )
+
+    def test_batch_computation_failure_falls_back_to_per_user(self):
+        with mock.patch.object(intervention, 'recommend_diet_many', side_effect=RuntimeError('일괄 계산 실패')):
+            processed_count, error_count = tasks._process_intervention_users(self._users(), self.record_date)
+
+        self.assertEqual((processed_count, error_count), (3, 0))
+        self.assertEqual(InterventionRecord.objects.count(), 3)
+
+    def test_prefetched_batch_updates_existing_records(self):
+        # 기존 기록을 삭제하지 않고 다시 실행해도 중복 생성 없이 갱신
+        tasks._process_intervention_users(self._users(), self.record_date)
+        first_ids = set(InterventionRecord.objects.values_list('id', flat=True))
+        processed_count, error_count = tasks._process_intervention_users(self._users(), self.record_date)
+
+        self.assertEqual((processed_count, error_count), (3, 0))
+        self.assertEqual(set(InterventionRecord.objects.values_list('id', flat=True)), first_ids)
+
+
+class InterventionShardingTest(TestCase):
+    """
+    샤딩 배치: 샤드/레인 분할, 샤드 태스크 집계, 배치 상태 API의 최종 집계 (Celery eager 실행)
+    """
+
+    def setUp(self):
+        from backend.celery import app
+        from celery import Celery
+        from celery.backends.cache import CacheBackend
+
+        # 브로커/결과 백엔드 없이 태스크를 즉시 실행하고 결과는 메모리에 저장
+        conf_keys = ('task_always_eager', 'task_eager_propagates', 'task_store_eager_result')
+        previous_conf = {key: app.conf[key] for key in conf_keys}
+        app.conf.update(task_always_eager=True, task_eager_propagates=True, task_store_eager_result=True)
+        self.addCleanup(app.conf.update, previous_conf)
+        backend_patch = mock.patch.object(
+            Celery, 'backend', new_callable=mock.PropertyMock,
+            return_value=CacheBackend(app=app, backend='memory'),
+        )
+        backend_patch.start()
+        self.addCleanup(backend_patch.stop)
+
+        self.record_date = tasks._get_batch_record_date()
+        category = FoodCategory.objects.create(main_category_code=1, main_category_name='밥류')
+        food = Food.objects.create(food_code='F1', food_name='쌀밥', category=category)
+        self.users = [
+            _create_intervention_user(f'shard{i}', self.record_date, food) for i in range(3)
+        ]
+        # 필수 기록이 없어 건너뛰는 사용자
+        User.objects.create(username='no_records')
+
+    def test_partition_shards(self):
+        self.assertEqual(tasks._partition_shards([5, 3, 1, 4, 2], 2), [[1, 2], [3, 4], [5]])
+        self.assertEqual(tasks._partition_shards([2, 1], 10), [[1, 2]])
+        self.assertEqual(tasks._partition_shards([2, 1], 0), [[1], [2]])
+        self.assertEqual(tasks._partition_shards([], 2), [])
+
+    def test_assign_lanes_is_balanced(self):
+        shards = [[i] for i in range(7)]
+        lanes = tasks._assign_lanes(shards, 3)
+        self.assertEqual([len(lane) for lane in lanes], [3, 2, 2])
+        self.assertEqual(sorted(shard for lane in lanes for shard in lane), shards)
+        # 동시 실행 수가 샤드 수보다 크면 레인은 샤드 수만큼만
+        self.assertEqual(tasks._assign_lanes(shards[:2], 10), [[[0]], [[1]]])
+        self.assertEqual(tasks._assign_lanes([], 4), [[]])
+
+    def test_shard_task_counts(self):
+        user_ids = [user.id for user in self.users]
+        missing_user_id = max(user_ids) + 100
+        counts = tasks.run_intervention_shard.apply(
+            args=({'processed': 2, 'error': 1, 'shards': 1}, user_ids + [missing_user_id], self.record_date.isoformat())
+        ).get()
+        # 이전 샤드 결과에 누적, 샤드 분배 이후 삭제된 사용자는 오류로 집계
+        self.assertEqual(counts, {'processed': 5, 'error': 2, 'shards': 2})
+        self.assertEqual(InterventionRecord.objects.count(), 3)
+
+    def test_batch_status_returns_shard_summary(self):
+        BatchSchedule.objects.create(
+            name='샤딩 배치', frequency='daily', use_sharding=True, shard_size=2, shard_concurrency=4
+        )
+        coordinator = tasks.run_intervention_batch_sharded.apply()
+        self.assertEqual(coordinator.get()['shard_count'], 2)
+
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        response = client.get(reverse('get_batch_task_status'), {'task_id': coordinator.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary']['result'], {
+            'record_date': self.record_date.isoformat(),
+            'processed': 3,
+            'error': 0,
+            'skipped': 1,
+            'total_users': 4,
+            'shards': 2,
+        })
+
+
+class FoodRecordDiffSaveTest(TestCase):
+    """
+    음식 기록 저장(기본 diff 모드): 바뀐 항목만 추가/수정/삭제, 오류 시 기존 기록 유지
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username='diff')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = FoodCategory.objects.create(main_category_code=1, main_category_name='밥류')
+        for code, name in [('F1', '쌀밥'), ('F2', '김치'), ('F3', '두부')]:
+            Food.objects.create(food_code=code, food_name=name, category=category, energy_kcal=100, fodmap='저')
+        self.meal_records = {
+            'breakfast': [{'food_id': 'F1', 'amount': 150}],
+            'lunch': [{'food_id': 'F1', 'amount': 200}, {'food_id': 'F2', 'amount': 50}],
+            'dinner': [],
+        }
+        self.assertEqual(self._save(self.meal_records).status_code, 201)
+        self.original = self._records()
+
+    def _save(self, meal_records, **extra):
+        return self.client.post(
+            reverse('save_food_records'),
+            {'record_date': '2026-10-01', 'meal_records': meal_records, **extra},
+            format='json',
+        )
+
+    def _records(self):
+        return {
+            (record.food.food_code, record.meal_type): (record.id, record.amount, record.updated_at)
+            for record in UserFoodRecord.objects.filter(user=self.user).select_related('food')
+        }
+
+    def _save_capturing_writes(self, meal_records, **extra):
+        with CaptureQueriesContext(connection) as queries:
+            response = self._save(meal_records, **extra)
+        writes = [
+            query['sql'].split()[0].upper() for query in queries.captured_queries
+            if 'ibsafe_userfoodrecord' in query['sql']
+            and query['sql'].split()[0].upper() in ('INSERT', 'UPDATE', 'DELETE')
+        ]
+        return response, writes
+
+    def test_identical_day_keeps_ids_and_writes_nothing(self):
+        response, writes = self._save_capturing_writes(self.meal_records)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(writes, [])
+        self.assertEqual(self._records(), self.original)
+        self.assertEqual(
+            sorted(record['id'] for record in response.data['saved_records']),
+            sorted(record_id for record_id, _, _ in self.original.values())
+        )
+
+    def test_amount_change_is_one_bulk_update(self):
+        self.meal_records['lunch'][1]['amount'] = 80
+        response, writes = self._save_capturing_writes(self.meal_records)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(writes, ['UPDATE'])
+
+        records = self._records()
+        self.assertEqual({key: value[0] for key, value in records.items()},
+                         {key: value[0] for key, value in self.original.items()})
+        self.assertEqual(records[('F2', 'lunch')][1], 80)
+        self.assertEqual(records[('F1', 'breakfast')], self.original[('F1', 'breakfast')])
+
+    def test_removed_item_is_deleted(self):
+        del self.meal_records['lunch'][1]
+        response, writes = self._save_capturing_writes(self.meal_records)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(writes, ['DELETE'])
+        self.assertEqual(set(self._records()), {('F1', 'breakfast'), ('F1', 'lunch')})
+
+    def test_new_item_is_inserted(self):
+        self.meal_records['dinner'] = [{'food_id': 'F3', 'amount': 100}]
+        response, writes = self._save_capturing_writes(self.meal_records)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(writes, ['INSERT'])
+        records = self._records()
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[('F1', 'lunch')], self.original[('F1', 'lunch')])
+
+    def test_duplicate_item_rolls_back(self):
+        # 같은 (음식, 식사 타입)이 두 번: unique 제약 오류로 전체 롤백, 기존 기록 유지
+        self.meal_records['lunch'][0]['amount'] = 300
+        self.meal_records['lunch'].append({'food_id': 'F2', 'amount': 60})
+        self.meal_records['dinner'] = [{'food_id': 'F3', 'amount': 100}]
+        response = self._save(self.meal_records)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self._records(), self.original)
+
+    def test_replace_mode_recreates_records(self):
+        response, writes = self._save_capturing_writes(self.meal_records, write_mode='replace')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(writes, ['DELETE', 'INSERT'])
+        records = self._records()
+        self.assertEqual(set(records), set(self.original))
+        self.assertTrue(set(value[0] for value in records.values()).isdisjoint(
+            value[0] for value in self.original.values()
+        ))
@@ -55,6 +55,7 @@ urlpatterns = [
     path('batch/sync/', views.sync_batch_schedules_api, name='sync_batch_schedules_api'),
     path('batch/run/', views.run_manual_batch, name='run_manual_batch'),
     path('batch/status/', views.get_batch_task_status, name='get_batch_task_status'),
+    path('batch/inference-worker/health/', views.get_inference_worker_health, name='get_inference_worker_health'),
     
     # 알림 스케줄 관련 URL 패턴들
     path('notification-schedules/active/', views.get_active_notification_schedules, name='get_active_notification_schedules'),
@@ -1,3 +1,4 @@
+import json
 from django_celery_beat.models import PeriodicTask, CrontabSchedule
 from .models import BatchSchedule
 
@@ -42,12 +43,21 @@ def sync_batch_schedules():
             else:
                 print(f"기존 CrontabSchedule 사용: {crontab.hour}:{crontab.minute}")
             
+            # 샤딩 여부에 따라 실행할 태스크 선택
+            if schedule.use_sharding:
+                task_path = 'ibsafe.tasks.run_intervention_batch_sharded'
+                task_kwargs = json.dumps({'schedule_id': schedule.id})
+            else:
+                task_path = 'ibsafe.tasks.run_intervention_batch'
+                task_kwargs = '{}'
+            
             # PeriodicTask 생성
             task_name = f'batch_intervention_{schedule.id}'
             periodic_task, created = PeriodicTask.objects.get_or_create(
                 name=task_name,
                 defaults={
-                    'task': 'ibsafe.tasks.run_intervention_batch',
+                    'task': task_path,
+                    'kwargs': task_kwargs,
                     'crontab': crontab,
                     'enabled': schedule.is_active,
                 }
@@ -55,6 +65,8 @@ def sync_batch_schedules():
             
             # 기존 태스크 업데이트
             if not created:
+                periodic_task.task = task_path
+                periodic_task.kwargs = task_kwargs
                 periodic_task.crontab = crontab
                 periodic_task.enabled = schedule.is_active
                 periodic_task.save()
@@ -112,3 +124,30 @@ def get_schedule_status():
     except Exception as e:
         print(f"스케줄 상태 조회 오류: {str(e)}")
         return None
+
+
+def sync_food_usage_stats_schedule(hour=4, minute=0):
+    """
+    음식 사용 통계 갱신 태스크를 매일 지정 시각에 실행하도록 Celery Beat에 등록
+    """
+    try:
+        crontab, _ = CrontabSchedule.objects.get_or_create(
+            minute=minute,
+            hour=hour,
+            day_of_week='*',
+            day_of_month='*',
+            month_of_year='*',
+        )
+        periodic_task, created = PeriodicTask.objects.update_or_create(
+            name='food_usage_stats_refresh',
+            defaults={
+                'task': 'ibsafe.tasks.refresh_food_usage_stats_task',
+                'crontab': crontab,
+                'enabled': True,
+            }
+        )
+        print(f"음식 사용 통계 갱신 스케줄 {'생성' if created else '업데이트'}: 매일 {hour}:{minute:02d}")
+        return periodic_task
+    except Exception as e:
+        print(f"음식 사용 통계 갱신 스케줄 등록 오류: {str(e)}")
+        return None
@@ -2,6 +2,7 @@ import re
 from django.shortcuts import render
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login
+from django.db import transaction
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -9,6 +10,9 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from .models import UserProfile, SocialAccount, Food, UserFoodRecord, UserSleepRecord, UserMedication, MedicationRecord, IBSSSSRecord, IBSSSSPainRecord, IBSQOLRecord, PSSStressRecord, UserWaterRecord, UserExerciseRecord, UserExerciseHistory, InterventionRecord, BatchSchedule, NotificationSchedule, SystemProfile, UserLoginHistory
+from .food_search import personalize_results, search_foods_cached
+from .food_autocomplete import autocomplete_foods
+from .pagination import PaginationError, paginate_by_record_date, paginate_by_record_date_boundary
 import requests
 import json
 import os
@@ -629,6 +633,7 @@ def logout(request):
 def search_foods(request):
     """
     음식 검색 API
+    mode=prefix: 입력 중 자동완성 (자모 단위 접두어, 초성 검색 지원)
     """
     try:
         query = request.GET.get('q', '').strip()
@@ -639,32 +644,15 @@ def search_foods(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # 띄어쓰기 기준으로 검색어 분리
-        search_terms = query.split()
-        
-        # 각 검색어에 대해 AND 조건으로 필터링
-        foods = Food.objects.all()
-        for term in search_terms:
-            if term.strip():  # 빈 문자열이 아닌 경우만
-                foods = foods.filter(food_name__icontains=term.strip())
-        
-        # 최대 20개 결과로 제한
-        foods = foods[:20]
-        
-        results = []
-        for food in foods:
-            results.append({
-                'id': food.food_code,
-                'name': food.food_name,
-                'calories': food.energy_kcal or 0,
-                'protein': float(food.protein_g) if food.protein_g else 0.0,
-                'fat': float(food.fat_g) if food.fat_g else 0.0,
-                'carbs': float(food.carbohydrates_g) if food.carbohydrates_g else 0.0,
-                'amount': 100,  # 기본 100g 기준
-                'category': food.category.main_category_name if food.category else '',
-                'fodmap': food.fodmap,
-                'dietary_fiber_type': food.dietary_fiber_type,
-            })
+        if request.GET.get('mode') == 'prefix':
+            # 입력 중 자동완성: 메모리 인덱스에서 접두어/초성 검색 (DB 조회 없음, 인기순)
+            results = autocomplete_foods(query)
+        else:
+            # 검색 요약 테이블(FoodSearchEntry)에서 인기순 검색 (띄어쓰기 기준 AND 조건, 같은 검색어는 캐시된 결과 사용)
+            results = search_foods_cached(query)
+            # 로그인 사용자는 최근 기록한 음식을 맨 앞에 배치
+            if request.user.is_authenticated:
+                results = personalize_results(request.user, query, results)
         
         return Response({
             'results': results,
@@ -679,6 +667,64 @@ def search_foods(request):
         )
 
 
+def _apply_food_record_diff(user, record_date, food_records):
+    """
+    하루치 음식 기록을 기존 기록과 비교하여 바뀐 항목만 저장 (트랜잭션 안에서 호출)
+    
+    (음식, 식사 타입)이 같은 기존 기록은 그대로 두거나 섭취량만 수정하고,
+    새 항목은 추가, 요청에 없는 기존 기록은 삭제합니다.
+    반환: 요청 순서대로의 기록 목록 (유지/수정된 항목은 기존 기록 객체)
+    """
+    from decimal import Decimal, InvalidOperation
+    from django.utils import timezone
+    
+    existing_records = {
+        (record.food_id, record.meal_type): record
+        for record in UserFoodRecord.objects.select_for_update().filter(
+            user=user,
+            record_date=record_date
+        )
+    }
+    
+    result = []
+    to_create = []
+    to_update = []
+    matched = set()
+    now = timezone.now()
+    for food_record in food_records:
+        key = (food_record.food_id, food_record.meal_type)
+        existing = existing_records.get(key)
+        if existing is None or key in matched:
+            # 새 항목 (같은 항목이 중복되면 unique 제약 오류로 전체 롤백)
+            to_create.append(food_record)
+            result.append(food_record)
+            continue
+        
+        matched.add(key)
+        try:
+            changed = Decimal(str(food_record.amount)).quantize(Decimal('0.01')) != existing.amount
+        except (InvalidOperation, ValueError):
+            changed = True
+        existing.food = food_record.food
+        existing.amount = food_record.amount
+        if changed:
+            existing.updated_at = now
+            to_update.append(existing)
+        result.append(existing)
+    
+    stale_ids = [record.id for key, record in existing_records.items() if key not in matched]
+    if stale_ids:
+        UserFoodRecord.objects.filter(id__in=stale_ids).delete()
+    if to_update:
+        UserFoodRecord.objects.bulk_update(to_update, ['amount', 'updated_at'])
+    if to_create:
+        UserFoodRecord.objects.bulk_create(to_create)
+    
+    print(f"음식 기록 변경: 추가 {len(to_create)}개, 수정 {len(to_update)}개, 삭제 {len(stale_ids)}개, "
+          f"유지 {len(matched) - len(to_update)}개")
+    return result
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def save_food_records(request):
@@ -709,70 +755,87 @@ def save_food_records(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 기존 기록 삭제 (같은 날짜의 같은 사용자 기록)
-        UserFoodRecord.objects.filter(
-            user=request.user,
-            record_date=record_date
-        ).delete()
+        # 요청 항목 정리 (식사 타입, 음식 코드, 섭취량) - 빈 리스트는 건너뛰기
+        try:
+            items = [
+                (meal_type, food_data['food_id'], food_data['amount'])
+                for meal_type, foods in meal_records.items() if foods
+                for food_data in foods
+            ]
+        except Exception as e:
+            return Response(
+                {'error': f'음식 기록 저장 중 오류가 발생했습니다: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         
-        saved_records = []
+        # 음식 객체를 한 번에 조회 (응답/통계에 필요한 컬럼만)
+        foods_by_code = Food.objects.only(
+            'food_code', 'food_name', 'fodmap',
+            'energy_kcal', 'protein_g', 'fat_g', 'carbohydrates_g',
+        ).in_bulk({str(food_id) for _, food_id, _ in items}, field_name='food_code')
         
-        # 각 식사 타입별로 기록 저장
-        for meal_type, foods in meal_records.items():
-            if not foods:  # 빈 리스트는 건너뛰기
-                continue
-                
-            for food_data in foods:
-                try:
-                    # 음식 객체 찾기
-                    food = Food.objects.get(food_code=food_data['food_id'])
-                    
-                    # 음식 기록 생성
-                    food_record = UserFoodRecord.objects.create(
+        for _, food_id, _ in items:
+            if str(food_id) not in foods_by_code:
+                return Response(
+                    {'error': f'음식 코드 {food_id}를 찾을 수 없습니다.'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        food_records = [
+            UserFoodRecord(
+                user=request.user,
+                food=foods_by_code[str(food_id)],
+                meal_type=meal_type,
+                amount=amount,
+                record_date=record_date
+            )
+            for meal_type, food_id, amount in items
+        ]
+        
+        # 하루치 기록 교체 (하나의 트랜잭션)
+        # - 기본(diff): 기존 기록과 비교하여 바뀐 항목만 추가/수정/삭제
+        # - write_mode=replace: 기존 기록을 모두 삭제 후 일괄 저장
+        try:
+            with transaction.atomic():
+                if data.get('write_mode') == 'replace':
+                    UserFoodRecord.objects.filter(
                         user=request.user,
-                        food=food,
-                        meal_type=meal_type,
-                        amount=food_data['amount'],
                         record_date=record_date
-                    )
-                    
-                    saved_records.append({
-                        'id': food_record.id,
-                        'food_id': food.food_code,
-                        'food_name': food.food_name,
-                        'meal_type': food_record.get_meal_type_display(),
-                        'amount': float(food_record.amount),
-                        'calories': food_record.total_calories,
-                        'protein': food_record.total_protein,
-                        'fat': food_record.total_fat,
-                        'carbohydrates': food_record.total_carbohydrates,
-                    })
-                    
-                except Food.DoesNotExist:
-                    return Response(
-                        {'error': f'음식 코드 {food_data["food_id"]}를 찾을 수 없습니다.'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                except Exception as e:
-                    return Response(
-                        {'error': f'음식 기록 저장 중 오류가 발생했습니다: {str(e)}'}, 
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
+                    ).delete()
+                    UserFoodRecord.objects.bulk_create(food_records)
+                else:
+                    food_records = _apply_food_record_diff(request.user, record_date, food_records)
+        except Exception as e:
+            return Response(
+                {'error': f'음식 기록 저장 중 오류가 발생했습니다: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         
-        # 음식 통계 계산
+        saved_records = []
+        for food_record in food_records:
+            food = food_record.food
+            saved_records.append({
+                'id': food_record.id,
+                'food_id': food.food_code,
+                'food_name': food.food_name,
+                'meal_type': food_record.get_meal_type_display(),
+                'amount': float(food_record.amount),
+                'calories': food_record.total_calories,
+                'protein': food_record.total_protein,
+                'fat': food_record.total_fat,
+                'carbohydrates': food_record.total_carbohydrates,
+            })
+        
+        # 음식 통계 계산 (이미 조회한 음식 객체 사용)
         total_food_count = len(saved_records)
         low_fodmap_count = 0
         high_fodmap_count = 0
         
-        for record in saved_records:
-            try:
-                food = Food.objects.get(food_code=record['food_id'])
-                if food.fodmap == '저':
-                    low_fodmap_count += 1
-                elif food.fodmap == '고':
-                    high_fodmap_count += 1
-            except Food.DoesNotExist:
-                continue
+        for food_record in food_records:
+            if food_record.food.fodmap == '저':
+                low_fodmap_count += 1
+            elif food_record.food.fodmap == '고':
+                high_fodmap_count += 1
         
         # 고포드맵 비율 계산
         high_fodmap_percentage = (high_fodmap_count / total_food_count * 100) if total_food_count > 0 else 0
@@ -958,11 +1021,21 @@ def get_food_records_by_date_range(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 기간별 음식 기록 조회
-        food_records = UserFoodRecord.objects.filter(
-            user=request.user,
-            record_date__range=[start_date, end_date]
-        ).select_related('food').order_by('record_date', 'meal_type', 'created_at')
+        # 기간별 음식 기록 조회 (날짜별로 묶어 응답하므로 날짜 경계에서 페이지를 끊음)
+        try:
+            food_records, next_cursor = paginate_by_record_date_boundary(
+                UserFoodRecord.objects.filter(
+                    user=request.user,
+                    record_date__range=[start_date, end_date]
+                ).select_related('food__category'),
+                request,
+                ordering=('meal_type', 'created_at')
+            )
+        except PaginationError as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         # 날짜별로 그룹화
         date_records = {}
@@ -999,7 +1072,8 @@ def get_food_records_by_date_range(request):
         
         return Response({
             'message': '기간별 음식 기록 조회 성공',
-            'foodRecords': food_records_list
+            'foodRecords': food_records_list,
+            'next_cursor': next_cursor
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -1136,11 +1210,20 @@ def get_sleep_records(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 해당 기간의 수면 기록 조회
-        sleep_records = UserSleepRecord.objects.filter(
-            user=request.user,
-            record_date__range=[start_date, end_date]
-        ).order_by('record_date')
+        # 해당 기간의 수면 기록 조회 (record_date, id 키셋 페이지네이션)
+        try:
+            sleep_records, next_cursor = paginate_by_record_date(
+                UserSleepRecord.objects.filter(
+                    user=request.user,
+                    record_date__range=[start_date, end_date]
+                ),
+                request
+            )
+        except PaginationError as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         records = []
         for record in sleep_records:
@@ -1156,7 +1239,8 @@ def get_sleep_records(request):
         
         return Response({
             'message': '수면 기록을 성공적으로 조회했습니다.',
-            'sleep_records': records
+            'sleep_records': records,
+            'next_cursor': next_cursor
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -1893,11 +1977,20 @@ def get_water_records(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 해당 기간의 물 섭취량 기록 조회
-        water_records = UserWaterRecord.objects.filter(
-            user=request.user,
-            record_date__range=[start_date, end_date]
-        ).order_by('record_date')
+        # 해당 기간의 물 섭취량 기록 조회 (record_date, id 키셋 페이지네이션)
+        try:
+            water_records, next_cursor = paginate_by_record_date(
+                UserWaterRecord.objects.filter(
+                    user=request.user,
+                    record_date__range=[start_date, end_date]
+                ),
+                request
+            )
+        except PaginationError as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         records = []
         for record in water_records:
@@ -1914,7 +2007,8 @@ def get_water_records(request):
         
         return Response({
             'message': '물 섭취량 기록을 성공적으로 조회했습니다.',
-            'water_records': records
+            'water_records': records,
+            'next_cursor': next_cursor
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -2047,11 +2141,20 @@ def get_exercise_records(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 해당 기간의 운동 기록 조회
-        exercise_records = UserExerciseRecord.objects.filter(
-            user=request.user,
-            record_date__range=[start_date, end_date]
-        ).order_by('record_date')
+        # 해당 기간의 운동 기록 조회 (record_date, id 키셋 페이지네이션)
+        try:
+            exercise_records, next_cursor = paginate_by_record_date(
+                UserExerciseRecord.objects.filter(
+                    user=request.user,
+                    record_date__range=[start_date, end_date]
+                ),
+                request
+            )
+        except PaginationError as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         records = []
         for record in exercise_records:
@@ -2069,7 +2172,8 @@ def get_exercise_records(request):
         
         return Response({
             'message': '운동 기록을 성공적으로 조회했습니다.',
-            'exercise_records': records
+            'exercise_records': records,
+            'next_cursor': next_cursor
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -2170,11 +2274,20 @@ def get_ibssss_records(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 해당 기간의 IBS-SSS 기록 조회
-        ibssss_records = IBSSSSRecord.objects.filter(
-            user=request.user,
-            record_date__range=[start_date, end_date]
-        ).order_by('record_date')
+        # 해당 기간의 IBS-SSS 기록 조회 (record_date, id 키셋 페이지네이션)
+        try:
+            ibssss_records, next_cursor = paginate_by_record_date(
+                IBSSSSRecord.objects.filter(
+                    user=request.user,
+                    record_date__range=[start_date, end_date]
+                ),
+                request
+            )
+        except PaginationError as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         records = []
         for record in ibssss_records:
@@ -2196,7 +2309,8 @@ def get_ibssss_records(request):
         
         return Response({
             'message': 'IBS-SSS 기록을 성공적으로 조회했습니다.',
-            'ibssss_records': records
+            'ibssss_records': records,
+            'next_cursor': next_cursor
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -2222,11 +2336,20 @@ def get_pss_stress_records(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 해당 기간의 PSS 스트레스 기록 조회
-        pss_stress_records = PSSStressRecord.objects.filter(
-            user=request.user,
-            record_date__range=[start_date, end_date]
-        ).order_by('record_date')
+        # 해당 기간의 PSS 스트레스 기록 조회 (record_date, id 키셋 페이지네이션)
+        try:
+            pss_stress_records, next_cursor = paginate_by_record_date(
+                PSSStressRecord.objects.filter(
+                    user=request.user,
+                    record_date__range=[start_date, end_date]
+                ),
+                request
+            )
+        except PaginationError as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         records = []
         for record in pss_stress_records:
@@ -2251,7 +2374,8 @@ def get_pss_stress_records(request):
         
         return Response({
             'message': 'PSS 스트레스 기록을 성공적으로 조회했습니다.',
-            'pss_stress_records': records
+            'pss_stress_records': records,
+            'next_cursor': next_cursor
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -2473,6 +2597,9 @@ def batch_schedule_management(request):
                     'hour': schedule.hour,
                     'minute': schedule.minute,
                     'is_active': schedule.is_active,
+                    'use_sharding': schedule.use_sharding,
+                    'shard_size': schedule.shard_size,
+                    'shard_concurrency': schedule.shard_concurrency,
                     'cron_expression': schedule.cron_expression,
                     'created_at': schedule.created_at.isoformat(),
                     'updated_at': schedule.updated_at.isoformat(),
@@ -2480,12 +2607,12 @@ def batch_schedule_management(request):
             
             # 스케줄 상태 정보 추가
             from .utils import get_schedule_status
-            status = get_schedule_status()
+            schedule_status = get_schedule_status()
             
             return Response({
                 'schedules': schedules_data,
                 'count': len(schedules_data),
-                'status': status
+                'status': schedule_status
             }, status=status.HTTP_200_OK)
         
         elif request.method == 'POST':
@@ -2513,12 +2640,22 @@ def batch_schedule_management(request):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            for field in ['shard_size', 'shard_concurrency']:
+                if field in data and not (isinstance(data[field], int) and not isinstance(data[field], bool) and data[field] >= 1):
+                    return Response(
+                        {'error': f'{field}는 1 이상의 정수여야 합니다.'}, 
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            
             schedule = BatchSchedule.objects.create(
                 name=data['name'],
                 frequency=data['frequency'],
                 hour=data['hour'],
                 minute=data['minute'],
-                is_active=data.get('is_active', True)
+                is_active=data.get('is_active', True),
+                use_sharding=data.get('use_sharding', False),
+                shard_size=data.get('shard_size', 200),
+                shard_concurrency=data.get('shard_concurrency', 4)
             )
             
             # 스케줄 동기화
@@ -2535,6 +2672,9 @@ def batch_schedule_management(request):
                     'hour': schedule.hour,
                     'minute': schedule.minute,
                     'is_active': schedule.is_active,
+                    'use_sharding': schedule.use_sharding,
+                    'shard_size': schedule.shard_size,
+                    'shard_concurrency': schedule.shard_concurrency,
                     'cron_expression': schedule.cron_expression,
                     'created_at': schedule.created_at.isoformat(),
                     'updated_at': schedule.updated_at.isoformat(),
@@ -2582,6 +2722,16 @@ def batch_schedule_management(request):
                 schedule.minute = data['minute']
             if 'is_active' in data:
                 schedule.is_active = data['is_active']
+            if 'use_sharding' in data:
+                schedule.use_sharding = data['use_sharding']
+            for field in ['shard_size', 'shard_concurrency']:
+                if field in data:
+                    if not (isinstance(data[field], int) and not isinstance(data[field], bool) and data[field] >= 1):
+                        return Response(
+                            {'error': f'{field}는 1 이상의 정수여야 합니다.'}, 
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+                    setattr(schedule, field, data[field])
             
             schedule.save()
             
@@ -2599,6 +2749,9 @@ def batch_schedule_management(request):
                     'hour': schedule.hour,
                     'minute': schedule.minute,
                     'is_active': schedule.is_active,
+                    'use_sharding': schedule.use_sharding,
+                    'shard_size': schedule.shard_size,
+                    'shard_concurrency': schedule.shard_concurrency,
                     'cron_expression': schedule.cron_expression,
                     'created_at': schedule.created_at.isoformat(),
                     'updated_at': schedule.updated_at.isoformat(),
@@ -2672,10 +2825,20 @@ def run_manual_batch(request):
     수동으로 배치 작업을 실행하는 API
     """
     try:
-        from .tasks import run_intervention_batch
+        from .tasks import run_intervention_batch, run_intervention_batch_sharded
         
-        # 비동기로 배치 작업 실행
-        task = run_intervention_batch.delay()
+        # 비동기로 배치 작업 실행 (sharded=true이면 샤드 단위로 분산 실행)
+        if request.data.get('sharded'):
+            # mode=LLM이면 샤드를 상주 추론 워커(추론 큐)에서 실행
+            mode = request.data.get('mode', 'RULE')
+            if mode not in ('RULE', 'LLM'):
+                return Response(
+                    {'error': 'mode는 RULE 또는 LLM이어야 합니다.'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            task = run_intervention_batch_sharded.delay(request.data.get('schedule_id'), mode)
+        else:
+            task = run_intervention_batch.delay()
         
         return Response({
             'message': '배치 작업이 시작되었습니다.',
@@ -2708,15 +2871,28 @@ def get_batch_task_status(request):
         from backend.celery import app
         
         task_result = AsyncResult(task_id, app=app)
+        result = task_result.result if task_result.ready() else None
         
-        return Response({
+        response_data = {
             'task_id': task_id,
             'status': task_result.status,
-            'result': task_result.result if task_result.ready() else None,
+            'result': result,
             'ready': task_result.ready(),
             'successful': task_result.successful(),
             'failed': task_result.failed(),
-        }, status=status.HTTP_200_OK)
+        }
+        
+        # 샤딩 배치의 코디네이터 태스크이면 최종 집계 태스크 상태도 함께 반환
+        if isinstance(result, dict) and result.get('summary_task_id'):
+            summary_result = AsyncResult(result['summary_task_id'], app=app)
+            response_data['summary'] = {
+                'task_id': summary_result.id,
+                'status': summary_result.status,
+                'result': summary_result.result if summary_result.successful() else None,
+                'ready': summary_result.ready(),
+            }
+        
+        return Response(response_data, status=status.HTTP_200_OK)
         
     except Exception as e:
         return Response(
@@ -2725,6 +2901,27 @@ def get_batch_task_status(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_inference_worker_health(request):
+    """
+    LLM 모드 상주 추론 워커 헬스/레디니스 조회 API
+    (워커 하트비트 기준, 준비 완료면 작업 처리 중이어도 200, 하트비트가 없거나 예열 중이면 503)
+    """
+    try:
+        from .inference_worker import check_inference_worker
+        
+        worker_state = check_inference_worker()
+        response_status = status.HTTP_200_OK if worker_state.get('ready') else status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response(worker_state, status=response_status)
+        
+    except Exception as e:
+        return Response(
+            {'error': f'추론 워커 상태 조회 중 오류가 발생했습니다: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_active_notification_schedules(request):
@@ -3129,13 +3326,23 @@ def get_medication_records_by_date_range(request):
         print(f"종료 날짜: {end_date}")
         print(f"요청 사용자: {request.user}")
         
-        # 기간별 복용약 기록 조회
-        medication_records = MedicationRecord.objects.filter(
-            user=request.user,
-            record_date__range=[start_date, end_date]
-        ).order_by('record_date', 'medication_name')
+        # 기간별 복용약 기록 조회 (같은 날짜 안에서는 약 이름 순으로 표시하므로 날짜 경계에서 페이지를 끊음)
+        try:
+            medication_records, next_cursor = paginate_by_record_date_boundary(
+                MedicationRecord.objects.filter(
+                    user=request.user,
+                    record_date__range=[start_date, end_date]
+                ),
+                request,
+                ordering=('medication_name',)
+            )
+        except PaginationError as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        print(f"조회된 기록 수: {medication_records.count()}")
+        print(f"조회된 기록 수: {len(medication_records)}")
         
         records = []
         for record in medication_records:
@@ -3159,7 +3366,8 @@ def get_medication_records_by_date_range(request):
         
         return Response({
             'message': '기간별 복용약 기록을 성공적으로 조회했습니다.',
-            'medication_records': records
+            'medication_records': records,
+            'next_cursor': next_cursor
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
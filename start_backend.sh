@@ -8,13 +8,17 @@ echo "=== IBSafe 백엔드 서버 시작 ==="
 echo "가상환경 활성화 중..."
 source ../venv_backend/bin/activate
 
+# 음식 검색 캐시 예열 (FOOD_SEARCH_CACHE_REDIS_URL 설정 시에만 공유 캐시에 저장, 미설정 시 건너뜀)
+echo "음식 검색 캐시 예열 중..."
+python manage.py warm_food_search_cache
+
 # Django 서버 시작 (백그라운드)
 echo "Django 서버 시작 중..."
 echo "서버 주소: http://0.0.0.0:9005"
 echo ""
 
-# Django 개발 서버를 백그라운드에서 실행
-nohup python manage.py runserver 0.0.0.0:9005 > django_server.log 2>&1 &
+# Django 개발 서버를 백그라운드에서 실행 (음식 자동완성 인덱스는 서버 프로세스 시작 시 생성)
+IBSAFE_WARM_AUTOCOMPLETE=1 nohup python manage.py runserver 0.0.0.0:9005 > django_server.log 2>&1 &
 SERVER_PID=$!
 
 # PID를 파일에 저장
@@ -30,10 +30,29 @@ else
     fi
 fi
 
+# 음식 카탈로그 아티팩트 생성 (워커가 엑셀 대신 바이너리 아티팩트를 읽도록)
+echo "음식 카탈로그 컴파일 중..."
+python manage.py compile_food_catalog
+
+# 음식 검색 인기순 정렬용 사용 통계 갱신 (매일 갱신 스케줄도 등록)
+echo "음식 사용 통계 갱신 중..."
+python manage.py refresh_food_usage_stats --schedule
+
+# RAG 검색 캐시 예열 (워커가 임베딩 모델을 로드하지 않고 캐시된 컨텍스트를 사용하도록)
+echo "RAG 검색 캐시 예열 중..."
+python manage.py warm_retrieval_cache
+
 # Celery Worker 시작 (백그라운드, 로그 파일로 출력)
 echo "Celery Worker 시작 중..."
 celery -A backend worker --loglevel=info --detach --logfile=celery_worker.log
 
+# LLM 모드 상주 추론 워커 (임베딩/FAISS/프롬프트를 한 번만 로드, START_INFERENCE_WORKER=1일 때)
+if [ "${START_INFERENCE_WORKER:-0}" = "1" ]; then
+    echo "추론 워커 시작 중..."
+    IBSAFE_INFERENCE_WORKER=1 celery -A backend worker -Q "${INTERVENTION_INFERENCE_QUEUE:-inference}" \
+        --pool=solo -n inference@%h --loglevel=info --detach --logfile=celery_inference_worker.log
+fi
+
 # Celery Beat 시작 (백그라운드, 로그 파일로 출력)
 echo "Celery Beat 시작 중..."
 celery -A backend beat --loglevel=info --detach --logfile=celery_beat.log